@@ -0,0 +1,275 @@
+# services/drift-detection/src/consumer.py
+import asyncio
+import os
+import signal
+import socket
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import asyncpg
+except ImportError:  # Only needed when user baselines are persisted
+    asyncpg = None
+
+from .detectors.baselines import PostgresBaselineRepository, UserBaselineManager
+from .detectors.batch_detector import BatchDriftDetector
+from shared.utils.config import settings
+from shared.utils.messaging import (
+    DRIFT_EVENTS_STREAM, SENTIMENT_SCORES_STREAM, StreamConsumer, StreamMessage,
+    StreamProducer, assigned_partitions, consumer_index, create_client
+)
+from shared.utils.metrics import register_counter, register_gauge, start_metrics_server, timed
+
+class DriftStreamProcessor:
+    """Consumes sentiment scores in batches and publishes the drift they cause.
+    
+    Every batch read from the assigned score partitions is appended to a
+    BatchDriftDetector in stream order and the touched sessions are
+    evaluated together; a session that received several scores in one batch
+    is evaluated once, on its latest state. Detected drift goes out on the
+    drift events stream, keyed by session so adaptation sees it in order.
+    
+    With ``baselines``, a new session whose scores carry a user_id is seeded
+    with that user's baseline so drift is evaluated from its first score,
+    and every score updates the baseline (flushed every
+    ``baseline_flush_interval`` seconds). With ``state_client``, the
+    detector's sessions and the applied stream positions are snapshotted to
+    Redis every ``snapshot_interval`` seconds and restored on start, so a
+    replaced pod keeps its sessions. Idle sessions are evicted by the
+    detector.
+    """
+    
+    def __init__(self, consumer: StreamConsumer, producer: Optional[StreamProducer] = None,
+                 detector: Optional[BatchDriftDetector] = None,
+                 baselines: Optional[UserBaselineManager] = None, state_client: Any = None,
+                 state_key: str = "drift:batch_state",
+                 snapshot_interval: float = settings.DRIFT_SNAPSHOT_INTERVAL_SECONDS,
+                 baseline_flush_interval: float = settings.DRIFT_BASELINE_FLUSH_INTERVAL_SECONDS):
+        self.consumer = consumer
+        self.producer = producer
+        self.detector = detector if detector is not None else BatchDriftDetector()
+        self.baselines = baselines
+        self.state_client = state_client
+        self.state_key = state_key
+        self.snapshot_interval = snapshot_interval
+        self.baseline_flush_interval = baseline_flush_interval
+        # Redelivered batches must not append the same scores twice
+        self._applied: Dict[str, Tuple[int, int]] = {}
+        self._unpublished: List[Tuple[str, Dict[str, Any]]] = []
+        self._users: Dict[str, str] = {}  # session -> user, for sessions whose scores name one
+        self._last_snapshot: Optional[float] = None  # Both clocks start with the first batch
+        self._last_baseline_flush: Optional[float] = None
+    
+    async def handle(self, messages: List[StreamMessage], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        fresh = [m for m in messages if _stream_position(m.id) > self._applied.get(m.stream, (0, 0))]
+        latest = {message.key: message.payload for message in fresh}
+        await self._seed_new_sessions(latest)
+        
+        with timed("drift_update"):
+            if fresh:
+                self.detector.add_scores(
+                    [message.key for message in fresh],
+                    [message.payload["overall_sentiment"] for message in fresh],
+                    now=now
+                )
+                # Only once they are in, so a failed add is retried with the redelivered batch
+                for message in fresh:
+                    self._applied[message.stream] = _stream_position(message.id)
+                    user_id = message.payload.get("user_id")
+                    if self.baselines is not None and user_id:
+                        self.baselines.update(user_id, message.payload["overall_sentiment"])
+            result = self.detector.detect(list(latest))
+        
+        events = self._unpublished
+        for session_id, drift in result.to_dicts().items():
+            if not drift["drift_detected"]:
+                continue
+            score = latest[session_id]
+            events.append((session_id, {
+                "session_id": session_id,
+                "user_id": self._users.get(session_id),
+                "message_id": score.get("message_id"),
+                "timestamp": score.get("timestamp") or datetime.utcnow().isoformat(),
+                "drift_magnitude": drift["drift_magnitude"],
+                "drift_direction": drift["drift_direction"],
+                "confidence": drift["confidence"],
+                "window_analyzed": self.detector.window_size,
+                "detection_method": drift["method"],
+                "methods_detected": drift["methods_detected"],
+                "current_sentiment": score["overall_sentiment"]
+            }))
+        if events and self.producer is not None:
+            # Kept until published, so a failed publish is retried with the redelivered batch
+            self._unpublished = events
+            await self.producer.publish_many(events)
+        self._unpublished = []
+        self.evict_idle(now)
+        await self._maintain(now)
+    
+    async def _seed_new_sessions(self, latest: Dict[str, Dict[str, Any]]) -> None:
+        for session_id, score in latest.items():
+            user_id = score.get("user_id")
+            if not user_id or session_id in self.detector:
+                continue
+            self._users[session_id] = user_id
+            if self.baselines is None:
+                continue
+            try:
+                baseline = await self.baselines.get(user_id)
+            except Exception as e:
+                # The session still gets drift detection, against its own first window
+                print(f"Error loading baseline for user {user_id}: {e}")
+                continue
+            if baseline is not None:
+                self.detector.seed_baseline(session_id, *baseline)
+    
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop sessions with no score for the detector's idle timeout; returns their ids"""
+        evicted = self.detector.evict_idle(now)
+        users = {self._users.pop(session_id) for session_id in evicted if session_id in self._users}
+        if users and self.baselines is not None:
+            for user_id in users - set(self._users.values()):
+                self.baselines.forget(user_id)
+        return evicted
+    
+    async def _maintain(self, now: float) -> None:
+        if self._last_snapshot is None:
+            self._last_snapshot = self._last_baseline_flush = now
+        if self.baselines is not None and now - self._last_baseline_flush >= self.baseline_flush_interval:
+            self._last_baseline_flush = now
+            try:
+                await self.baselines.flush()
+            except Exception as e:
+                print(f"Error flushing user baselines: {e}")
+        if self.state_client is not None and now - self._last_snapshot >= self.snapshot_interval:
+            self._last_snapshot = now
+            try:
+                await self.snapshot()
+            except Exception as e:
+                print(f"Error snapshotting drift state: {e}")
+    
+    async def snapshot(self, chunk_size: int = 1000) -> int:
+        """Write every session and the applied stream positions to Redis, like SessionStateStore.snapshot"""
+        client = self.state_client
+        # Build under temporary keys and swap them in, so a restore never sees a partial snapshot
+        staging, applied_key = f"{self.state_key}:staging", f"{self.state_key}:applied"
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(staging, f"{applied_key}:staging")
+        written = 0
+        for session_id, blob in self.detector.export_sessions():
+            user_id = self._users.get(session_id, "")
+            pipe.hset(staging, session_id, user_id.encode("utf-8") + b"\0" + blob)
+            written += 1
+            if written % chunk_size == 0:
+                await pipe.execute()
+        if self._applied:
+            pipe.hset(f"{applied_key}:staging", mapping={
+                stream: f"{milliseconds}-{sequence}" for stream, (milliseconds, sequence) in self._applied.items()
+            })
+            pipe.rename(f"{applied_key}:staging", applied_key)
+        if written:
+            pipe.rename(staging, self.state_key)
+        else:
+            pipe.delete(self.state_key)
+        await pipe.execute()
+        return written
+    
+    async def restore(self) -> int:
+        """Load the sessions and applied positions of the last snapshot"""
+        client = self.state_client
+        restored = 0
+        async for session_id, value in client.hscan_iter(self.state_key, count=1000):
+            if isinstance(session_id, bytes):
+                session_id = session_id.decode("utf-8")
+            user_id, _, blob = value.partition(b"\0")
+            self.detector.import_session(session_id, blob)
+            if user_id:
+                self._users[session_id] = user_id.decode("utf-8")
+            restored += 1
+        
+        for stream, position in (await client.hgetall(f"{self.state_key}:applied")).items():
+            if isinstance(stream, bytes):
+                stream, position = stream.decode("utf-8"), position.decode("utf-8")
+            self._applied[stream] = _stream_position(position)
+        return restored
+    
+    async def close(self) -> None:
+        """Persist pending baselines and a final snapshot"""
+        if self.baselines is not None:
+            try:
+                await self.baselines.flush()
+            except Exception as e:
+                print(f"Error flushing user baselines: {e}")
+        if self.state_client is not None:
+            await self.snapshot()
+    
+    async def run(self) -> None:
+        if self.state_client is not None:
+            try:
+                print(f"Restored {await self.restore()} drift sessions")
+            except Exception as e:
+                print(f"Error restoring drift state: {e}")
+        try:
+            await self.consumer.run(self.handle)
+        finally:
+            await self.close()
+
+def _stream_position(message_id: str) -> Tuple[int, int]:
+    milliseconds, sequence = message_id.split("-")
+    return int(milliseconds), int(sequence)
+
+def build_processor(client: Any = None, pool: Any = None) -> DriftStreamProcessor:
+    # XREADGROUP blocks for up to STREAM_BLOCK_MS before answering
+    client = client or create_client(
+        socket_timeout=settings.STREAM_BLOCK_MS / 1000 + settings.REDIS_SOCKET_TIMEOUT_SECONDS
+    )
+    index = consumer_index()
+    consumer = StreamConsumer(
+        client, SENTIMENT_SCORES_STREAM,
+        group="drift-detection",
+        consumer=os.getenv("HOSTNAME", socket.gethostname()),
+        partitions=assigned_partitions(index, settings.STREAM_CONSUMER_COUNT, settings.STREAM_PARTITIONS)
+    )
+    return DriftStreamProcessor(
+        consumer, StreamProducer(client, DRIFT_EVENTS_STREAM),
+        detector=BatchDriftDetector(idle_timeout_seconds=settings.DRIFT_SESSION_IDLE_SECONDS),
+        baselines=UserBaselineManager(PostgresBaselineRepository(pool)) if pool is not None else None,
+        # The snapshot belongs to the partitions, so a pod replacing this ordinal picks it up
+        state_client=client,
+        state_key=f"drift:batch_state:{index}"
+    )
+
+def register_metrics(processor: DriftStreamProcessor) -> None:
+    stats = processor.consumer.stats
+    register_counter("stream_messages_consumed", "Score messages handled", lambda: stats["messages"])
+    register_counter("stream_messages_dead_lettered", "Score messages given up on", lambda: stats["dead_lettered"])
+    register_gauge("drift_sessions_tracked", "Sessions with drift state in this worker",
+                   lambda: len(processor.detector))
+    register_gauge("drift_unpublished_events", "Drift events waiting to be (re)published",
+                   lambda: len(processor._unpublished))
+
+async def main() -> None:
+    pool = None
+    if settings.DRIFT_USER_BASELINES:
+        if asyncpg is None:
+            raise ImportError("asyncpg is required for DRIFT_USER_BASELINES")
+        pool = await asyncpg.create_pool(settings.DATABASE_URL, min_size=1, max_size=2)
+    processor = build_processor(pool=pool)
+    register_metrics(processor)
+    # No HTTP app here, so /metrics gets its own port
+    start_metrics_server("drift-detection")
+    
+    # Stop reading on SIGTERM so the final baseline flush and snapshot run
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, processor.consumer.stop)
+    try:
+        await processor.run()
+    finally:
+        if pool is not None:
+            await pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+# services/drift-detection/src/detectors/baselines.py
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from .statistical_detector import StatisticalDriftDetector
+from ..utils.math_utils import RollingStats
+
+_LOAD_BASELINE = """
+    SELECT sentiment_baseline, sentiment_baseline_variance, sentiment_baseline_count
+    FROM users
+    WHERE id = $1::uuid
+"""
+
+# Merges per-user deltas into the stored moments in one statement (Chan et al.),
+# so concurrent pods flushing the same user never overwrite each other
+_MERGE_BASELINES = """
+    UPDATE users AS u SET
+        sentiment_baseline =
+            (COALESCE(u.sentiment_baseline, 0) * COALESCE(u.sentiment_baseline_count, 0) + d.mean * d.n)
+            / (COALESCE(u.sentiment_baseline_count, 0) + d.n),
+        sentiment_baseline_variance =
+            (COALESCE(u.sentiment_baseline_variance, 0) * COALESCE(u.sentiment_baseline_count, 0) + d.m2
+             + (d.mean - COALESCE(u.sentiment_baseline, 0)) ^ 2
+               * COALESCE(u.sentiment_baseline_count, 0) * d.n / (COALESCE(u.sentiment_baseline_count, 0) + d.n))
+            / (COALESCE(u.sentiment_baseline_count, 0) + d.n),
+        sentiment_baseline_count = COALESCE(u.sentiment_baseline_count, 0) + d.n
+    FROM unnest($1::uuid[], $2::int[], $3::float8[], $4::float8[]) AS d(id, n, mean, m2)
+    WHERE u.id = d.id
+"""
+
+class PostgresBaselineRepository:
+    """Per-user baseline moments stored on the users table (migration 005)"""
+    
+    def __init__(self, pool: Any):
+        self.pool = pool  # asyncpg pool or connection
+    
+    async def load(self, user_id: str) -> Optional[RollingStats]:
+        if not _is_uuid(user_id):
+            return None  # Not a users row (e.g. an anonymous client id), so nothing is stored
+        row = await self.pool.fetchrow(_LOAD_BASELINE, user_id)
+        if row is None or not row["sentiment_baseline_count"]:
+            return None
+        return RollingStats.from_moments(
+            row["sentiment_baseline_count"],
+            row["sentiment_baseline"],
+            row["sentiment_baseline_variance"] or 0.0
+        )
+    
+    async def save_deltas(self, deltas: Dict[str, RollingStats]) -> None:
+        user_ids = [user_id for user_id in deltas if _is_uuid(user_id)]
+        if not user_ids:
+            return
+        await self.pool.execute(
+            _MERGE_BASELINES,
+            user_ids,
+            [deltas[u].count for u in user_ids],
+            [deltas[u].mean for u in user_ids],
+            [deltas[u].m2 for u in user_ids]
+        )
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+class UserBaselineManager:
+    """Streaming per-user sentiment baselines used to seed session detectors.
+    
+    A user's stored mean/variance is loaded the first time one of their
+    sessions starts and kept in memory; new scores only update a pending
+    delta, which flush() merges into the database for all users in one
+    statement. Seeding a detector with the result lets it evaluate drift
+    from the session's first message instead of waiting for window_size
+    scores to build its own baseline.
+    """
+    
+    def __init__(self, repository: Any, min_count: int = 20):
+        self.repository = repository
+        self.min_count = min_count  # Below this the stored baseline is too noisy to trust
+        self._persisted: Dict[str, RollingStats] = {}
+        self._pending: Dict[str, RollingStats] = {}
+    
+    async def get(self, user_id: str) -> Optional[Tuple[float, float]]:
+        """(mean, std) of everything seen for the user, or None if too few scores"""
+        persisted = self._persisted.get(user_id)
+        if persisted is None:
+            persisted = await self.repository.load(user_id) or RollingStats()
+            self._persisted[user_id] = persisted
+        
+        stats = RollingStats.from_moments(persisted.count, persisted.mean, persisted.variance)
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            stats.merge(pending)
+        
+        if stats.count < self.min_count:
+            return None
+        return stats.mean, stats.std
+    
+    def update(self, user_id: str, score: float) -> None:
+        pending = self._pending.get(user_id)
+        if pending is None:
+            pending = self._pending[user_id] = RollingStats()
+        pending.add(score)
+    
+    async def seed(self, detector: StatisticalDriftDetector, user_id: str) -> bool:
+        """Seed a new session's detector with the user's baseline; False if there is none yet"""
+        baseline = await self.get(user_id)
+        if baseline is None:
+            return False
+        detector.seed_baseline(*baseline)
+        return True
+    
+    async def flush(self) -> int:
+        """Persist pending deltas; returns the number of users written"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        
+        try:
+            await self.repository.save_deltas(pending)
+        except Exception:
+            # Keep the deltas (and anything added meanwhile) for the next flush
+            for user_id, delta in pending.items():
+                current = self._pending.get(user_id)
+                if current is not None:
+                    delta.merge(current)
+                self._pending[user_id] = delta
+            raise
+        
+        for user_id, delta in pending.items():
+            persisted = self._persisted.get(user_id)
+            if persisted is not None:
+                persisted.merge(delta)
+        return len(pending)
+    
+    def forget(self, user_id: str) -> None:
+        """Drop the cached baseline once the user has no live sessions"""
+        self._persisted.pop(user_id, None)
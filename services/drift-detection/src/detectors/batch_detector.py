@@ -0,0 +1,342 @@
+# services/drift-detection/src/detectors/batch_detector.py
+import struct
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import special
+
+# Same guard scipy.stats.linregress adds to keep t finite when |r| == 1
+_TINY = 1.0e-20
+
+# Exported session layout: last_activity (float64), whether it is seeded and the
+# seeded baseline's (mean, std), then the float32 scores, oldest first
+_STATE = struct.Struct("<d?dd")
+
+DIRECTIONS = {1: "positive", -1: "negative", 0: "stable"}
+METHODS = ("cusum", "mean_shift", "trend")
+
+@dataclass
+class BatchDriftResult:
+    """Column-oriented drift results for a set of sessions"""
+    session_ids: List[str]
+    sufficient: np.ndarray        # False where the session has < window_size scores
+    drift_detected: np.ndarray
+    drift_magnitude: np.ndarray
+    drift_direction: np.ndarray   # +1 positive, -1 negative, 0 stable
+    confidence: np.ndarray
+    methods_detected: np.ndarray  # (sessions, 3) flags in METHODS order
+    
+    def detected_session_ids(self) -> List[str]:
+        return [self.session_ids[i] for i in np.flatnonzero(self.drift_detected)]
+    
+    def to_dicts(self) -> Dict[str, Dict[str, any]]:
+        """Per-session dicts in the same shape StatisticalDriftDetector returns"""
+        results = {}
+        for i, session_id in enumerate(self.session_ids):
+            if not self.sufficient[i]:
+                results[session_id] = {
+                    "drift_detected": False,
+                    "drift_magnitude": 0.0,
+                    "drift_direction": "stable",
+                    "confidence": 0.0,
+                    "method": "insufficient_data"
+                }
+                continue
+            results[session_id] = {
+                "drift_detected": bool(self.drift_detected[i]),
+                "drift_magnitude": float(self.drift_magnitude[i]),
+                "drift_direction": DIRECTIONS[int(self.drift_direction[i])],
+                "confidence": float(self.confidence[i]),
+                "method": "ensemble",
+                "methods_detected": [m for m, flag in zip(METHODS, self.methods_detected[i]) if flag]
+            }
+        return results
+
+class BatchDriftDetector:
+    """Drift detection for many sessions at once over a shared score matrix.
+    
+    Each session owns one row of a preallocated (sessions x max_history)
+    ring buffer, so appending a score is an index write and evaluating every
+    session that received new scores is a handful of NumPy operations over
+    the dirty rows, not one Python detector per session. The statistics and
+    decision rules are those of StatisticalDriftDetector, including sessions
+    seeded with a user's baseline (seed_baseline), which are evaluated from
+    their first score. Sessions without a score for ``idle_timeout_seconds``
+    give their rows back on evict_idle, like SessionStateStore.
+    """
+    
+    def __init__(self, window_size: int = 10, threshold: float = 0.3,
+                 max_history: int = 100, initial_capacity: int = 1024,
+                 idle_timeout_seconds: float = 1800):
+        self.window_size = window_size
+        self.threshold = threshold
+        self.max_history = max_history
+        self.idle_timeout_seconds = idle_timeout_seconds
+        
+        self.scores = np.zeros((initial_capacity, max_history), dtype=np.float64)
+        self.starts = np.zeros(initial_capacity, dtype=np.int64)
+        self.lengths = np.zeros(initial_capacity, dtype=np.int64)
+        self.dirty = np.zeros(initial_capacity, dtype=bool)
+        self.in_use = np.zeros(initial_capacity, dtype=bool)
+        self.last_activity = np.zeros(initial_capacity, dtype=np.float64)
+        self.seeded = np.zeros(initial_capacity, dtype=bool)
+        self.seed_mean = np.zeros(initial_capacity, dtype=np.float64)
+        self.seed_std = np.zeros(initial_capacity, dtype=np.float64)
+        
+        self.session_index: Dict[str, int] = {}
+        self.row_sessions: List[Optional[str]] = [None] * initial_capacity
+        self._free_rows = list(range(initial_capacity - 1, -1, -1))
+    
+    def __len__(self) -> int:
+        return len(self.session_index)
+    
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.session_index
+    
+    def seed_baseline(self, session_id: str, mean: float, std: float) -> None:
+        """Compare the session against a known (mean, std) baseline instead of its own first window"""
+        row = self.session_index.get(session_id)
+        if row is None:
+            row = self._allocate_row(session_id)
+        self.seeded[row] = True
+        self.seed_mean[row] = mean
+        self.seed_std[row] = std
+    
+    def add_scores(self, session_ids: Iterable[str], scores: Iterable[float],
+                   now: Optional[float] = None) -> None:
+        """Append one score per entry; a session may appear several times, in order"""
+        rows, ranks = [], []
+        seen: Dict[int, int] = {}
+        for session_id in session_ids:
+            row = self.session_index.get(session_id)
+            if row is None:
+                row = self._allocate_row(session_id)
+            rank = seen.get(row, 0)
+            seen[row] = rank + 1
+            rows.append(row)
+            ranks.append(rank)
+        
+        rows = np.asarray(rows, dtype=np.int64)
+        ranks = np.asarray(ranks, dtype=np.int64)
+        scores = np.asarray(list(scores), dtype=np.float64)
+        if len(rows) != len(scores):
+            raise ValueError("session_ids and scores must have the same length")
+        
+        # Repeated sessions are appended in rounds so every write hits a distinct row
+        for rank in range(int(ranks.max()) + 1 if len(ranks) else 0):
+            mask = ranks == rank
+            self._append(rows[mask], scores[mask])
+        self.last_activity[rows] = time.time() if now is None else now
+    
+    def detect(self, session_ids: Optional[Iterable[str]] = None) -> BatchDriftResult:
+        """Evaluate the given sessions, or every session with new scores since the last call"""
+        if session_ids is None:
+            rows = np.flatnonzero(self.dirty)
+        else:
+            rows = np.asarray([self.session_index[s] for s in session_ids], dtype=np.int64)
+        self.dirty[rows] = False
+        
+        window = self.window_size
+        n = len(rows)
+        lengths = self.lengths[rows]
+        seeded = self.seeded[rows]
+        sufficient = (lengths >= window) | (seeded & (lengths > 0))
+        
+        drift_detected = np.zeros(n, dtype=bool)
+        drift_magnitude = np.zeros(n)
+        drift_direction = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n)
+        methods_detected = np.zeros((n, len(METHODS)), dtype=bool)
+        
+        ready = np.flatnonzero(sufficient & ~seeded)
+        if len(ready):
+            (drift_detected[ready], drift_magnitude[ready], drift_direction[ready],
+             confidence[ready], methods_detected[ready]) = self._evaluate(rows[ready], window)
+        
+        # Seeded sessions compare their latest (up to window_size) scores with the seed,
+        # one group per window length
+        ready = np.flatnonzero(sufficient & seeded)
+        windows = np.minimum(lengths[ready], window)
+        for length in np.unique(windows):
+            group = ready[windows == length]
+            seeded_rows = rows[group]
+            (drift_detected[group], drift_magnitude[group], drift_direction[group],
+             confidence[group], methods_detected[group]) = self._evaluate(
+                seeded_rows, int(length), self.seed_mean[seeded_rows], self.seed_std[seeded_rows]
+            )
+        
+        return BatchDriftResult(
+            session_ids=[self.row_sessions[row] for row in rows],
+            sufficient=sufficient,
+            drift_detected=drift_detected,
+            drift_magnitude=drift_magnitude,
+            drift_direction=drift_direction,
+            confidence=confidence,
+            methods_detected=methods_detected
+        )
+    
+    def remove_session(self, session_id: str) -> None:
+        row = self.session_index.pop(session_id)
+        self.lengths[row] = 0
+        self.starts[row] = 0
+        self.dirty[row] = False
+        self.in_use[row] = False
+        self.seeded[row] = False
+        self.row_sessions[row] = None
+        self._free_rows.append(row)
+    
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop sessions with no score for idle_timeout_seconds; returns their ids"""
+        cutoff = (time.time() if now is None else now) - self.idle_timeout_seconds
+        evicted = [self.row_sessions[row] for row in np.flatnonzero(self.in_use & (self.last_activity < cutoff))]
+        for session_id in evicted:
+            self.remove_session(session_id)
+        return evicted
+    
+    def export_sessions(self) -> Iterator[Tuple[str, bytes]]:
+        """(session_id, packed state) for every session, for snapshots"""
+        for session_id, row in self.session_index.items():
+            header = _STATE.pack(self.last_activity[row], self.seeded[row], self.seed_mean[row], self.seed_std[row])
+            yield session_id, header + self.history(session_id).astype("<f4").tobytes()
+    
+    def import_session(self, session_id: str, blob: bytes) -> None:
+        """Restore one exported session, replacing any state it already has"""
+        last_activity, seeded, mean, std = _STATE.unpack_from(blob)
+        scores = np.frombuffer(blob, dtype="<f4", offset=_STATE.size)[-self.max_history:]
+        if session_id in self.session_index:
+            self.remove_session(session_id)
+        row = self._allocate_row(session_id)
+        self.scores[row, :len(scores)] = scores
+        self.lengths[row] = len(scores)
+        self.last_activity[row] = last_activity
+        self.seeded[row] = seeded
+        self.seed_mean[row] = mean
+        self.seed_std[row] = std
+    
+    def history(self, session_id: str) -> np.ndarray:
+        """Scores for one session, oldest first"""
+        row = self.session_index[session_id]
+        positions = (self.starts[row] + np.arange(self.lengths[row])) % self.max_history
+        return self.scores[row, positions]
+    
+    def _evaluate(self, rows: np.ndarray, window: int, baseline_mean: Optional[np.ndarray] = None,
+                  baseline_std: Optional[np.ndarray] = None):
+        """Drift over each row's latest ``window`` scores, against the given baseline or the row's first window"""
+        seeded = baseline_mean is not None
+        offsets = np.arange(window)
+        starts = self.starts[rows][:, None]
+        lengths = self.lengths[rows][:, None]
+        
+        recent = self.scores[rows[:, None], (starts + lengths - window + offsets) % self.max_history]
+        if not seeded:
+            baseline = self.scores[rows[:, None], (starts + offsets) % self.max_history]
+            baseline_mean = baseline.mean(axis=1)
+            baseline_std = baseline.std(axis=1)
+        
+        # CUSUM against the baseline; a loop over the window, vectorized across sessions
+        baseline_std = np.where(baseline_std == 0, 0.1, baseline_std)  # Avoid division by zero
+        standardized = (recent - baseline_mean[:, None]) / baseline_std[:, None]
+        cusum_pos = np.zeros(len(rows))
+        cusum_neg = np.zeros(len(rows))
+        max_cusum = np.zeros(len(rows))
+        for k in range(window):
+            cusum_pos = np.maximum(0, cusum_pos + standardized[:, k] - 0.5)
+            cusum_neg = np.maximum(0, cusum_neg - standardized[:, k] - 0.5)
+            max_cusum = np.maximum(max_cusum, np.maximum(cusum_pos, cusum_neg))
+        
+        cusum_detected = max_cusum > self.threshold * 5
+        cusum_magnitude = max_cusum / 5
+        cusum_direction = np.where(cusum_pos > cusum_neg, 1, -1)
+        cusum_confidence = np.minimum(1.0, max_cusum / 10)
+        
+        # Mean shift
+        recent_mean = recent.mean(axis=1)
+        shift_magnitude = np.abs(recent_mean - baseline_mean)
+        shift_detected = shift_magnitude > self.threshold
+        shift_direction = np.where(recent_mean > baseline_mean, 1, -1)
+        shift_confidence = np.minimum(1.0, shift_magnitude / 2)
+        
+        # Trend: the linregress of each recent window against its positions. A seeded
+        # session can be evaluated before it has enough points for one
+        if seeded and window < 3:
+            slope = np.zeros(len(rows))
+            r_value = p_value = np.full(len(rows), np.nan)
+        else:
+            slope, r_value, p_value = self._linregress(recent)
+        trend_change = slope * window
+        with np.errstate(invalid="ignore"):
+            trend_detected = (p_value < 0.05) & (np.abs(trend_change) > self.threshold)
+        trend_direction = np.where(slope > 0, 1, -1)
+        trend_magnitude = np.abs(trend_change)
+        trend_confidence = np.where(np.isnan(r_value), 0.0, r_value ** 2)
+        
+        # Majority vote, direction from the magnitude-weighted vote of agreeing methods
+        methods_detected = np.stack([cusum_detected, shift_detected, trend_detected], axis=1)
+        drift_detected = methods_detected.sum(axis=1) > len(METHODS) / 2
+        signed_magnitude = (cusum_detected * cusum_direction * cusum_magnitude
+                            + shift_detected * shift_direction * shift_magnitude
+                            + trend_detected * trend_direction * trend_magnitude)
+        drift_direction = np.where(drift_detected, np.where(signed_magnitude > 0, 1, -1), 0)
+        drift_magnitude = (cusum_magnitude + shift_magnitude + trend_magnitude) / len(METHODS)
+        confidence = (cusum_confidence + shift_confidence + trend_confidence) / len(METHODS)
+        
+        return drift_detected, drift_magnitude, drift_direction, confidence, methods_detected
+    
+    def _linregress(self, windows: np.ndarray):
+        """Row-wise scipy.stats.linregress(np.arange(w), row) -> (slope, r, p)"""
+        n = windows.shape[1]
+        x_centered = np.arange(n) - (n - 1) / 2
+        y_centered = windows - windows.mean(axis=1, keepdims=True)
+        ssxm = np.mean(x_centered ** 2)
+        ssxym = (y_centered * x_centered).mean(axis=1)
+        ssym = (y_centered ** 2).mean(axis=1)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_value = np.clip(ssxym / np.sqrt(ssxm * ssym), -1.0, 1.0)
+        undefined = ssym == 0
+        r_value[undefined] = np.where(ssxym[undefined] == 0, np.nan, 0.0)
+        slope = ssxym / ssxm
+        
+        if n == 2:
+            p_value = np.where(ssym == 0, 1.0, 0.0)
+        else:
+            df = n - 2
+            t = r_value * np.sqrt(df / ((1.0 - r_value + _TINY) * (1.0 + r_value + _TINY)))
+            p_value = 2 * special.stdtr(df, -np.abs(t))
+        return slope, r_value, p_value
+    
+    def _append(self, rows: np.ndarray, scores: np.ndarray) -> None:
+        lengths = self.lengths[rows]
+        full = lengths == self.max_history
+        positions = (self.starts[rows] + lengths) % self.max_history
+        self.scores[rows, positions] = scores
+        # A full ring overwrites its oldest score, so the start moves forward
+        self.starts[rows[full]] = (self.starts[rows[full]] + 1) % self.max_history
+        self.lengths[rows[~full]] += 1
+        self.dirty[rows] = True
+    
+    def _allocate_row(self, session_id: str) -> int:
+        if not self._free_rows:
+            self._grow()
+        row = self._free_rows.pop()
+        self.session_index[session_id] = row
+        self.row_sessions[row] = session_id
+        self.in_use[row] = True
+        return row
+    
+    def _grow(self) -> None:
+        old_capacity = len(self.lengths)
+        added = max(1, old_capacity)  # Double the capacity
+        self.scores = np.concatenate([self.scores, np.zeros((added, self.max_history))])
+        self.starts = np.concatenate([self.starts, np.zeros(added, dtype=np.int64)])
+        self.lengths = np.concatenate([self.lengths, np.zeros(added, dtype=np.int64)])
+        self.dirty = np.concatenate([self.dirty, np.zeros(added, dtype=bool)])
+        self.in_use = np.concatenate([self.in_use, np.zeros(added, dtype=bool)])
+        self.last_activity = np.concatenate([self.last_activity, np.zeros(added)])
+        self.seeded = np.concatenate([self.seeded, np.zeros(added, dtype=bool)])
+        self.seed_mean = np.concatenate([self.seed_mean, np.zeros(added)])
+        self.seed_std = np.concatenate([self.seed_std, np.zeros(added)])
+        self.row_sessions.extend([None] * added)
+        self._free_rows.extend(range(old_capacity + added - 1, old_capacity - 1, -1))
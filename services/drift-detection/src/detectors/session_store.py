@@ -0,0 +1,132 @@
+# services/drift-detection/src/detectors/session_store.py
+import struct
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .statistical_detector import StatisticalDriftDetector
+
+# Snapshot layout: last_activity (float64) followed by the float32 scores, oldest first
+_HEADER = struct.Struct("<d")
+
+class CompactSessionState:
+    """Per-session score ring stored as packed float32 instead of a deque of floats"""
+    
+    __slots__ = ("scores", "start", "last_activity")
+    
+    def __init__(self, scores: Optional[Iterable[float]] = None, last_activity: float = 0.0):
+        self.scores = array("f", scores or ())
+        self.start = 0  # Index of the oldest score once the ring is full
+        self.last_activity = last_activity
+    
+    def append(self, score: float, capacity: int) -> None:
+        if len(self.scores) < capacity:
+            self.scores.append(score)
+        else:
+            self.scores[self.start] = score
+            self.start = (self.start + 1) % capacity
+    
+    def history(self) -> List[float]:
+        """Scores oldest first"""
+        if not self.start:
+            return self.scores.tolist()
+        return self.scores[self.start:].tolist() + self.scores[:self.start].tolist()
+    
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.last_activity) + array("f", self.history()).tobytes()
+    
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CompactSessionState":
+        (last_activity,) = _HEADER.unpack_from(blob)
+        state = cls(last_activity=last_activity)
+        state.scores.frombytes(blob[_HEADER.size:])
+        return state
+
+class SessionStateStore:
+    """Drift state for every live session in compact form, with idle eviction.
+    
+    Sessions are kept in least-recently-active order (like the partial index
+    idx_sessions_active_last_activity), so evicting idle sessions only visits
+    the ones being evicted. A single stateless detector evaluates whichever
+    session received a score.
+    """
+    
+    def __init__(self, window_size: int = 10, threshold: float = 0.3,
+                 max_history: int = 100, idle_timeout_seconds: float = 1800):
+        self.detector = StatisticalDriftDetector(window_size=window_size, threshold=threshold)
+        self.max_history = max_history
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.sessions: "OrderedDict[str, CompactSessionState]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self.sessions)
+    
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.sessions
+    
+    def add_sentiment_score(self, session_id: str, score: float, now: Optional[float] = None) -> CompactSessionState:
+        """Append a score to a session, creating it if needed, and mark it active"""
+        now = time.time() if now is None else now
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = self.sessions[session_id] = CompactSessionState()
+        else:
+            self.sessions.move_to_end(session_id)
+        state.append(score, self.max_history)
+        state.last_activity = now
+        return state
+    
+    def detect_drift(self, session_id: str, score: float, now: Optional[float] = None,
+                     baseline: Optional[Tuple[float, float]] = None) -> Dict[str, any]:
+        """Record a score and evaluate drift for its session, optionally against a user baseline"""
+        state = self.add_sentiment_score(session_id, score, now)
+        return self.detector.evaluate(state.history(), baseline)
+    
+    def history(self, session_id: str) -> List[float]:
+        return self.sessions[session_id].history()
+    
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop sessions with no activity for idle_timeout_seconds; returns their ids"""
+        cutoff = (time.time() if now is None else now) - self.idle_timeout_seconds
+        evicted = []
+        while self.sessions:
+            session_id, state = next(iter(self.sessions.items()))
+            if state.last_activity >= cutoff:
+                break
+            self.sessions.popitem(last=False)
+            evicted.append(session_id)
+        return evicted
+    
+    def snapshot(self, client: Any, key: str = "drift:session_state", chunk_size: int = 1000) -> int:
+        """Write every session to a Redis hash so a restarted pod keeps its baselines"""
+        # Build under a temporary key and swap it in, so readers never see a partial snapshot
+        staging = f"{key}:staging"
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(staging)
+        written = 0
+        for session_id, state in self.sessions.items():
+            pipe.hset(staging, session_id, state.to_bytes())
+            written += 1
+            if written % chunk_size == 0:
+                pipe.execute()
+        if written:
+            pipe.rename(staging, key)
+        else:
+            pipe.delete(key)
+        pipe.execute()
+        return written
+    
+    def restore(self, client: Any, key: str = "drift:session_state") -> int:
+        """Load sessions from a snapshot, keeping least-recently-active order"""
+        states = []
+        for session_id, blob in client.hscan_iter(key, count=1000):
+            if isinstance(session_id, bytes):
+                session_id = session_id.decode("utf-8")
+            states.append((session_id, CompactSessionState.from_bytes(blob)))
+        
+        states.sort(key=lambda item: item[1].last_activity)
+        for session_id, state in states:
+            self.sessions[session_id] = state
+            self.sessions.move_to_end(session_id)
+        return len(states)
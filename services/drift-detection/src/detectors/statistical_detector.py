@@ -1,48 +1,77 @@
 # services/drift-detection/src/detectors/statistical_detector.py
 import numpy as np
 from scipy import stats
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from collections import deque
 
 class StatisticalDriftDetector:
-    def __init__(self, window_size: int = 10, threshold: float = 0.3):
+    def __init__(self, window_size: int = 10, threshold: float = 0.3,
+                 baseline: Optional[Tuple[float, float]] = None):
         self.window_size = window_size
         self.threshold = threshold
         self.sentiment_history = deque(maxlen=100)  # Keep last 100 scores
+        # (mean, std) from the user's persisted baseline; without it the session's
+        # own first window_size scores serve as the baseline
+        self.seeded_baseline = baseline
     
     def add_sentiment_score(self, score: float) -> None:
         """Add a new sentiment score to history"""
         self.sentiment_history.append(score)
     
+    def seed_baseline(self, mean: float, std: float) -> None:
+        """Compare against a known baseline so drift is evaluated from the first message"""
+        self.seeded_baseline = (mean, std)
+    
     def detect_drift(self, current_score: float) -> Dict[str, any]:
         """Detect if there's significant drift in sentiment"""
         self.add_sentiment_score(current_score)
+        return self.evaluate(self.sentiment_history)
+    
+    def evaluate(self, history: Sequence[float],
+                 baseline: Optional[Tuple[float, float]] = None) -> Dict[str, any]:
+        """Run the drift checks over a score history, oldest first"""
+        baseline = baseline if baseline is not None else self.seeded_baseline
         
-        if len(self.sentiment_history) < self.window_size:
-            return {
-                "drift_detected": False,
-                "drift_magnitude": 0.0,
-                "drift_direction": "stable",
-                "confidence": 0.0,
-                "method": "insufficient_data"
-            }
-        
-        # Get recent window and baseline
-        recent_scores = list(self.sentiment_history)[-self.window_size:]
-        baseline_scores = list(self.sentiment_history)[:self.window_size]
+        if baseline is None:
+            if len(history) < self.window_size:
+                return self._insufficient_data_result()
+            
+            # Get recent window and baseline
+            recent_scores = list(history)[-self.window_size:]
+            baseline_scores = list(history)[:self.window_size]
+            baseline_mean = np.mean(baseline_scores)
+            baseline_std = np.std(baseline_scores)
+        else:
+            if not history:
+                return self._insufficient_data_result()
+            
+            recent_scores = list(history)[-self.window_size:]
+            baseline_mean, baseline_std = baseline
         
         # Calculate drift using multiple methods
-        cusum_result = self._cusum_detection(recent_scores, baseline_scores)
-        mean_shift_result = self._mean_shift_detection(recent_scores, baseline_scores)
-        trend_result = self._trend_detection(recent_scores)
+        cusum_result = self._cusum_detection(recent_scores, baseline_mean, baseline_std)
+        mean_shift_result = self._mean_shift_detection(recent_scores, baseline_mean)
+        if len(recent_scores) < 3 and baseline is not None:
+            # A seeded session can be evaluated before it has enough points for a trend
+            trend_result = self._trend_result(0.0, np.nan, np.nan, len(recent_scores))
+        else:
+            trend_result = self._trend_detection(recent_scores)
         
         # Combine results
         return self._combine_results([cusum_result, mean_shift_result, trend_result])
     
-    def _cusum_detection(self, recent: List[float], baseline: List[float]) -> Dict[str, any]:
+    def _insufficient_data_result(self) -> Dict[str, any]:
+        return {
+            "drift_detected": False,
+            "drift_magnitude": 0.0,
+            "drift_direction": "stable",
+            "confidence": 0.0,
+            "method": "insufficient_data"
+        }
+    
+    def _cusum_detection(self, recent: List[float], baseline_mean: float, baseline_std: float) -> Dict[str, any]:
         """CUSUM (Cumulative Sum) change point detection"""
-        baseline_mean = np.mean(baseline)
-        baseline_std = np.std(baseline) or 0.1  # Avoid division by zero
+        baseline_std = baseline_std or 0.1  # Avoid division by zero
         
         # Calculate CUSUM
         cusum_pos = 0
@@ -55,6 +84,9 @@ class StatisticalDriftDetector:
             cusum_neg = max(0, cusum_neg - standardized - 0.5)
             max_cusum = max(max_cusum, cusum_pos, cusum_neg)
         
+        return self._cusum_result(max_cusum, cusum_pos, cusum_neg)
+    
+    def _cusum_result(self, max_cusum: float, cusum_pos: float, cusum_neg: float) -> Dict[str, any]:
         drift_detected = max_cusum > self.threshold * 5  # Scale threshold
         drift_direction = "positive" if cusum_pos > cusum_neg else "negative"
         
@@ -66,9 +98,63 @@ class StatisticalDriftDetector:
             "method": "cusum"
         }
     
-    def _mean_shift_detection(self, recent: List[float], baseline: List[float]) -> Dict[str, any]:
+    def _mean_shift_detection(self, recent: List[float], baseline_mean: float) -> Dict[str, any]:
         """Simple mean shift detection"""
         recent_mean = np.mean(recent)
-        baseline_mean = np.mean(baseline)
         
-        drift_
+        return self._mean_shift_result(recent_mean, baseline_mean)
+    
+    def _mean_shift_result(self, recent_mean: float, baseline_mean: float) -> Dict[str, any]:
+        drift_magnitude = abs(recent_mean - baseline_mean)
+        drift_detected = drift_magnitude > self.threshold
+        drift_direction = "positive" if recent_mean > baseline_mean else "negative"
+        
+        return {
+            "drift_detected": drift_detected,
+            "drift_magnitude": drift_magnitude,
+            "drift_direction": drift_direction if drift_detected else "stable",
+            "confidence": min(1.0, drift_magnitude / 2),  # Sentiment spans [-1, 1]
+            "method": "mean_shift"
+        }
+    
+    def _trend_detection(self, recent: List[float]) -> Dict[str, any]:
+        """Linear regression trend over the recent window"""
+        x = np.arange(len(recent))
+        slope, intercept, r_value, p_value, std_err = stats.linregress(x, recent)
+        
+        return self._trend_result(slope, r_value, p_value, len(recent))
+    
+    def _trend_result(self, slope: float, r_value: float, p_value: float, window: int) -> Dict[str, any]:
+        # Total change implied by the trend across the window
+        trend_change = slope * window
+        drift_detected = p_value < 0.05 and abs(trend_change) > self.threshold
+        drift_direction = "positive" if slope > 0 else "negative"
+        
+        return {
+            "drift_detected": drift_detected,
+            "drift_magnitude": abs(trend_change),
+            "drift_direction": drift_direction if drift_detected else "stable",
+            "confidence": 0.0 if np.isnan(r_value) else r_value ** 2,
+            "method": "trend"
+        }
+    
+    def _combine_results(self, results: List[Dict[str, any]]) -> Dict[str, any]:
+        """Majority vote across detection methods"""
+        detections = [r for r in results if r["drift_detected"]]
+        drift_detected = len(detections) > len(results) / 2
+        
+        # Direction follows the magnitude-weighted vote of the agreeing methods
+        signed_magnitude = sum(
+            r["drift_magnitude"] if r["drift_direction"] == "positive" else -r["drift_magnitude"]
+            for r in detections
+        )
+        drift_direction = "positive" if signed_magnitude > 0 else "negative"
+        
+        return {
+            "drift_detected": drift_detected,
+            "drift_magnitude": sum(r["drift_magnitude"] for r in results) / len(results),
+            "drift_direction": drift_direction if drift_detected else "stable",
+            "confidence": sum(r["confidence"] for r in results) / len(results),
+            "method": "ensemble",
+            "methods_detected": [r["method"] for r in detections]
+        }
@@ -0,0 +1,114 @@
+# services/drift-detection/src/detectors/streaming_detector.py
+from typing import Dict, Optional, Tuple
+
+from .statistical_detector import StatisticalDriftDetector
+from ..utils.math_utils import RollingRegression, RollingStats
+
+class StreamingDriftDetector(StatisticalDriftDetector):
+    """StatisticalDriftDetector that maintains its statistics incrementally.
+    
+    Produces the same results as the parent, but instead of copying the
+    history into lists and recomputing everything per message it keeps:
+    
+    * Welford mean/variance of the baseline window (the oldest
+      ``window_size`` scores), updated in place when the history slides;
+    * mean/variance and the regression cross term of the recent window, so
+      the trend slope and p-value come from O(1) closed forms.
+    
+    The CUSUM restarts at the start of the recent window against the current
+    baseline on every call, exactly like the parent, so it stays an
+    allocation-free pass over ``window_size`` scores - independent of the
+    history length. The running sums are re-derived from the history every
+    ``window_size`` slides to stop floating point error from accumulating.
+    """
+    
+    def __init__(self, window_size: int = 10, threshold: float = 0.3,
+                 baseline: Optional[Tuple[float, float]] = None):
+        super().__init__(window_size, threshold, baseline)
+        self.baseline = RollingStats()
+        self.recent = RollingRegression()
+        # Adjacent unequal pairs in each window; zero means the window is constant,
+        # which keeps its variance exactly 0 like np.std instead of float residue
+        self._baseline_breaks = 0
+        self._recent_breaks = 0
+        self._slides_since_sync = 0
+    
+    def add_sentiment_score(self, score: float) -> None:
+        history = self.sentiment_history
+        window = self.window_size
+        
+        if len(history) < window:
+            if history:
+                changed = int(history[-1] != score)
+                self._baseline_breaks += changed
+                self._recent_breaks += changed
+            self.baseline.add(score)
+            self.recent.push(score)
+        else:
+            if len(history) == history.maxlen:
+                # Oldest score falls off; the next one slides into the baseline window
+                joining = history[window] if window < len(history) else score
+                if window > 1:
+                    self._baseline_breaks += int(history[window - 1] != joining) - int(history[0] != history[1])
+                self.baseline.replace(history[0], joining)
+            if window > 1:
+                self._recent_breaks += int(history[-1] != score) - int(history[-window] != history[-window + 1])
+            self.recent.slide(history[-window], score)
+            self._slides_since_sync += 1
+        
+        history.append(score)
+        
+        if self._slides_since_sync >= window:
+            self._resync()
+    
+    def detect_drift(self, current_score: float) -> Dict[str, any]:
+        """Detect if there's significant drift in sentiment"""
+        self.add_sentiment_score(current_score)
+        
+        history = self.sentiment_history
+        if self.seeded_baseline is None:
+            if len(history) < self.window_size:
+                return self._insufficient_data_result()
+            baseline_mean = self.baseline.mean
+            baseline_std = self.baseline.std if self._baseline_breaks else 0
+        else:
+            baseline_mean, baseline_std = self.seeded_baseline
+        baseline_std = baseline_std or 0.1  # Avoid division by zero
+        
+        # The recent window is partial while a seeded session is still filling it
+        size = min(self.window_size, len(history))
+        cusum_pos = 0
+        cusum_neg = 0
+        max_cusum = 0
+        for index in range(-size, 0):
+            standardized = (history[index] - baseline_mean) / baseline_std
+            cusum_pos = max(0, cusum_pos + standardized - 0.5)
+            cusum_neg = max(0, cusum_neg - standardized - 0.5)
+            max_cusum = max(max_cusum, cusum_pos, cusum_neg)
+        
+        if size < 3 and self.seeded_baseline is not None:
+            slope, r_value, p_value = 0.0, float("nan"), float("nan")
+        else:
+            slope, r_value, p_value = self.recent.linregress(constant=not self._recent_breaks)
+        
+        return self._combine_results([
+            self._cusum_result(max_cusum, cusum_pos, cusum_neg),
+            self._mean_shift_result(self.recent.stats.mean, baseline_mean),
+            self._trend_result(slope, r_value, p_value, size)
+        ])
+    
+    def _resync(self) -> None:
+        """Recompute the running statistics exactly from the stored history"""
+        history = self.sentiment_history
+        size = min(self.window_size, len(history))
+        
+        self.baseline.reset()
+        self.recent.reset()
+        for index in range(size):
+            self.baseline.add(history[index])
+        for index in range(-size, 0):
+            self.recent.push(history[index])
+        
+        self._baseline_breaks = sum(history[i] != history[i + 1] for i in range(size - 1))
+        self._recent_breaks = sum(history[i] != history[i + 1] for i in range(-size, -1))
+        self._slides_since_sync = 0
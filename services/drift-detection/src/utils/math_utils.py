@@ -1 +1,131 @@
+# services/drift-detection/src/utils/math_utils.py
+import math
+from typing import Tuple
 
+from scipy import special
+
+# Same guard scipy.stats.linregress adds to keep t finite when |r| == 1
+_TINY = 1.0e-20
+
+class RollingStats:
+    """Welford running mean/variance that also supports removal and replacement"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value: float) -> None:
+        if self.count <= 1:
+            self.reset()
+            return
+        old_mean = self.mean
+        self.count -= 1
+        self.mean = (old_mean * (self.count + 1) - value) / self.count
+        self.m2 = max(0.0, self.m2 - (value - old_mean) * (value - self.mean))
+
+    def replace(self, old: float, new: float) -> None:
+        """Swap one value for another without changing the count (sliding window)"""
+        old_mean = self.mean
+        self.mean += (new - old) / self.count
+        self.m2 = max(0.0, self.m2 + (new - old) * (new - self.mean + old - old_mean))
+
+    def merge(self, other: "RollingStats") -> None:
+        """Fold in another set of statistics (Chan et al. parallel update)"""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @classmethod
+    def from_moments(cls, count: int, mean: float, variance: float) -> "RollingStats":
+        stats = cls()
+        stats.count = count
+        stats.mean = mean
+        stats.m2 = variance * count
+        return stats
+
+    @property
+    def variance(self) -> float:
+        """Population variance, matching np.var/np.std defaults"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+class RollingRegression:
+    """Least-squares fit of y against its position (0..n-1) in a sliding window.
+
+    Keeps the window's mean/variance plus the positional cross term so the
+    slope, r and p-value of ``scipy.stats.linregress(np.arange(n), window)``
+    are available in O(1) after every update.
+    """
+
+    __slots__ = ("stats", "sum_xy")
+
+    def __init__(self):
+        self.stats = RollingStats()
+        self.sum_xy = 0.0
+
+    def reset(self) -> None:
+        self.stats.reset()
+        self.sum_xy = 0.0
+
+    def push(self, value: float) -> None:
+        """Append while the window is still filling"""
+        self.sum_xy += self.stats.count * value
+        self.stats.add(value)
+
+    def slide(self, old: float, new: float) -> None:
+        """Drop the oldest value and append a new one; every position shifts down by one"""
+        n = self.stats.count
+        total = self.stats.mean * n
+        self.sum_xy += old - total + (n - 1) * new
+        self.stats.replace(old, new)
+
+    def linregress(self, constant: bool = False) -> Tuple[float, float, float]:
+        """(slope, r_value, p_value) following scipy.stats.linregress.
+
+        Pass ``constant=True`` when the caller knows every value in the window
+        is identical, so rounding residue isn't mistaken for a tiny trend.
+        """
+        n = self.stats.count
+        x_mean = (n - 1) / 2
+        ssxm = (n * n - 1) / 12
+        if constant:
+            ssxym = ssym = 0.0
+        else:
+            ssxym = self.sum_xy / n - x_mean * self.stats.mean
+            ssym = self.stats.variance
+
+        if ssxm == 0.0 or ssym == 0.0:
+            r = math.nan if ssxym == 0 else 0.0
+        else:
+            r = max(-1.0, min(1.0, ssxym / math.sqrt(ssxm * ssym)))
+
+        slope = ssxym / ssxm if ssxm else math.nan
+        if n == 2:
+            return slope, r, 0.0 if ssym else 1.0
+        return slope, r, student_t_two_sided_p(r, n - 2)
+
+def student_t_two_sided_p(r: float, df: int) -> float:
+    """Two-sided p-value of a Pearson r with ``df`` degrees of freedom"""
+    if math.isnan(r):
+        return math.nan
+    t = r * math.sqrt(df / ((1.0 - r + _TINY) * (1.0 + r + _TINY)))
+    return float(2 * special.stdtr(df, -abs(t)))
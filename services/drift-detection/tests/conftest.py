@@ -0,0 +1,102 @@
+# services/drift-detection/tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+# Services import shared config/models from the repository root
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+class FakeStreams:
+    """The Redis Streams subset StreamConsumer uses, for one consumer group"""
+
+    def __init__(self):
+        self.streams = {}  # name -> [(id, fields)]
+        self.delivered = {}  # name -> entries handed out with ">"
+        self.pending = {}  # (name, id) -> [consumer, delivered at (ms), deliveries]
+        self.hashes = {}  # For drift state snapshots
+        self.now_ms = 0
+
+    def add(self, name, fields):
+        entries = self.streams.setdefault(name, [])
+        message_id = f"{len(entries) + 1}-0"
+        entries.append((message_id, fields))
+        return message_id
+
+    async def xadd(self, name, fields, **kwargs):
+        return self.add(name, fields)
+
+    async def xgroup_create(self, name, group, id="0", mkstream=False):
+        self.streams.setdefault(name, [])
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        response = []
+        for name, start in streams.items():
+            entries = self.streams.get(name, [])
+            if start == ">":
+                offset = self.delivered.get(name, 0)
+                batch = entries[offset:offset + count]
+                self.delivered[name] = offset + len(batch)
+                for message_id, _ in batch:
+                    self.pending[(name, message_id)] = [consumer, self.now_ms, 1]
+            else:
+                batch = [(message_id, fields) for message_id, fields in entries
+                         if self.pending.get((name, message_id), [None])[0] == consumer][:count]
+                for message_id, _ in batch:
+                    self.pending[(name, message_id)][2] += 1
+            if batch:
+                response.append([name, batch])
+        return response
+
+    async def xack(self, name, group, *ids):
+        for message_id in ids:
+            self.pending.pop((name, message_id), None)
+
+    async def xautoclaim(self, name, group, consumer, min_idle_time, start_id="0-0", count=None, justid=False):
+        claimed = []
+        for (stream, message_id), entry in self.pending.items():
+            if stream == name and self.now_ms - entry[1] >= min_idle_time:
+                entry[0], entry[1] = consumer, self.now_ms
+                claimed.append(message_id)
+        return ["0-0", claimed, []]
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        values = self.hashes.setdefault(key, {})
+        for name, item in ({field: value} if mapping is None else mapping).items():
+            values[name.encode()] = item.encode() if isinstance(item, str) else item
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hscan_iter(self, key, count=None):
+        for item in list(self.hashes.get(key, {}).items()):
+            yield item
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    async def rename(self, source, destination):
+        self.hashes[destination] = self.hashes.pop(source)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.client, name), args, kwargs))
+        return queue
+
+    async def execute(self):
+        return [await method(*args, **kwargs) for method, args, kwargs in self.calls]
+
+@pytest.fixture
+def fake_streams():
+    return FakeStreams()
@@ -0,0 +1,217 @@
+# services/drift-detection/tests/test_consumer.py
+import asyncio
+import json
+
+import pytest
+
+from src.consumer import DriftStreamProcessor
+from src.detectors.baselines import UserBaselineManager
+from src.detectors.batch_detector import BatchDriftDetector
+from src.utils.math_utils import RollingStats
+from shared.utils.messaging import StreamConsumer, StreamMessage, assigned_partitions, consumer_index, partition_for
+
+class RecordingProducer:
+    def __init__(self, failures=0):
+        self.published = []
+        self.failures = failures
+
+    async def publish_many(self, items):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("redis unavailable")
+        self.published.extend(items)
+
+class FakeBaselineRepository:
+    def __init__(self, stored=None):
+        self.stored = stored or {}
+        self.saved = []
+
+    async def load(self, user_id):
+        return self.stored.get(user_id)
+
+    async def save_deltas(self, deltas):
+        self.saved.append({user_id: delta.count for user_id, delta in deltas.items()})
+
+def score_messages(session_id, scores, first_id=1, user_id=None):
+    messages = [
+        StreamMessage(stream="sentiment.scores:0", id=f"{first_id + i}-0", key=session_id,
+                      payload={"session_id": session_id, "overall_sentiment": score})
+        for i, score in enumerate(scores)
+    ]
+    for message in messages:
+        if user_id is not None:
+            message.payload["user_id"] = user_id
+    return messages
+
+def test_partitions_are_stable_and_split_between_consumers():
+    assert partition_for("session-42", 16) == partition_for("session-42", 16)
+    owned = [assigned_partitions(i, 3, 16) for i in range(3)]
+    assert sorted(p for partitions in owned for p in partitions) == list(range(16))
+
+def test_consumer_index_comes_from_the_statefulset_ordinal():
+    assert consumer_index(3, -1, hostname="drift-worker-2") == 2
+    assert consumer_index(3, 1, hostname="drift-worker-2") == 1  # Configured explicitly
+    assert consumer_index(1, -1, hostname="laptop") == 0
+    # Deployment replicas have no ordinal, and an ordinal must fit the count
+    with pytest.raises(ValueError):
+        consumer_index(3, -1, hostname="drift-worker-7d4b9c-x2kqp")
+    with pytest.raises(ValueError):
+        consumer_index(3, -1, hostname="drift-worker-3")
+
+def test_processor_publishes_drift_and_ignores_redelivery():
+    producer = RecordingProducer(failures=1)
+    processor = DriftStreamProcessor(consumer=None, producer=producer,
+                                     detector=BatchDriftDetector(window_size=5))
+    batch = score_messages("s1", [0.6] * 10 + [-0.6] * 5)
+
+    # First attempt fails to publish; the redelivered batch must not append the scores again
+    try:
+        asyncio.run(processor.handle(batch))
+    except ConnectionError:
+        pass
+    asyncio.run(processor.handle(batch))
+
+    assert len(processor.detector.history("s1")) == 15
+    assert [session_id for session_id, _ in producer.published] == ["s1"]
+    event = producer.published[0][1]
+    assert event["drift_direction"] == "negative"
+    assert event["current_sentiment"] == -0.6
+
+def test_scores_are_applied_again_after_a_failed_add():
+    class FlakyDetector(BatchDriftDetector):
+        failures = 1
+
+        def add_scores(self, session_ids, scores, now=None):
+            if self.failures:
+                self.failures -= 1
+                raise MemoryError("no rows left")
+            super().add_scores(session_ids, scores, now)
+
+    processor = DriftStreamProcessor(consumer=None, detector=FlakyDetector(window_size=5))
+    batch = score_messages("s1", [0.1, 0.2, 0.3])
+    with pytest.raises(MemoryError):
+        asyncio.run(processor.handle(batch))
+    asyncio.run(processor.handle(batch))
+    assert list(processor.detector.history("s1")) == [0.1, 0.2, 0.3]
+
+def test_idle_sessions_give_their_detector_rows_back():
+    processor = DriftStreamProcessor(consumer=None,
+                                     detector=BatchDriftDetector(window_size=5, idle_timeout_seconds=60))
+    asyncio.run(processor.handle(score_messages("s1", [0.1, 0.2]), now=0))
+    asyncio.run(processor.handle(score_messages("s2", [0.3], first_id=10), now=30))
+    assert len(processor.detector) == 2
+
+    asyncio.run(processor.handle(score_messages("s2", [0.4], first_id=20), now=90))
+    assert len(processor.detector) == 1
+    assert list(processor.detector.history("s2")) == [0.3, 0.4]
+
+def test_sessions_are_seeded_from_their_users_baseline():
+    stored = RollingStats.from_moments(50, 0.5, 0.01)
+    repository = FakeBaselineRepository({"u1": stored})
+    producer = RecordingProducer()
+    processor = DriftStreamProcessor(consumer=None, producer=producer,
+                                     detector=BatchDriftDetector(window_size=10, idle_timeout_seconds=60),
+                                     baselines=UserBaselineManager(repository), baseline_flush_interval=30)
+
+    # Two scores are far short of a window, but the seeded baseline already shows the drop
+    asyncio.run(processor.handle(score_messages("s1", [-0.4, -0.5], user_id="u1"), now=0))
+    assert [session_id for session_id, _ in producer.published] == ["s1"]
+    assert producer.published[0][1]["user_id"] == "u1"
+    assert producer.published[0][1]["drift_direction"] == "negative"
+
+    # The scores went into the user's baseline, and the user is forgotten with their last session
+    asyncio.run(processor.handle(score_messages("s2", [0.1], first_id=10), now=90))
+    assert repository.saved == [{"u1": 2}]
+    assert "u1" not in processor.baselines._persisted
+
+def test_drift_state_survives_a_restart(fake_streams):
+    def processor_for():
+        return DriftStreamProcessor(consumer=None, detector=BatchDriftDetector(window_size=5),
+                                    state_client=fake_streams, state_key="drift:state:0", snapshot_interval=60)
+
+    first = processor_for()
+    asyncio.run(first.handle(score_messages("s1", [0.5, 0.25], user_id="u1"), now=0))
+    asyncio.run(first.handle(score_messages("s2", [0.125], first_id=10), now=60))  # Snapshots
+
+    replacement = processor_for()
+    assert asyncio.run(replacement.restore()) == 2
+    assert list(replacement.detector.history("s1")) == [0.5, 0.25]
+    assert replacement._users == {"s1": "u1"}
+    # Entries the snapshot already holds are not applied twice when redelivered
+    asyncio.run(replacement.handle(score_messages("s2", [0.125, 0.75], first_id=10), now=70))
+    assert list(replacement.detector.history("s2")) == [0.125, 0.75]
+
+def consumer_for(client, name, **kwargs):
+    return StreamConsumer(client, "scores", group="drift", consumer=name, partitions=[0],
+                          batch_size=10, block_ms=0, **kwargs)
+
+def publish(client, count):
+    for i in range(count):
+        client.add("scores:0", {"key": f"s{i}", "data": json.dumps({"seq": i})})
+
+def test_entries_left_pending_by_a_replaced_consumer_are_claimed(fake_streams):
+    publish(fake_streams, 3)
+    seen = []
+
+    async def handler(messages):
+        seen.extend(message.payload["seq"] for message in messages)
+
+    async def scenario():
+        old = consumer_for(fake_streams, "pod-a", claim_idle_ms=1000)
+        await old.read()  # Its own (empty) pending entries first
+        assert len(await old.read()) == 3  # Delivered, then the pod goes away without acking
+        new = consumer_for(fake_streams, "pod-b", claim_idle_ms=1000)
+        assert await new.claim_idle() == 0  # Not idle long enough yet
+        fake_streams.now_ms += 1000
+        assert await new.claim_idle() == 3
+        while await new.process(handler):
+            pass
+        return new
+
+    new = asyncio.run(scenario())
+    assert seen == [0, 1, 2]
+    assert not fake_streams.pending and new.stats["claimed"] == 3
+
+def test_only_the_failing_message_of_a_batch_is_dead_lettered(fake_streams):
+    publish(fake_streams, 5)
+    seen = []
+
+    async def handler(messages):
+        if any(message.payload["seq"] == 2 for message in messages):
+            raise ValueError("bad score")
+        seen.extend(message.payload["seq"] for message in messages)
+
+    async def scenario():
+        consumer = consumer_for(fake_streams, "pod-a", max_deliveries=2)
+        for _ in range(3):
+            await consumer.process(handler)
+        return consumer
+
+    consumer = asyncio.run(scenario())
+    assert seen == [0, 1, 3, 4]
+    dead = fake_streams.streams["scores:dead"]
+    assert [json.loads(fields["data"])["seq"] for _, fields in dead] == [2]
+    assert consumer.stats["dead_lettered"] == 1 and not fake_streams.pending
+
+def test_undecodable_entries_are_dead_lettered_without_stopping_the_batch(fake_streams):
+    publish(fake_streams, 2)
+    fake_streams.add("scores:0", {"key": "s2", "data": "{not json"})
+    fake_streams.add("scores:0", {"key": "s3", "ct": "application/unknown", "data": "{}"})
+    publish(fake_streams, 1)
+    seen = []
+
+    async def handler(messages):
+        seen.extend(message.key for message in messages)
+
+    async def scenario():
+        consumer = consumer_for(fake_streams, "pod-a")
+        for _ in range(3):
+            await consumer.process(handler)
+        return consumer
+
+    consumer = asyncio.run(scenario())
+    assert seen == ["s0", "s1", "s0"]
+    dead = fake_streams.streams["scores:dead"]
+    assert [fields["key"] for _, fields in dead] == ["s2", "s3"]
+    assert dead[0][1]["data"] == "{not json" and "JSONDecodeError" in dead[0][1]["error"]
+    assert consumer.stats["dead_lettered"] == 2 and not fake_streams.pending
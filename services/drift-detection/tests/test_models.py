@@ -1 +1,266 @@
+# services/drift-detection/tests/test_models.py
+import asyncio
 
+import numpy as np
+import pytest
+
+from src.detectors.baselines import UserBaselineManager
+from src.detectors.statistical_detector import StatisticalDriftDetector
+from src.detectors.streaming_detector import StreamingDriftDetector
+
+def synthetic_session(seed: int, length: int = 300):
+    """Noisy conversation with neutral stretches, a negative slide and a recovery"""
+    rng = np.random.default_rng(seed)
+    scores = []
+    for start in range(0, length, 60):
+        segment = rng.choice(["noise", "neutral", "decline", "recovery"])
+        if segment == "neutral":
+            scores.extend([0.0] * 15)
+        elif segment == "decline":
+            scores.extend(np.linspace(0.4, -0.8, 60) + rng.normal(0, 0.1, 60))
+        elif segment == "recovery":
+            scores.extend(np.linspace(-0.6, 0.5, 60) + rng.normal(0, 0.1, 60))
+        else:
+            scores.extend(rng.normal(0.1, 0.3, 60))
+    return [float(np.clip(score, -1, 1)) for score in scores]
+
+def assert_same_result(expected, actual):
+    assert actual["method"] == expected["method"]
+    assert actual["drift_detected"] == expected["drift_detected"]
+    assert actual["drift_direction"] == expected["drift_direction"]
+    assert actual["drift_magnitude"] == pytest.approx(expected["drift_magnitude"], rel=1e-9, abs=1e-9)
+    assert actual["confidence"] == pytest.approx(expected["confidence"], rel=1e-9, abs=1e-9)
+    assert actual.get("methods_detected") == expected.get("methods_detected")
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("window_size", [3, 10, 30])
+def test_streaming_detector_matches_reference(seed, window_size):
+    reference = StatisticalDriftDetector(window_size=window_size)
+    streaming = StreamingDriftDetector(window_size=window_size)
+
+    for score in synthetic_session(seed):
+        assert_same_result(reference.detect_drift(score), streaming.detect_drift(score))
+
+    assert list(streaming.sentiment_history) == list(reference.sentiment_history)
+
+def test_detector_reports_insufficient_data_until_window_fills():
+    detector = StatisticalDriftDetector(window_size=5)
+    results = [detector.detect_drift(0.2) for _ in range(5)]
+    assert [r["method"] for r in results[:4]] == ["insufficient_data"] * 4
+    assert results[4]["method"] == "ensemble"
+
+def test_detector_flags_sustained_negative_drift():
+    detector = StatisticalDriftDetector(window_size=10)
+    for _ in range(10):
+        detector.detect_drift(0.6)
+    for score in np.linspace(0.5, -0.9, 10):
+        result = detector.detect_drift(float(score))
+
+    assert result["drift_detected"]
+    assert result["drift_direction"] == "negative"
+
+def test_batch_detector_matches_per_session_reference():
+    from src.detectors.batch_detector import BatchDriftDetector
+
+    sessions = {f"session-{seed}": synthetic_session(seed, length=180) for seed in range(6)}
+    references = {session_id: StatisticalDriftDetector() for session_id in sessions}
+    # Small capacity so the matrix has to grow while sessions arrive
+    batch = BatchDriftDetector(initial_capacity=2)
+
+    rng = np.random.default_rng(42)
+    cursors = {session_id: 0 for session_id in sessions}
+    while any(cursors[s] < len(sessions[s]) for s in sessions):
+        # Each tick delivers 0-3 new scores to every session, in order
+        ids, scores = [], []
+        for session_id, history in sessions.items():
+            for _ in range(rng.integers(0, 4)):
+                if cursors[session_id] < len(history):
+                    ids.append(session_id)
+                    scores.append(history[cursors[session_id]])
+                    cursors[session_id] += 1
+
+        expected = {}
+        for session_id, score in zip(ids, scores):
+            expected[session_id] = references[session_id].detect_drift(score)
+        batch.add_scores(ids, scores)
+        actual = batch.detect().to_dicts()
+
+        assert set(actual) == set(expected)
+        for session_id in expected:
+            assert_same_result(expected[session_id], actual[session_id])
+
+    for session_id, reference in references.items():
+        assert batch.history(session_id).tolist() == list(reference.sentiment_history)
+
+def test_batch_detector_reuses_rows_of_removed_sessions():
+    from src.detectors.batch_detector import BatchDriftDetector
+
+    batch = BatchDriftDetector(initial_capacity=1)
+    batch.add_scores(["a"] * 12, [0.5] * 12)
+    batch.remove_session("a")
+    batch.add_scores(["b"], [0.1])
+
+    assert len(batch) == 1
+    assert batch.history("b").tolist() == [0.1]
+    assert batch.detect().to_dicts()["b"]["method"] == "insufficient_data"
+
+@pytest.mark.parametrize("window_size", [3, 10])
+def test_seeded_batch_detector_matches_reference(window_size):
+    from src.detectors.batch_detector import BatchDriftDetector
+
+    baselines = {"seeded-a": (0.3, 0.2), "seeded-b": (-0.1, 0.0)}
+    references = {session_id: StatisticalDriftDetector(window_size=window_size, baseline=baseline)
+                  for session_id, baseline in baselines.items()}
+    references["unseeded"] = StatisticalDriftDetector(window_size=window_size)
+    batch = BatchDriftDetector(window_size=window_size, initial_capacity=1)
+    for session_id, baseline in baselines.items():
+        batch.seed_baseline(session_id, *baseline)
+
+    histories = {session_id: synthetic_session(seed + 1, length=120) for seed, session_id in enumerate(references)}
+    for position in range(min(map(len, histories.values()))):
+        # Sessions start one score apart, so seeded windows of different lengths share a tick
+        ids = [s for offset, s in enumerate(histories) if position >= offset]
+        scores = [histories[s][position - offset] for offset, s in enumerate(histories) if position >= offset]
+        batch.add_scores(ids, scores)
+        actual = batch.detect(ids).to_dicts()
+        for session_id, score in zip(ids, scores):
+            assert_same_result(references[session_id].detect_drift(score), actual[session_id])
+
+def test_batch_detector_evicts_idle_sessions_and_round_trips_state():
+    from src.detectors.batch_detector import BatchDriftDetector
+
+    batch = BatchDriftDetector(window_size=3, max_history=5, idle_timeout_seconds=60)
+    batch.seed_baseline("seeded", 0.5, 0.1)
+    # Eighths survive the float32 snapshot exactly
+    batch.add_scores(["seeded"] * 7, [i / 8 for i in range(7)], now=50)
+    batch.add_scores(["idle"], [0.2], now=0)
+    assert batch.evict_idle(now=100) == ["idle"]
+
+    restored = BatchDriftDetector(window_size=3, max_history=5, idle_timeout_seconds=60)
+    for session_id, blob in batch.export_sessions():
+        restored.import_session(session_id, blob)
+    assert restored.history("seeded").tolist() == [0.25, 0.375, 0.5, 0.625, 0.75]
+    assert_same_result(batch.detect().to_dicts()["seeded"], restored.detect(["seeded"]).to_dicts()["seeded"])
+    assert restored.evict_idle(now=111) == ["seeded"]
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        pass
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def rename(self, source, destination):
+        self.hashes[destination] = self.hashes.pop(source)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value
+
+    def hscan_iter(self, key, count=None):
+        return iter(self.hashes.get(key, {}).items())
+
+def test_session_store_ring_matches_deque_history():
+    from src.detectors.session_store import SessionStateStore
+
+    store = SessionStateStore(max_history=100)
+    reference = StatisticalDriftDetector()
+    for score in synthetic_session(3, length=250):
+        expected = reference.detect_drift(score)
+        actual = store.detect_drift("s", score, now=0.0)
+        assert actual["drift_detected"] == expected["drift_detected"]
+        assert actual["drift_direction"] == expected["drift_direction"]
+
+    # float32 storage
+    assert store.history("s") == pytest.approx(list(reference.sentiment_history), abs=1e-6)
+
+def test_session_store_evicts_least_recently_active():
+    from src.detectors.session_store import SessionStateStore
+
+    store = SessionStateStore(idle_timeout_seconds=60)
+    store.add_sentiment_score("a", 0.1, now=0)
+    store.add_sentiment_score("b", 0.2, now=10)
+    store.add_sentiment_score("a", 0.3, now=50)
+
+    assert store.evict_idle(now=100) == ["b"]
+    assert "a" in store and len(store) == 1
+    assert store.evict_idle(now=200) == ["a"]
+
+def test_session_store_snapshot_round_trip():
+    from src.detectors.session_store import SessionStateStore
+
+    store = SessionStateStore(max_history=5)
+    for i in range(8):
+        store.add_sentiment_score("late", i / 10, now=20)
+    store.add_sentiment_score("early", -0.5, now=10)
+
+    client = FakeRedis()
+    assert store.snapshot(client) == 2
+
+    restored = SessionStateStore(max_history=5)
+    assert restored.restore(client) == 2
+    assert list(restored.sessions) == ["early", "late"]
+    assert restored.history("late") == pytest.approx([0.3, 0.4, 0.5, 0.6, 0.7])
+    restored.add_sentiment_score("late", 0.8, now=30)
+    assert restored.history("late") == pytest.approx([0.4, 0.5, 0.6, 0.7, 0.8])
+
+@pytest.mark.parametrize("window_size", [3, 10])
+def test_seeded_detector_evaluates_from_first_message(window_size):
+    reference = StatisticalDriftDetector(window_size=window_size, baseline=(0.3, 0.2))
+    streaming = StreamingDriftDetector(window_size=window_size, baseline=(0.3, 0.2))
+
+    results = []
+    for score in synthetic_session(3, length=120):
+        expected = reference.detect_drift(score)
+        assert_same_result(expected, streaming.detect_drift(score))
+        results.append(expected)
+    assert all(result["method"] == "ensemble" for result in results)
+
+def test_seeded_detector_flags_drift_before_window_fills():
+    detector = StatisticalDriftDetector(window_size=10, baseline=(0.5, 0.1))
+    for score in [-0.3, -0.4, -0.5]:
+        result = detector.detect_drift(score)
+    assert result["drift_detected"]
+    assert result["drift_direction"] == "negative"
+
+class FakeBaselineRepository:
+    def __init__(self, stored=None):
+        self.stored = stored or {}
+        self.loads = 0
+        self.saved = []
+
+    async def load(self, user_id):
+        self.loads += 1
+        return self.stored.get(user_id)
+
+    async def save_deltas(self, deltas):
+        self.saved.append({user_id: (d.count, d.mean) for user_id, d in deltas.items()})
+
+def test_baseline_manager_loads_once_and_merges_pending_scores():
+    repository = FakeBaselineRepository()
+    manager = UserBaselineManager(repository, min_count=5)
+
+    async def scenario():
+        assert await manager.get("u1") is None
+        for score in [0.1, 0.2, 0.3, 0.4, 0.5]:
+            manager.update("u1", score)
+        mean, std = await manager.get("u1")
+        assert mean == pytest.approx(0.3)
+        assert std == pytest.approx(np.std([0.1, 0.2, 0.3, 0.4, 0.5]))
+
+        assert await manager.flush() == 1
+        assert repository.saved == [{"u1": (5, pytest.approx(0.3))}]
+        assert await manager.get("u1") == (pytest.approx(0.3), pytest.approx(std))
+        assert await manager.flush() == 0
+
+        detector = StatisticalDriftDetector(window_size=10)
+        assert await manager.seed(detector, "u1")
+        assert detector.seeded_baseline == (pytest.approx(0.3), pytest.approx(std))
+
+    asyncio.run(scenario())
+    assert repository.loads == 1
@@ -1 +1,69 @@
+# services/drift-detection/tests/test_utils.py
+import numpy as np
+import pytest
+from scipy import stats
 
+from src.utils.math_utils import RollingRegression, RollingStats
+
+def test_rolling_stats_match_numpy_through_add_remove_replace():
+    rng = np.random.default_rng(1)
+    values = list(rng.uniform(-1, 1, 50))
+    tracker = RollingStats()
+    for value in values:
+        tracker.add(value)
+    for value in values[:20]:
+        tracker.remove(value)
+    window = values[20:]
+    for new in rng.uniform(-1, 1, 30):
+        tracker.replace(window.pop(0), new)
+        window.append(new)
+
+    assert tracker.count == len(window)
+    assert tracker.mean == pytest.approx(np.mean(window), abs=1e-12)
+    assert tracker.std == pytest.approx(np.std(window), abs=1e-12)
+
+def test_rolling_stats_remove_last_value_resets():
+    tracker = RollingStats()
+    tracker.add(0.4)
+    tracker.remove(0.4)
+    assert (tracker.count, tracker.mean, tracker.variance) == (0, 0.0, 0.0)
+
+@pytest.mark.parametrize("window", [2, 3, 10, 25])
+def test_rolling_regression_matches_linregress(window):
+    rng = np.random.default_rng(window)
+    values = list(rng.uniform(-1, 1, window))
+    regression = RollingRegression()
+    for value in values:
+        regression.push(value)
+
+    for new in rng.uniform(-1, 1, 40):
+        regression.slide(values.pop(0), new)
+        values.append(new)
+        expected = stats.linregress(np.arange(window), values)
+        slope, r_value, p_value = regression.linregress()
+        assert slope == pytest.approx(expected.slope, abs=1e-9)
+        assert r_value == pytest.approx(expected.rvalue, abs=1e-9)
+        assert p_value == pytest.approx(expected.pvalue, abs=1e-9)
+
+def test_rolling_regression_constant_window_has_undefined_r():
+    regression = RollingRegression()
+    for _ in range(10):
+        regression.push(0.0)
+    slope, r_value, p_value = regression.linregress()
+    assert slope == 0.0
+    assert np.isnan(r_value) and np.isnan(p_value)
+
+def test_rolling_stats_merge_matches_combined_values():
+    rng = np.random.default_rng(7)
+    first, second = rng.normal(0.2, 0.3, 40), rng.normal(-0.4, 0.1, 15)
+    merged, other = RollingStats(), RollingStats()
+    for value in first:
+        merged.add(value)
+    for value in second:
+        other.add(value)
+    merged.merge(other)
+
+    combined = np.concatenate([first, second])
+    assert merged.count == len(combined)
+    assert merged.mean == pytest.approx(combined.mean())
+    assert merged.variance == pytest.approx(combined.var())
@@ -1,44 +1,229 @@
 # services/sentiment-analysis/src/api/routes.py
-from fastapi import APIRouter, HTTPException, Depends
-from .schemas import SentimentAnalysisRequest, SentimentAnalysisResponse
-from ..models.ensemble_analyzer import EnsembleAnalyzer
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from .schemas import SentimentAnalysisRequest, SentimentAnalysisResponse, SentimentBatchRequest
+from ..models.batcher import MicroBatcher
+from ..models.inference_executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
+from ..models.loader import ModelLoader, ModelNotReady
+from ..utils.cache import LRUCache, RedisCache, ResultCache
+from shared.utils.config import settings
+from shared.utils.messaging import SENTIMENT_SCORES_STREAM, StreamProducer, create_client
+from shared.utils.metrics import register_counter, register_gauge
+from shared.utils.responses import FastJSONResponse
+from shared.utils.score_codec import CONTENT_TYPE as SCORES_CONTENT_TYPE, JSON_CONTENT_TYPE, accepts, encode_scores
+from typing import Dict, List, Optional
+import asyncio
 import time
 import uuid
 from datetime import datetime
 
-router = APIRouter(prefix="/sentiment", tags=["sentiment"])
+router = APIRouter(prefix="/sentiment", tags=["sentiment"], default_response_class=FastJSONResponse)
 
-# Global analyzer instance
-analyzer = EnsembleAnalyzer()
+# Model work runs here, off the event loop, with load shedding and a timeout
+inference = InferenceExecutor(
+    max_workers=settings.INFERENCE_THREADS,
+    max_pending=settings.MAX_CONCURRENT_REQUESTS,
+    timeout=settings.SENTIMENT_ANALYSIS_TIMEOUT,
+    process_workers=settings.INFERENCE_PROCESSES
+)
 
+def _build_cache() -> Optional[ResultCache]:
+    if not settings.ENABLE_CACHING:
+        return None
+    remote = None
+    if settings.CACHE_REDIS_ENABLED:
+        remote = RedisCache(settings.REDIS_URL, ttl_seconds=settings.CACHE_TTL_SECONDS)
+    return ResultCache(
+        LRUCache(max_entries=settings.CACHE_MAX_ENTRIES, ttl_seconds=settings.CACHE_TTL_SECONDS),
+        remote
+    )
+
+def _build_analyzer():
+    # Imported here so importing the API (and binding the port) doesn't wait for the model stack
+    from ..models.cascade import CascadePolicy
+    from ..models.ensemble_analyzer import EnsembleAnalyzer
+    return EnsembleAnalyzer(
+        process_pool=inference.process_pool,
+        cache=_build_cache(),
+        cascade=CascadePolicy() if settings.CASCADE_ENABLED else None
+    )
+
+# Global analyzer, built in the background by main.startup(); see /ready
+loader = ModelLoader(
+    _build_analyzer,
+    imports=["transformers", "torch" if settings.TRANSFORMER_BACKEND == "torch" else "onnxruntime"]
+)
+
+def _analyze_batch(texts: List[str]) -> List[Dict[str, any]]:
+    return loader.get().analyze_batch(texts)
+
+# Coalesces concurrent requests into one padded forward pass
+batcher = MicroBatcher(
+    _analyze_batch,
+    max_batch_size=settings.BATCH_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+    executor=inference.thread_pool
+)
+
+def _register_metrics():
+    # Read at scrape time; callbacks that need the models are skipped until they load
+    register_gauge("inference_pending", "Inference calls admitted and not yet finished",
+                   lambda: inference.pending)
+    register_gauge("batcher_pending", "Messages waiting for the next micro-batch", lambda: batcher.pending)
+    register_counter("model_cache_requests", "Result cache lookups", lambda: loader.get().cache.local.stats["hits"],
+                     {"tier": "local", "result": "hit"})
+    register_counter("model_cache_requests", "Result cache lookups", lambda: loader.get().cache.local.stats["misses"],
+                     {"tier": "local", "result": "miss"})
+    register_gauge("model_cache_entries", "Entries in the in-process result cache", lambda: len(loader.get().cache.local))
+    if settings.CACHE_REDIS_ENABLED:
+        register_counter("model_cache_requests", "Result cache lookups",
+                         lambda: loader.get().cache.remote.stats["hits"], {"tier": "redis", "result": "hit"})
+        register_counter("model_cache_requests", "Result cache lookups",
+                         lambda: loader.get().cache.remote.stats["misses"], {"tier": "redis", "result": "miss"})
+
+_register_metrics()
+
+# Each score is published once; drift-detection consumes the stream in batches
+producer = StreamProducer(
+    create_client(), SENTIMENT_SCORES_STREAM, content_type=settings.STREAM_SCORE_CONTENT_TYPE
+) if settings.STREAMS_ENABLED else None
+
+# Both analyze endpoints answer in the compact score encoding (see shared.utils.score_codec)
+# when the Accept header asks for it; /analyze then returns a batch of one. JSON
+# responses are returned as built rather than re-validated against response_model,
+# which still documents them
 @router.post("/analyze", response_model=SentimentAnalysisResponse)
-async def analyze_sentiment(request: SentimentAnalysisRequest):
+async def analyze_sentiment(request: SentimentAnalysisRequest, accept: Optional[str] = Header(None)):
     start_time = time.time()
     
     try:
+        loader.get()  # Fail fast while the models are still loading
+        
         # Analyze sentiment
-        result = analyzer.analyze(request.message)
+        result = await inference.run(batcher.submit(request.message))
         
         # Create response
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        response = _build_response(request, result, processing_time)
+        await _publish([request], [response])
         
-        response = SentimentAnalysisResponse(
-            session_id=request.session_id,
-            message_id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow(),
-            overall_sentiment=result["overall_sentiment"],
-            confidence=result["confidence"], 
-            emotions=result["emotions"],
-            linguistic_features=result["linguistic_features"],
-            model_version=result["model_version"],
-            processing_time_ms=processing_time
-        )
+        if accepts(accept):
+            return Response(encode_scores([response]), media_type=SCORES_CONTENT_TYPE)
+        return FastJSONResponse(response)
         
-        return response
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=f"Sentiment service is starting: {str(e)}",
+                            headers={"Retry-After": "5"})
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Sentiment service overloaded: {str(e)}",
+                            headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Sentiment analysis timed out: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sentiment analysis failed: {str(e)}")
+
+@router.post("/analyze-batch", response_model=List[SentimentAnalysisResponse])
+async def analyze_sentiment_batch(request: SentimentBatchRequest, accept: Optional[str] = Header(None)):
+    start_time = time.time()
+    texts = [message.message for message in request.messages]
+    
+    try:
+        analyzer = loader.get()
+        
+        # Score in BATCH_SIZE chunks to bound padding and peak memory, admitted
+        # once and under one timeout for the whole request
+        chunks = [texts[offset:offset + settings.BATCH_SIZE] for offset in range(0, len(texts), settings.BATCH_SIZE)]
+        results = await inference.call_chunks(analyzer.analyze_batch, chunks)
+        
+        # Report the amortized per-message cost
+        processing_time = (time.time() - start_time) * 1000 / len(texts)
+        
+        responses = [
+            _build_response(message, result, processing_time)
+            for message, result in zip(request.messages, results)
+        ]
+        await _publish(request.messages, responses)
         
+        if accepts(accept):
+            return Response(encode_scores(responses), media_type=SCORES_CONTENT_TYPE)
+        return FastJSONResponse(responses)
+        
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=f"Sentiment service is starting: {str(e)}",
+                            headers={"Retry-After": "5"})
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Sentiment service overloaded: {str(e)}",
+                            headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Sentiment analysis timed out: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sentiment analysis failed: {str(e)}")
 
+def _build_response(request: SentimentAnalysisRequest, result: Dict[str, any],
+                    processing_time: float) -> Dict[str, any]:
+    """A SentimentAnalysisResponse as a plain dict.
+    
+    The analyzers return native types, so the fields are already valid and
+    building (then re-validating) a model per message would only cost time.
+    """
+    return {
+        "session_id": request.session_id,
+        "message_id": str(uuid.uuid4()),
+        "timestamp": datetime.utcnow(),
+        "overall_sentiment": result["overall_sentiment"],
+        "confidence": result["confidence"],
+        "emotions": result["emotions"],
+        "linguistic_features": result["linguistic_features"],
+        "model_version": result["model_version"],
+        "processing_time_ms": processing_time
+    }
+
+async def _publish(requests: List[SentimentAnalysisRequest], responses: List[Dict[str, any]]) -> None:
+    if producer is None:
+        return
+    try:
+        binary = producer.content_type != JSON_CONTENT_TYPE
+        payloads = []
+        for request, response in zip(requests, responses):
+            payload = response if binary else {**response, "timestamp": response["timestamp"].isoformat()}
+            if request.user_id is not None:
+                # Drift detection seeds new sessions with the user's baseline
+                payload = {**payload, "user_id": request.user_id}
+            payloads.append((response["session_id"], payload))
+        # Bounded, so a stalled Redis costs a request at most the publish timeout
+        await asyncio.wait_for(producer.publish_many(payloads), settings.STREAM_PUBLISH_TIMEOUT_MS / 1000)
+    except Exception as e:
+        # The caller still gets its score; drift for this message is skipped
+        print(f"Failed to publish sentiment scores: {e!r}")
+
+@router.get("/cache/stats")
+async def cache_stats():
+    if not loader.ready or loader.get().cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **loader.get().cache.get_stats()}
+
+@router.get("/cascade/stats")
+async def cascade_stats():
+    if not loader.ready or loader.get().cascade is None:
+        return {"enabled": False}
+    counts = dict(loader.get().path_counts)
+    total = counts["early_exit"] + counts["full"]
+    return {
+        "enabled": True,
+        **counts,
+        "transformer_calls_saved": counts["early_exit"] / total if total else 0.0
+    }
+
 @router.get("/health")
-async def health_check():
+async def health_check(response: Response):
+    # Liveness: answers as soon as the port is bound; only a failed model load is unhealthy
+    if loader.state == "failed":
+        response.status_code = 503
+        return {"status": "unhealthy", "service": "sentiment-analysis", "models": loader.status()}
     return {"status": "healthy", "service": "sentiment-analysis"}
+
+@router.get("/ready")
+async def readiness_check(response: Response):
+    # Readiness: only after the models are loaded and warmed up
+    if not loader.ready:
+        response.status_code = 503
+    return {"ready": loader.ready, "service": "sentiment-analysis", "models": loader.status()}
@@ -1,7 +1,8 @@
 # services/sentiment-analysis/src/api/schemas.py
-from pydantic import BaseModel
-from typing import Dict, Optional, Any
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Any
 from datetime import datetime
+from shared.utils.config import settings
 
 class SentimentAnalysisRequest(BaseModel):
     session_id: str
@@ -19,3 +20,6 @@ class SentimentAnalysisResponse(BaseModel):
     linguistic_features: Dict[str, Any]
     model_version: str
     processing_time_ms: float
+
+class SentimentBatchRequest(BaseModel):
+    messages: List[SentimentAnalysisRequest] = Field(..., min_length=1, max_length=settings.MAX_BATCH_MESSAGES)
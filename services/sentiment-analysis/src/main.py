@@ -1,6 +1,12 @@
 # services/sentiment-analysis/src/main.py
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
 from fastapi import FastAPI
-from .api.routes import router
+from .api.routes import router, batcher, inference, loader
+from shared.utils.metrics import instrument_app
 import uvicorn
 
 app = FastAPI(
@@ -10,6 +16,29 @@ app = FastAPI(
 )
 
 app.include_router(router, prefix="/api/v1")
+instrument_app(app, "sentiment-analysis")
+
+# The app module no longer imports the model stack, so this should stay small
+loader.timings["app_import_seconds"] = time.perf_counter() - _import_started
+
+def _load_models():
+    try:
+        loader.load()
+        print(f"Sentiment models ready: {loader.timings}")
+    except Exception as e:
+        print(f"Failed to load sentiment models: {e}")
+
+@app.on_event("startup")
+async def startup():
+    # Load after the server is listening: /health answers at once, /ready flips after warm-up
+    app.state.model_loading = asyncio.get_running_loop().run_in_executor(None, _load_models)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await batcher.close()
+    inference.shutdown()
+    if loader.ready:
+        loader.get().close()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,199 @@
+# services/sentiment-analysis/src/models/backends.py
+import math
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Only the ONNX backends need it
+    ort = None
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+# Intra-op threads of this process's forward passes; 0 leaves each library's default
+_intra_op_threads = 0
+
+def available_cpus() -> int:
+    """CPUs this process may use: its affinity, capped by a cgroup (v2) CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not on Linux
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def threads_per_worker(workers: int, threads: int = 0) -> int:
+    """``threads`` if set, otherwise the available CPUs split evenly across ``workers``"""
+    return threads if threads > 0 else max(1, available_cpus() // max(1, workers))
+
+def configure_threads(threads: int) -> None:
+    """Limit this process's forward passes to ``threads`` intra-op threads.
+    
+    Several workers on one pod would otherwise each start a thread per
+    core and oversubscribe it. Applies to torch now if it is imported (and
+    through OMP/MKL_NUM_THREADS when it is imported later) and to ONNX
+    Runtime sessions created afterwards.
+    """
+    global _intra_op_threads
+    _intra_op_threads = threads
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+class TorchBackend:
+    """fp32 PyTorch forward pass"""
+    
+    def __init__(self, model: Any):
+        self.model = model.eval()
+    
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        import torch
+        
+        inputs = {name: torch.from_numpy(value) for name, value in encoded.items()}
+        with torch.no_grad():
+            return self.model(**inputs).logits.numpy()
+
+class OnnxBackend:
+    """ONNX Runtime session over an exported (optionally int8-quantized) model.
+    
+    A session's thread pool doesn't survive a fork, so each process
+    creates its own on first use: a pre-fork server (src.serve) can build
+    the analyzer in its master and every worker still gets a working one.
+    """
+    
+    def __init__(self, path: str, intra_op_threads: Optional[int] = None):
+        if ort is None:
+            raise ImportError("onnxruntime is required for the ONNX backends")
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.intra_op_threads = intra_op_threads  # None follows configure_threads
+        self._session = None
+        self._pid = None
+        self._input_names = []
+    
+    @property
+    def session(self) -> Any:
+        if self._pid != os.getpid():
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            threads = _intra_op_threads if self.intra_op_threads is None else self.intra_op_threads
+            if threads:
+                options.intra_op_num_threads = threads
+            self._session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+            self._input_names = [model_input.name for model_input in self._session.get_inputs()]
+            self._pid = os.getpid()
+        return self._session
+    
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        session = self.session
+        feed = {name: encoded[name].astype(np.int64) for name in self._input_names}
+        return session.run(["logits"], feed)[0]
+
+def artifact_dir(model_name: str, cache_dir: str) -> Path:
+    """Where a model's exported artifacts live inside MODEL_CACHE_DIR"""
+    return Path(cache_dir) / "onnx" / re.sub(r"[^\w.-]+", "--", model_name.strip("/"))
+
+def export_options(torch_version: str, transformers_version: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(from_pretrained, torch.onnx.export) keyword arguments the installed versions accept"""
+    from packaging.version import Version
+    
+    # Older transformers only have eager attention, and older torch only the TorchScript exporter
+    load = {"attn_implementation": "eager"} if Version(transformers_version) >= Version("4.36") else {}
+    export = {"dynamo": False} if Version(torch_version) >= Version("2.5") else {}
+    return load, export
+
+def export_onnx(model_name: str, target: Path) -> Path:
+    """Export the PyTorch model (plus tokenizer and config) to ``target``; returns the .onnx path"""
+    import torch
+    import transformers
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    
+    load_kwargs, export_kwargs = export_options(torch.__version__, transformers.__version__)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    # Eager attention traces to plain ops that every ONNX Runtime build supports
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, **load_kwargs).eval()
+    
+    target.mkdir(parents=True, exist_ok=True)
+    tokenizer.save_pretrained(target)
+    model.config.save_pretrained(target)
+    
+    sample = tokenizer(["example input", "a second, somewhat longer example input"],
+                       padding=True, return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    
+    # Write to a temporary file and rename, so concurrent workers never load a partial export
+    fd, temporary = tempfile.mkstemp(suffix=".onnx", dir=target)
+    os.close(fd)
+    torch.onnx.export(
+        model,
+        ({name: sample[name] for name in input_names},),
+        temporary,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+        **export_kwargs
+    )
+    path = target / ONNX_FILE
+    os.replace(temporary, path)
+    return path
+
+def quantize_int8(source: Path, target: Path) -> Path:
+    """Dynamic int8 quantization of the linear layers' weights"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    fd, temporary = tempfile.mkstemp(suffix=".onnx", dir=target.parent)
+    os.close(fd)
+    quantize_dynamic(str(source), temporary, weight_type=QuantType.QInt8)
+    os.replace(temporary, target)
+    return target
+
+def load_backend(model_name: str, backend: str = "torch", cache_dir: str = "./models",
+                 intra_op_threads: Optional[int] = None) -> Tuple[Any, Any, Dict[int, str]]:
+    """(tokenizer, backend, id2label) for a model, exporting ONNX artifacts on first use"""
+    from transformers import AutoConfig, AutoTokenizer
+    
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown transformer backend {backend!r}; expected one of {BACKENDS}")
+    
+    if backend == "torch":
+        from transformers import AutoModelForSequenceClassification
+        
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        return AutoTokenizer.from_pretrained(model_name), TorchBackend(model), model.config.id2label
+    
+    directory = artifact_dir(model_name, cache_dir)
+    path = directory / ONNX_FILE
+    if not path.exists():
+        export_onnx(model_name, directory)
+    if backend == "onnx-int8":
+        quantized = directory / ONNX_INT8_FILE
+        if not quantized.exists():
+            quantize_int8(path, quantized)
+        path = quantized
+    
+    # Later starts only read the exported directory; the PyTorch weights are not loaded
+    config = AutoConfig.from_pretrained(directory)
+    return (
+        AutoTokenizer.from_pretrained(directory),
+        OnnxBackend(str(path), intra_op_threads),
+        config.id2label
+    )
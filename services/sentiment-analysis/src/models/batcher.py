@@ -0,0 +1,115 @@
+# services/sentiment-analysis/src/models/batcher.py
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Tuple
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into one batched call.
+
+    Callers await ``submit(item)``. The first pending item opens a window of
+    ``max_wait_ms``; everything that arrives before the window closes (up to
+    ``max_batch_size`` items) is passed to ``batch_fn`` in a single call and
+    the results are fanned back out to the awaiting callers in order.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.executor = executor
+        self.stats = {"batches": 0, "items": 0, "max_batch_size_seen": 0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Items waiting for the next batch"""
+        return len(self._pending)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item for the next batch and wait for its result"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._pending.append((item, future))
+        self._wakeup.set()
+        return await future
+
+    async def close(self) -> None:
+        """Stop the batching worker, failing anything still pending"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        for _, future in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher closed"))
+        self._pending = []
+        self._worker = None
+        self._loop = None
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # Bind lazily to whichever loop is serving requests
+            self._loop = loop
+            self._pending = []
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+
+            # Hold the window open until it expires or the batch is full
+            deadline = loop.time() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if self._pending:
+                self._wakeup.set()
+            else:
+                self._wakeup.clear()
+
+            await self._process(batch)
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        # Callers that gave up (timeout, disconnect) don't need a result
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        items = [item for item, _ in batch]
+        try:
+            results = await self._loop.run_in_executor(self.executor, self.batch_fn, items)
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(items)
+        self.stats["max_batch_size_seen"] = max(self.stats["max_batch_size_seen"], len(items))
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,36 @@
+# services/sentiment-analysis/src/models/cascade.py
+from typing import Dict
+
+from shared.utils.config import settings
+
+class CascadePolicy:
+    """Decides when VADER's score is trustworthy enough to skip the transformer.
+    
+    A message exits early only if it is short, VADER is confidently
+    polar, and (unless allowed) it contains no negation. Long or
+    negated messages are where the lexicon approach disagrees most with
+    the transformer. Early exits skip the emotion model as well unless
+    ``emotions_on_exit`` is set, and keep VADER's heuristic emotions
+    (under every EmotionType key, 0 where VADER has no heuristic).
+    """
+    
+    def __init__(self, vader_threshold: float = settings.CASCADE_VADER_THRESHOLD,
+                 max_words: int = settings.CASCADE_MAX_WORDS,
+                 allow_negation: bool = settings.CASCADE_ALLOW_NEGATION,
+                 emotions_on_exit: bool = settings.CASCADE_EMOTIONS_ON_EXIT):
+        self.vader_threshold = vader_threshold
+        self.max_words = max_words
+        self.allow_negation = allow_negation
+        self.emotions_on_exit = emotions_on_exit
+    
+    def should_exit(self, vader_result: Dict[str, any], features: Dict[str, any]) -> bool:
+        if abs(vader_result["overall_sentiment"]) < self.vader_threshold:
+            return False
+        if features.get("word_count", 0) > self.max_words:
+            return False
+        return self.allow_negation or not features.get("negation_count", 0)
+    
+    def describe(self) -> str:
+        """Part of the ensemble's cache namespace: a different policy gives different scores"""
+        return (f"cascade(v>={self.vader_threshold},w<={self.max_words},neg={int(self.allow_negation)},"
+                f"emo={int(self.emotions_on_exit)})")
@@ -1 +1,22 @@
+# services/sentiment-analysis/src/models/emotion_analyzer.py
+from typing import Dict
+from .transformer_analyzer import TransformerAnalyzer
+from shared.models.sentiment_models import EmotionType
+from shared.utils.config import settings
 
+class EmotionAnalyzer(TransformerAnalyzer):
+    """Emotion classifier (EMOTION_MODEL) reporting a probability per EmotionType.
+    
+    Reuses the transformer analyzer's backends, windowing and length
+    bucketing; only the label mapping differs. The model's "neutral"
+    class is not an EmotionType, so the six emotions need not sum to 1.
+    """
+    EMOTIONS = tuple(emotion.value for emotion in EmotionType)
+    STAGE_PREFIX = "emotion_"
+    
+    def __init__(self, model_name: str = settings.EMOTION_MODEL, **kwargs):
+        super().__init__(model_name=model_name, **kwargs)
+    
+    def _format_results(self, results) -> Dict[str, Dict[str, float]]:
+        scores = {str(result["label"]).lower(): result["score"] for result in results}
+        return {"emotions": {emotion: scores.get(emotion, 0.0) for emotion in self.EMOTIONS}}
@@ -1,18 +1,106 @@
 # services/sentiment-analysis/src/models/ensemble_analyzer.py
 from .vader_analyzer import VADERAnalyzer
-from .transformer_analyzer import TransformerAnalyzer
-from typing import Dict, List
+from .vader_analyzer import analyze_batch_in_worker as vader_batch_in_worker
+from .transformer_analyzer import EncodedBatch, TransformerAnalyzer
+from .emotion_analyzer import EmotionAnalyzer
+from .cascade import CascadePolicy
+from ..utils.preprocessing import extract_linguistic_features, extract_linguistic_features_batch
+from ..utils.cache import ResultCache, normalize_text
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from shared.models.sentiment_models import EmotionType
+from shared.utils.config import settings
+from shared.utils.metrics import observe
+from typing import Dict, List, Optional
 import numpy as np
+import time
 
 class EnsembleAnalyzer:
-    def __init__(self):
-        self.analyzers = {
-            "vader": VADERAnalyzer(),
-            "transformer": TransformerAnalyzer()
-        }
-        self.weights = {"vader": 0.3, "transformer": 0.7}
+    EMOTIONS = ("joy", "anger", "sadness")
+    MODEL_VERSION = "ensemble_v1.0"
+    
+    def __init__(self, analyzers: Optional[Dict[str, object]] = None, weights: Optional[Dict[str, float]] = None,
+                 process_pool: Optional[Executor] = None, cache: Optional[ResultCache] = None,
+                 cascade: Optional[CascadePolicy] = None, emotion_analyzer: Optional[object] = None):
+        if analyzers is None:
+            analyzers = {"vader": VADERAnalyzer(), "transformer": TransformerAnalyzer()}
+            if emotion_analyzer is None and settings.EMOTION_MODEL_ENABLED:
+                emotion_analyzer = EmotionAnalyzer()
+        self.analyzers = analyzers
+        self.weights = weights if weights is not None else {"vader": 0.3, "transformer": 0.7}
+        # Optional pool for the pure-Python work (VADER, linguistic features)
+        self.process_pool = process_pool
+        self.cache = cache
+        # With a cascade, the other analyzers only see messages VADER can't settle alone
+        self.cascade = cascade
+        self.path_counts = {"early_exit": 0, "full": 0}
+        
+        # The emotion model replaces the analyzers' heuristic emotions and runs on
+        # its own threads, alongside the sentiment models: one per inference thread,
+        # so concurrent batches don't queue behind each other's emotion pass
+        self.emotion_analyzer = emotion_analyzer
+        self._emotion_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.INFERENCE_THREADS), thread_name_prefix="emotion"
+        ) if emotion_analyzer is not None else None
+        transformer = self.analyzers.get("transformer")
+        self._shared_encoding = (
+            emotion_analyzer is not None
+            and hasattr(transformer, "shares_encoding_with")
+            and transformer.shares_encoding_with(emotion_analyzer)
+        )
     
     def analyze(self, text: str) -> Dict[str, any]:
+        if self.cache is None:
+            return self._analyze(text)
+        
+        text = normalize_text(text)
+        namespace = self.cache_namespace()
+        cached = self.cache.get_many(namespace, [text])[0]
+        if cached is not None:
+            return cached
+        
+        result = self._analyze(text)
+        self.cache.set_many(namespace, {text: result})
+        return result
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        """Analyze several texts, letting each analyzer score the whole batch at once"""
+        if self.cache is None or not texts:
+            return self._analyze_batch(texts)
+        
+        texts = [normalize_text(text) for text in texts]
+        namespace = self.cache_namespace()
+        results = self.cache.get_many(namespace, texts)
+        
+        # Score each distinct miss once, even if it repeats within the batch
+        misses = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        if misses:
+            computed = dict(zip(misses, self._analyze_batch(misses)))
+            self.cache.set_many(namespace, computed)
+            results = [computed[text] if result is None else result for text, result in zip(texts, results)]
+        return results
+    
+    def cache_namespace(self) -> str:
+        """Identifies everything a cached result depends on besides the text"""
+        weights = ",".join(f"{name}={weight}" for name, weight in sorted(self.weights.items()))
+        models = ",".join(
+            f"{name}={getattr(analyzer, 'model_name', type(analyzer).__name__)}"
+            # Quantized backends score slightly differently from fp32
+            + (f"@{analyzer.backend_name}" if hasattr(analyzer, "backend_name") else "")
+            for name, analyzer in sorted(self.analyzers.items())
+        )
+        namespace = f"{self.MODEL_VERSION}|{weights}|{models}"
+        if self.emotion_analyzer is not None:
+            namespace += f"|emotion={getattr(self.emotion_analyzer, 'model_name', '')}" + (
+                f"@{self.emotion_analyzer.backend_name}" if hasattr(self.emotion_analyzer, "backend_name") else ""
+            )
+        if self._cascading():
+            namespace += f"|{self.cascade.describe()}"
+        return namespace
+    
+    def _analyze(self, text: str) -> Dict[str, any]:
+        if self._cascading() or self.emotion_analyzer is not None:
+            return self._analyze_batch([text])[0]
+        
         results = {}
         for name, analyzer in self.analyzers.items():
             try:
@@ -26,13 +114,198 @@ class EnsembleAnalyzer:
         
         return self._ensemble_results(results, text)
     
+    def _analyze_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        if not texts:
+            return []
+        if self._cascading():
+            return self._analyze_cascade(texts)
+        
+        # Tokenize once when the emotion model reads the same inputs as the transformer
+        encoded = self.analyzers["transformer"].encode(texts) if self._shared_encoding else None
+        emotions = self._submit_emotions(texts, encoded)
+        results = self._analyze_all(texts, encoded)
+        self._apply_emotions(results, emotions)
+        return results
+    
+    def close(self) -> None:
+        if self._emotion_pool is not None:
+            self._emotion_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _submit_emotions(self, texts: List[str], encoded: Optional[EncodedBatch]) -> Optional[Future]:
+        if self.emotion_analyzer is None or not texts:
+            return None
+        # torch and onnxruntime release the GIL, so both forward passes run in parallel
+        return self._emotion_pool.submit(self.emotion_analyzer.analyze_batch, texts, encoded)
+    
+    def _apply_emotions(self, results: List[Dict[str, any]], emotions: Optional[Future]) -> None:
+        if emotions is None:
+            return
+        try:
+            for result, emotion in zip(results, emotions.result()):
+                result["emotions"] = emotion["emotions"]
+        except Exception as e:
+            # Keep the analyzers' heuristic emotions
+            print(f"Error in emotion analyzer: {e}")
+    
+    def _analyze_all(self, texts: List[str], encoded: Optional[EncodedBatch] = None) -> List[Dict[str, any]]:
+        # Start the pure-Python work in other processes so it overlaps the transformer
+        offloaded = {}
+        features = None
+        if self.process_pool is not None:
+            if isinstance(self.analyzers.get("vader"), VADERAnalyzer):
+                offloaded["vader"] = self.process_pool.submit(vader_batch_in_worker, texts)
+            features = self.process_pool.submit(extract_linguistic_features_batch, texts)
+        
+        batch_results = {}
+        for name, analyzer in self.analyzers.items():
+            try:
+                if name in offloaded:
+                    batch_results[name] = offloaded[name].result()
+                else:
+                    batch_results[name] = self._run_analyzer(name, analyzer, texts, encoded)
+            except Exception as e:
+                print(f"Error in {name} analyzer: {e}")
+                continue
+        
+        if not batch_results:
+            raise Exception("All analyzers failed")
+        
+        if features is not None:
+            features = features.result()
+        return self._ensemble_batch(batch_results, texts, features)
+    
+    def _cascading(self) -> bool:
+        return self.cascade is not None and "vader" in self.analyzers and len(self.analyzers) > 1
+    
+    def _run_analyzer(self, name: str, analyzer: object, texts: List[str],
+                      encoded: Optional[EncodedBatch]) -> List[Dict[str, any]]:
+        if encoded is not None and name == "transformer":
+            return analyzer.analyze_batch(texts, encoded=encoded)
+        return analyzer.analyze_batch(texts)
+    
+    def _analyze_cascade(self, texts: List[str]) -> List[Dict[str, any]]:
+        """VADER and features first; the remaining analyzers only score messages that need them"""
+        features = None
+        if self.process_pool is not None:
+            features = self.process_pool.submit(extract_linguistic_features_batch, texts)
+        # VADER gates everything else, so it runs inline rather than in a worker round trip
+        try:
+            vader = self.analyzers["vader"].analyze_batch(texts)
+        except Exception as e:
+            print(f"Error in vader analyzer: {e}")
+            vader = None
+        features = features.result() if features is not None else extract_linguistic_features_batch(texts)
+        
+        early = [] if vader is None else [
+            index for index, (result, text_features) in enumerate(zip(vader, features))
+            if self.cascade.should_exit(result, text_features)
+        ]
+        exited = set(early)
+        rest = [index for index in range(len(texts)) if index not in exited]
+        self.path_counts["early_exit"] += len(early)
+        self.path_counts["full"] += len(rest)
+        
+        # Tokenize only what the models will read: the remaining messages, or all
+        # of them when the emotion model scores early exits as well
+        encoded = rest_encoded = None
+        if self._shared_encoding and self.cascade.emotions_on_exit:
+            encoded = self.analyzers["transformer"].encode(texts)
+            rest_encoded = encoded.subset(rest) if rest else None
+        elif self._shared_encoding and rest:
+            rest_encoded = self.analyzers["transformer"].encode([texts[i] for i in rest])
+        
+        # Early exits skip the emotion model too, unless the policy asks for it
+        if self.cascade.emotions_on_exit:
+            emotion_indices = list(range(len(texts)))
+            emotions = self._submit_emotions(texts, encoded)
+        else:
+            emotion_indices = rest
+            emotions = self._submit_emotions([texts[i] for i in rest], rest_encoded)
+        
+        results: List[Optional[Dict[str, any]]] = [None] * len(texts)
+        if early:
+            scored = self._ensemble_batch(
+                {"vader": [vader[i] for i in early]}, [texts[i] for i in early], [features[i] for i in early]
+            )
+            for index, result in zip(early, scored):
+                if self.emotion_analyzer is not None and not self.cascade.emotions_on_exit:
+                    # Same keys as the emotion model's results; VADER has no heuristic for the rest
+                    result["emotions"] = {e.value: result["emotions"].get(e.value, 0.0) for e in EmotionType}
+                results[index] = result
+        if rest:
+            rest_texts = [texts[i] for i in rest]
+            batch_results = {} if vader is None else {"vader": [vader[i] for i in rest]}
+            for name, analyzer in self.analyzers.items():
+                if name == "vader":
+                    continue
+                try:
+                    batch_results[name] = self._run_analyzer(name, analyzer, rest_texts, rest_encoded)
+                except Exception as e:
+                    print(f"Error in {name} analyzer: {e}")
+                    continue
+            
+            if not batch_results:
+                raise Exception("All analyzers failed")
+            
+            scored = self._ensemble_batch(batch_results, rest_texts, [features[i] for i in rest])
+            for index, result in zip(rest, scored):
+                results[index] = result
+        self._apply_emotions([results[i] for i in emotion_indices], emotions)
+        return results
+    
+    def _ensemble_batch(self, batch_results: Dict[str, List[Dict]], texts: List[str],
+                        features: Optional[List[Dict[str, any]]] = None) -> List[Dict[str, any]]:
+        """Vectorized equivalent of _ensemble_results over a whole batch"""
+        start = time.perf_counter()
+        if features is None:
+            features = extract_linguistic_features_batch(texts)
+        
+        names = list(batch_results)
+        weights = np.array([self.weights.get(name, 1.0) for name in names])
+        
+        # (analyzers, texts) matrices of per-analyzer scores
+        sentiments = np.array([[r["overall_sentiment"] for r in batch_results[name]] for name in names], dtype=float)
+        confidences = np.array([[r["confidence"] for r in batch_results[name]] for name in names], dtype=float)
+        
+        total_weight = weights.sum()
+        if total_weight > 0:
+            final_sentiments = weights @ sentiments / total_weight
+        else:
+            final_sentiments = np.zeros(len(texts))
+        final_confidences = confidences.mean(axis=0)
+        
+        # (analyzers, texts, emotions) tensor; NaN marks emotions an analyzer didn't report
+        emotion_scores = np.array([
+            [[r["emotions"].get(emotion, np.nan) for emotion in self.EMOTIONS] for r in batch_results[name]]
+            for name in names
+        ], dtype=float)
+        reported = ~np.isnan(emotion_scores)
+        counts = reported.sum(axis=0)
+        totals = np.where(reported, emotion_scores, 0.0).sum(axis=0)
+        final_emotions = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+        
+        combined = [
+            {
+                "overall_sentiment": sentiment,
+                "confidence": confidence,
+                "emotions": dict(zip(self.EMOTIONS, emotions)),
+                "linguistic_features": linguistic_features,
+                "model_version": self.MODEL_VERSION
+            }
+            for sentiment, confidence, emotions, linguistic_features in zip(
+                final_sentiments.tolist(), final_confidences.tolist(), final_emotions.tolist(), features
+            )
+        ]
+        observe("ensemble_combine", time.perf_counter() - start)
+        return combined
+    
     def _ensemble_results(self, results: Dict[str, Dict], text: str) -> Dict[str, any]:
         # Weighted average of sentiment scores
         overall_sentiment = 0
         total_weight = 0
         confidence_scores = []
         
-        all_emotions = {"joy": [], "anger": [], "sadness": []}
+        all_emotions = {emotion: [] for emotion in self.EMOTIONS}
         
         for analyzer_name, result in results.items():
             weight = self.weights.get(analyzer_name, 1.0)
@@ -46,11 +319,12 @@ class EnsembleAnalyzer:
         
         # Calculate final scores
         final_sentiment = overall_sentiment / total_weight if total_weight > 0 else 0
-        final_confidence = np.mean(confidence_scores) if confidence_scores else 0
+        # Native floats, as _ensemble_batch returns, so responses need no conversion
+        final_confidence = float(np.mean(confidence_scores)) if confidence_scores else 0.0
         
         final_emotions = {}
         for emotion, scores in all_emotions.items():
-            final_emotions[emotion] = np.mean(scores) if scores else 0
+            final_emotions[emotion] = float(np.mean(scores)) if scores else 0.0
         
         # Extract linguistic features
         linguistic_features = self._extract_linguistic_features(text)
@@ -60,18 +334,8 @@ class EnsembleAnalyzer:
             "confidence": final_confidence,
             "emotions": final_emotions,
             "linguistic_features": linguistic_features,
-            "model_version": "ensemble_v1.0"
+            "model_version": self.MODEL_VERSION
         }
     
     def _extract_linguistic_features(self, text: str) -> Dict[str, any]:
-        sentences = text.split('.')
-        words = text.split()
-        
-        return {
-            "word_count": len(words),
-            "sentence_count": len(sentences),
-            "avg_sentence_length": len(words) / len(sentences) if sentences else 0,
-            "exclamation_count": text.count('!'),
-            "question_count": text.count('?'),
-            "caps_ratio": sum(1 for c in text if c.isupper()) / len(text) if text else 0
-        }
+        return extract_linguistic_features(text)
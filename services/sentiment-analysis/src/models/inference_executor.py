@@ -0,0 +1,80 @@
+# services/sentiment-analysis/src/models/inference_executor.py
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+class InferenceQueueFull(Exception):
+    """Raised when more inference calls are pending than the service admits"""
+
+class InferenceTimeout(Exception):
+    """Raised when an inference call exceeds its latency budget"""
+
+class InferenceExecutor:
+    """Runs model work off the event loop with admission control and a timeout.
+
+    Torch releases the GIL during the forward pass, so the transformer runs on
+    a small thread pool. Pure-Python work (VADER, linguistic features) can be
+    sent to an optional process pool instead. At most ``max_pending`` calls are
+    admitted at once; beyond that callers are rejected immediately so the
+    service sheds load instead of queueing unboundedly.
+    """
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 100,
+                 timeout: Optional[float] = 5.0, process_workers: int = 0):
+        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers,
+                                              thread_name_prefix="inference")
+        # spawn, not fork: forking a process that has initialised torch can deadlock
+        self.process_pool = ProcessPoolExecutor(
+            max_workers=process_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) if process_workers > 0 else None
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.stats = {"admitted": 0, "rejected": 0, "timed_out": 0}
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Admit an inference awaitable and enforce the timeout on it"""
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise InferenceQueueFull(f"{self.pending} inference calls already pending")
+
+        self.pending += 1
+        self.stats["admitted"] += 1
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            raise InferenceTimeout(f"Inference exceeded {self.timeout}s") from None
+        finally:
+            self.pending -= 1
+
+    async def call(self, fn: Callable[..., Any], *args: Any, cpu_bound: bool = False) -> Any:
+        """Run a synchronous function on the inference pool under admission control"""
+        pool = self.process_pool if cpu_bound and self.process_pool is not None else self.thread_pool
+        loop = asyncio.get_running_loop()
+        return await self.run(loop.run_in_executor(pool, fn, *args))
+
+    async def call_chunks(self, fn: Callable[[Any], List[Any]], chunks: Sequence[Any]) -> List[Any]:
+        """Run ``fn`` over each chunk in turn and concatenate the results.
+        
+        The whole sequence is one call: it takes one admission slot and the
+        timeout covers all chunks, so a large request can't hold the pool for
+        a timeout per chunk. Chunks not started when it times out never run.
+        """
+        async def run_all() -> List[Any]:
+            loop = asyncio.get_running_loop()
+            results = []
+            for chunk in chunks:
+                results.extend(await loop.run_in_executor(self.thread_pool, fn, chunk))
+            return results
+        
+        return await self.run(run_all())
+    
+    def shutdown(self) -> None:
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,107 @@
+# services/sentiment-analysis/src/models/loader.py
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+class ModelNotReady(Exception):
+    """Raised when a request needs the models before they have finished loading"""
+
+# Short and long inputs, so warm-up touches the shapes real traffic uses
+WARMUP_TEXTS = [
+    "ok",
+    "thanks, that helped",
+    "I've been feeling really low since last week and I can't sleep, work is piling up and I don't "
+    "know who to talk to about any of it",
+]
+
+class ModelLoader:
+    """Builds the analyzer in the background and reports when it is usable.
+
+    The heavy imports (torch/transformers), model loading and a warm-up
+    inference all happen in ``load``, which the service runs on a thread
+    after it has started listening. Until warm-up finishes ``get`` raises
+    ModelNotReady, so requests fail fast with a 503 and the readiness probe
+    keeps the pod out of rotation. Each phase is timed in ``timings``.
+
+    A pre-fork server calls ``preload`` in its master instead: that imports
+    and builds the analyzer without running it, so forked workers share the
+    weights' pages and each only runs its own warm-up in ``load``.
+    """
+
+    def __init__(self, factory: Callable[[], Any], imports: Sequence[str] = (),
+                 warmup_texts: Optional[List[str]] = None):
+        self.factory = factory
+        self.imports = list(imports)
+        self.warmup_texts = WARMUP_TEXTS if warmup_texts is None else warmup_texts
+        self.state = "pending"  # pending -> loading -> ready | failed
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+        self._analyzer = None
+        self._built = None  # Built by preload() and not yet warmed up
+        self._lock = threading.Lock()
+        self._created = time.perf_counter()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self) -> Any:
+        if self._analyzer is None:
+            raise ModelNotReady(f"Models are {self.state}")
+        return self._analyzer
+
+    def preload(self) -> Any:
+        """Import and build the analyzer, but don't run it (no forward pass, no worker threads)"""
+        with self._lock:
+            if self._built is None and self._analyzer is None:
+                self._built = self._build()
+            return self._built if self._built is not None else self._analyzer
+
+    def load(self) -> Any:
+        """Import, build and warm up the analyzer; safe to call more than once"""
+        with self._lock:
+            if self._analyzer is not None:
+                return self._analyzer
+            try:
+                analyzer = self._built if self._built is not None else self._build()
+                self.state = "loading"
+                start = time.perf_counter()
+                if self.warmup_texts:
+                    analyzer.analyze_batch(self.warmup_texts)
+                self.timings["first_inference_seconds"] = time.perf_counter() - start
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                raise
+
+            self.timings["ready_seconds"] = time.perf_counter() - self._created
+            self._analyzer = analyzer
+            self._built = None
+            self.state = "ready"
+            return analyzer
+
+    def _build(self) -> Any:
+        self.state = "loading"
+        self.error = None
+        try:
+            start = time.perf_counter()
+            for module in self.imports:
+                importlib.import_module(module)
+            self.timings["import_seconds"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            analyzer = self.factory()
+            self.timings["load_seconds"] = time.perf_counter() - start
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            raise
+        return analyzer
+
+    def status(self) -> Dict[str, Any]:
+        status = {"state": self.state, "timings": dict(self.timings)}
+        if self.error is not None:
+            status["error"] = self.error
+        return status
@@ -1,21 +1,164 @@
 # services/sentiment-analysis/src/models/transformer_analyzer.py
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
-from typing import Dict
+import json
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .backends import load_backend
+from shared.utils.config import settings
+from shared.utils.metrics import timed
+
+@dataclass
+class EncodedBatch:
+    """Unpadded model inputs per window; window ``i`` belongs to text ``owners[i]``"""
+    features: Dict[str, List[List[int]]]
+    owners: List[int]
+    size: int
+    
+    @property
+    def lengths(self) -> List[int]:
+        return [len(ids) for ids in self.features["input_ids"]]
+    
+    def subset(self, indices: List[int]) -> "EncodedBatch":
+        """The windows of the texts at ``indices``, renumbered in that order"""
+        position = {text: new for new, text in enumerate(indices)}
+        keep = [i for i, owner in enumerate(self.owners) if owner in position]
+        return EncodedBatch(
+            {name: [values[i] for i in keep] for name, values in self.features.items()},
+            [position[self.owners[i]] for i in keep],
+            len(indices)
+        )
 
 class TransformerAnalyzer:
-    def __init__(self, model_name: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"):
+    STAGE_PREFIX = ""  # Distinguishes this model's tokenize/model_forward timings from others'
+    
+    def __init__(self, model_name: str = "cardiffnlp/twitter-roberta-base-sentiment-latest",
+                 backend: str = settings.TRANSFORMER_BACKEND, cache_dir: str = settings.MODEL_CACHE_DIR,
+                 max_length: int = settings.MAX_TEXT_LENGTH, long_text: str = settings.LONG_TEXT_STRATEGY,
+                 overlap: int = settings.CHUNK_OVERLAP_TOKENS, max_chunks: int = settings.MAX_CHUNKS_PER_MESSAGE,
+                 max_batch_tokens: int = settings.MAX_BATCH_TOKENS):
         self.model_name = model_name
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        self.pipeline = pipeline("sentiment-analysis", 
-                                model=self.model, 
-                                tokenizer=self.tokenizer,
-                                device=0 if torch.cuda.is_available() else -1)
+        self.backend_name = backend
+        # torch runs the fp32 model; onnx/onnx-int8 export it into cache_dir once and reuse it
+        self.tokenizer, self.backend, self.id2label = load_backend(model_name, backend, cache_dir)
+        
+        self.max_length = min(max_length, self.tokenizer.model_max_length)
+        self.long_text = long_text
+        # Windows must advance, so they can share at most half their tokens
+        self.overlap = max(0, min(overlap, self.max_length // 2))
+        self.max_chunks = max(1, max_chunks)
+        self.max_batch_tokens = max_batch_tokens
     
     def analyze(self, text: str) -> Dict[str, float]:
-        results = self.pipeline(text, top_k=None)
+        return self.analyze_batch([text])[0]
+    
+    def analyze_batch(self, texts: List[str], encoded: Optional[EncodedBatch] = None) -> List[Dict[str, float]]:
+        """Score several texts, splitting long ones into windows and bucketing by length.
+        
+        ``encoded`` lets a caller tokenize once for several models that
+        share a tokenizer (see shares_encoding_with).
+        """
+        if not texts:
+            return []
+        
+        probabilities = self.probabilities(encoded if encoded is not None else self.encode(texts))
+        return [
+            self._format_results([
+                {"label": self.id2label[index], "score": score}
+                for index, score in enumerate(row)
+            ])
+            for row in probabilities.tolist()
+        ]
+    
+    def encode(self, texts: List[str]) -> EncodedBatch:
+        with timed(self.STAGE_PREFIX + "tokenize"):
+            features, owners = self._tokenize(texts)
+        return EncodedBatch(features, owners, len(texts))
+    
+    def probabilities(self, encoded: EncodedBatch) -> np.ndarray:
+        """(texts, labels) class probabilities"""
+        lengths = encoded.lengths
+        probabilities = self._score(encoded.features, lengths)
+        
+        # A message's score is the mean of its windows, weighted by their token counts
+        owners = np.asarray(encoded.owners)
+        weights = np.asarray(lengths, dtype=float)
+        totals = np.zeros((encoded.size, probabilities.shape[1]))
+        np.add.at(totals, owners, probabilities * weights[:, None])
+        totals /= np.bincount(owners, weights=weights, minlength=encoded.size)[:, None]
+        return totals
+    
+    def shares_encoding_with(self, other: Any) -> bool:
+        """Whether ``other`` can score this analyzer's encodings as if it had tokenized them itself"""
+        windowing = ("max_length", "long_text", "overlap", "max_chunks")
+        if any(getattr(self, name) != getattr(other, name, None) for name in windowing):
+            return False
+        mine, theirs = _tokenizer_signature(self.tokenizer), _tokenizer_signature(other.tokenizer)
+        return mine is not None and mine == theirs
+    
+    def _tokenize(self, texts: List[str]) -> Tuple[Dict[str, List[List[int]]], List[int]]:
+        """Unpadded model inputs per window, and the index of the text each window came from"""
+        chunk = self.long_text == "chunk"
+        encoded = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            return_overflowing_tokens=chunk,
+            stride=self.overlap if chunk else 0
+        )
+        features = {name: encoded[name] for name in self.tokenizer.model_input_names if name in encoded}
+        if not chunk:
+            return features, list(range(len(texts)))
+        
+        windows: Dict[int, List[int]] = {}
+        for index, owner in enumerate(encoded["overflow_to_sample_mapping"]):
+            windows.setdefault(owner, []).append(index)
+        kept = []
+        for owner in range(len(texts)):
+            indices = windows[owner]
+            if len(indices) > self.max_chunks:
+                # Keep the opening windows and the last one, where entries tend to conclude
+                indices = indices[:self.max_chunks - 1] + indices[-1:]
+            kept.extend(indices)
         
+        features = {name: [values[i] for i in kept] for name, values in features.items()}
+        return features, [encoded["overflow_to_sample_mapping"][i] for i in kept]
+    
+    def _score(self, features: Dict[str, List[List[int]]], lengths: List[int]) -> np.ndarray:
+        """Class probabilities per window, one forward pass per length bucket"""
+        probabilities = np.empty((len(lengths), len(self.id2label)))
+        for batch in self._buckets(lengths):
+            width = max(lengths[i] for i in batch)
+            inputs = {}
+            for name, values in features.items():
+                pad = self.tokenizer.pad_token_id if name == "input_ids" else 0
+                array = np.full((len(batch), width), pad, dtype=np.int64)
+                for row, index in enumerate(batch):
+                    array[row, :lengths[index]] = values[index]
+                inputs[name] = array
+            
+            with timed(self.STAGE_PREFIX + "model_forward"):
+                logits = self.backend.logits(inputs)
+            logits = logits - logits.max(axis=-1, keepdims=True)
+            exp = np.exp(logits)
+            probabilities[batch] = exp / exp.sum(axis=-1, keepdims=True)
+        return probabilities
+    
+    def _buckets(self, lengths: List[int]) -> Iterator[List[int]]:
+        """Group windows of similar length so batches carry little padding"""
+        if not self.max_batch_tokens:
+            yield list(range(len(lengths)))
+            return
+        batch: List[int] = []
+        for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+            # Ascending order: the new window is the longest, so it sets the padded width
+            if batch and (len(batch) + 1) * lengths[index] > self.max_batch_tokens:
+                yield batch
+                batch = []
+            batch.append(index)
+        if batch:
+            yield batch
+    
+    def _format_results(self, results) -> Dict[str, float]:
         # Convert to standardized format
         sentiment_map = {"NEGATIVE": -1, "NEUTRAL": 0, "POSITIVE": 1}
         overall_sentiment = 0
@@ -49,3 +192,12 @@ class TransformerAnalyzer:
                     emotions[emotion] += result['score'] * weight
         
         return emotions
+
+def _tokenizer_signature(tokenizer: Any) -> Optional[str]:
+    """Everything that decides token ids, leaving out per-call padding/truncation state"""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is None:
+        return None
+    spec = json.loads(backend.to_str())
+    parts = ("added_tokens", "normalizer", "pre_tokenizer", "post_processor", "model")
+    return json.dumps({part: spec.get(part) for part in parts}, sort_keys=True)
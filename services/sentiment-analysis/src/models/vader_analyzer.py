@@ -1,6 +1,6 @@
 # services/sentiment-analysis/src/models/vader_analyzer.py
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import Dict
+from typing import Dict, List
 
 class VADERAnalyzer:
     def __init__(self):
@@ -17,3 +17,15 @@ class VADERAnalyzer:
                 "sadness": max(0, scores['neg'] * 0.7),  # Rough mapping
             }
         }
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        return [self.analyze(text) for text in texts]
+
+# Per-process instance used when VADER is offloaded to a process pool
+_worker_analyzer = None
+
+def analyze_batch_in_worker(texts: List[str]) -> List[Dict[str, float]]:
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = VADERAnalyzer()
+    return _worker_analyzer.analyze_batch(texts)
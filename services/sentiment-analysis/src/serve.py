@@ -0,0 +1,133 @@
+# services/sentiment-analysis/src/serve.py
+"""Pre-fork server for running several sentiment workers in one pod.
+
+    python -m src.serve --workers 4
+
+With MODEL_PRELOAD the master builds the analyzer once (loader.preload:
+imports and weights, no forward pass) before binding the port and forking
+WEB_WORKERS workers. The workers share the weights' pages copy-on-write
+instead of each holding its own copy, so memory per pod grows by each
+worker's activations and heap rather than by a whole model. Without
+preload every worker builds its own analyzer after forking.
+
+Each worker limits its forward passes to INTRA_OP_THREADS threads (by
+default the pod's CPUs split across the workers), warms up, and only
+then passes /ready. The master never runs the models and keeps torch at
+one thread, so no thread pools exist when it forks. It restarts workers
+that die and passes SIGTERM/SIGINT on to them.
+
+Prometheus metrics are still per process: with several workers each
+scrape of /metrics reports whichever worker answered it.
+"""
+import argparse
+import importlib
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict
+
+import uvicorn
+
+from shared.utils.config import settings
+from .models.backends import configure_threads, threads_per_worker
+
+def load_factory(spec: str) -> Callable:
+    """``module:callable`` building the analyzer in place of the service's own"""
+    module, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+class PreforkServer:
+    """Binds once, forks ``workers`` uvicorn servers on the shared socket and keeps them running"""
+
+    def __init__(self, app, host: str = "0.0.0.0", port: int = 8001, workers: int = 1,
+                 threads: int = 0, preload: bool = True, log_level: str = "info"):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.threads = threads_per_worker(self.workers, threads)
+        self.preload = preload
+        self.log_level = log_level
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+
+    def run(self, loader) -> None:
+        configure_threads(1)  # The master only builds the models
+        if self.preload:
+            loader.preload()
+            print(f"Sentiment models preloaded: {loader.timings}")
+        self.sock = bind(self.host, self.port)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < 1:
+                time.sleep(1)  # Don't spin on a worker that fails at startup
+            self._spawn()
+        self.sock.close()
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            configure_threads(self.threads)
+            config = uvicorn.Config(self.app, log_level=self.log_level)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException as e:
+            print(f"Worker {os.getpid()} failed: {e}")
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS)
+    parser.add_argument("--threads", type=int, default=settings.INTRA_OP_THREADS,
+                        help="intra-op threads per worker; 0 splits the available CPUs")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=settings.MODEL_PRELOAD)
+    parser.add_argument("--analyzer", help="module:callable building the analyzer instead of the service's")
+    args = parser.parse_args()
+
+    from .main import app, loader
+    if args.analyzer:
+        loader.factory = load_factory(args.analyzer)
+    PreforkServer(app, args.host, args.port, args.workers, args.threads, args.preload).run(loader)
+
+if __name__ == "__main__":
+    main()
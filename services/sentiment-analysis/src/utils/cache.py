@@ -0,0 +1,156 @@
+# services/sentiment-analysis/src/utils/cache.py
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+try:
+    import redis
+except ImportError:  # Redis tier is optional
+    redis = None
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Canonical form used both for the cache key and for scoring.
+
+    Case and punctuation are kept because VADER and the linguistic features
+    are sensitive to them; only Unicode form and whitespace are normalized.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+class LRUCache:
+    """Thread-safe bounded LRU with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisCache:
+    """Shared second tier so replicas reuse each other's results"""
+
+    def __init__(self, url: str, ttl_seconds: float = 300, prefix: str = "sentiment:result:",
+                 client: Optional[Any] = None):
+        if client is None:
+            if redis is None:
+                raise ImportError("The redis package is required for the Redis cache tier")
+            client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.client = client
+        self.ttl_seconds = int(ttl_seconds)
+        self.prefix = prefix
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        try:
+            raw = self.client.mget([self.prefix + key for key in keys])
+        except Exception:
+            # A slow or missing Redis must never fail a request
+            self.stats["errors"] += 1
+            return [None] * len(keys)
+
+        values = []
+        for item in raw:
+            if item is None:
+                self.stats["misses"] += 1
+                values.append(None)
+            else:
+                self.stats["hits"] += 1
+                values.append(json.loads(item))
+        return values
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(self.prefix + key, self.ttl_seconds, json.dumps(value))
+            pipe.execute()
+        except Exception:
+            self.stats["errors"] += 1
+
+class ResultCache:
+    """Two-tier (in-process LRU, then optional Redis) cache of analysis results.
+
+    Keys are content hashes of the normalized text together with a namespace
+    describing the model version and ensemble weights, so changing either
+    makes every older entry unreachable.
+    """
+
+    def __init__(self, local: LRUCache, remote: Optional[RedisCache] = None):
+        self.local = local
+        self.remote = remote
+        self._namespace = None
+
+    def key(self, namespace: str, text: str) -> str:
+        return hashlib.sha1(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, namespace: str, texts: List[str]) -> List[Optional[Any]]:
+        self._check_namespace(namespace)
+        keys = [self.key(namespace, text) for text in texts]
+        values = [self.local.get(key) for key in keys]
+
+        missing = [i for i, value in enumerate(values) if value is None]
+        if self.remote is not None and missing:
+            for i, value in zip(missing, self.remote.get_many([keys[i] for i in missing])):
+                if value is not None:
+                    values[i] = value
+                    self.local.set(keys[i], value)
+        return values
+
+    def set_many(self, namespace: str, items: Dict[str, Any]) -> None:
+        self._check_namespace(namespace)
+        keyed = {self.key(namespace, text): value for text, value in items.items()}
+        for key, value in keyed.items():
+            self.local.set(key, value)
+        if self.remote is not None and keyed:
+            self.remote.set_many(keyed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"local": dict(self.local.stats, size=len(self.local))}
+        if self.remote is not None:
+            stats["redis"] = dict(self.remote.stats)
+        return stats
+
+    def _check_namespace(self, namespace: str) -> None:
+        # Entries under an old namespace can never be hit again; free them eagerly
+        if namespace != self._namespace:
+            if self._namespace is not None:
+                self.local.clear()
+            self._namespace = namespace
@@ -1 +1,94 @@
+# services/sentiment-analysis/tests/conftest.py
+import sys
+from pathlib import Path
 
+import pytest
+
+# Services import shared config/models from the repository root
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+TINY_VOCAB = [
+    "i", "feel", "am", "so", "very", "not", "happy", "sad", "angry", "great",
+    "terrible", "okay", "thanks", "today", "really", "good", "bad", "tired",
+]
+
+def build_tiny_model(model_dir, labels, seed=0):
+    """Save a randomly initialised RoBERTa classifier with the shared tiny tokenizer"""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import (PreTrainedTokenizerFast, RobertaConfig,
+                              RobertaForSequenceClassification)
+    import torch
+
+    torch.manual_seed(seed)
+
+    vocab = {"<s>": 0, "<pad>": 1, "</s>": 2, "<unk>": 3}
+    for word in TINY_VOCAB + [".", "!", "?", ","]:
+        vocab[word] = len(vocab)
+
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>",
+        special_tokens=[("<s>", 0), ("</s>", 2)],
+    )
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        bos_token="<s>", eos_token="</s>", unk_token="<unk>", pad_token="<pad>",
+        model_max_length=64,
+    ).save_pretrained(model_dir)
+
+    config = RobertaConfig(
+        vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1,
+        num_attention_heads=2, intermediate_size=32, max_position_embeddings=68,
+        pad_token_id=1, bos_token_id=0, eos_token_id=2, num_labels=len(labels),
+        id2label=dict(enumerate(labels)),
+        label2id={label: index for index, label in enumerate(labels)},
+    )
+    RobertaForSequenceClassification(config).save_pretrained(model_dir)
+    return str(model_dir)
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory):
+    """A randomly initialised RoBERTa classifier small enough to build offline"""
+    return build_tiny_model(tmp_path_factory.mktemp("tiny-roberta"), ["NEGATIVE", "NEUTRAL", "POSITIVE"])
+
+@pytest.fixture(scope="session")
+def tiny_emotion_model_dir(tmp_path_factory):
+    """Same tokenizer as tiny_model_dir, with the emotion model's seven labels"""
+    return build_tiny_model(
+        tmp_path_factory.mktemp("tiny-emotion"),
+        ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"],
+        seed=1
+    )
+
+class FakeAnalyzer:
+    """Deterministic stand-in for VADER/transformer keyed off the text itself"""
+
+    def __init__(self, bias: float = 0.0, emotions=("joy", "anger", "sadness")):
+        self.bias = bias
+        self.emotions = emotions
+        self.calls = 0
+
+    def analyze(self, text: str):
+        self.calls += 1
+        score = max(-1.0, min(1.0, (len(text) % 7) / 3.5 - 1.0 + self.bias))
+        return {
+            "overall_sentiment": score,
+            "confidence": abs(score),
+            "emotions": {
+                emotion: (index + 1) * abs(score) / 4
+                for index, emotion in enumerate(self.emotions)
+            },
+        }
+
+    def analyze_batch(self, texts):
+        return [self.analyze(text) for text in texts]
+
+@pytest.fixture
+def fake_analyzers():
+    return {
+        "vader": FakeAnalyzer(bias=0.2, emotions=("joy", "anger")),
+        "transformer": FakeAnalyzer(),
+    }
@@ -0,0 +1,63 @@
+# services/sentiment-analysis/tests/test_backends.py
+import json
+import os
+
+import pytest
+
+from src.models.backends import ONNX_FILE, ONNX_INT8_FILE, artifact_dir, export_options, threads_per_worker
+from src.models.transformer_analyzer import TransformerAnalyzer
+
+pytest.importorskip("onnxruntime")
+
+TEXTS = ["i feel great", "i am so very tired and sad today .", "thanks", "not okay"]
+
+@pytest.mark.parametrize("backend, tolerance", [("onnx", 1e-4), ("onnx-int8", 0.05)])
+def test_onnx_backends_track_torch(tiny_model_dir, tmp_path, backend, tolerance):
+    reference = TransformerAnalyzer(model_name=tiny_model_dir, backend="torch")
+    analyzer = TransformerAnalyzer(model_name=tiny_model_dir, backend=backend, cache_dir=str(tmp_path))
+
+    for expected, actual in zip(reference.analyze_batch(TEXTS), analyzer.analyze_batch(TEXTS)):
+        assert actual["overall_sentiment"] == pytest.approx(expected["overall_sentiment"], abs=tolerance)
+        assert actual["confidence"] == pytest.approx(expected["confidence"], abs=tolerance)
+
+def test_onnx_export_is_reused_on_later_starts(tiny_model_dir, tmp_path):
+    TransformerAnalyzer(model_name=tiny_model_dir, backend="onnx-int8", cache_dir=str(tmp_path))
+    directory = artifact_dir(tiny_model_dir, str(tmp_path))
+    stamps = {name: (directory / name).stat().st_mtime_ns for name in (ONNX_FILE, ONNX_INT8_FILE)}
+
+    analyzer = TransformerAnalyzer(model_name=tiny_model_dir, backend="onnx-int8", cache_dir=str(tmp_path))
+
+    assert {name: (directory / name).stat().st_mtime_ns for name in stamps} == stamps
+    assert analyzer.analyze("thanks") == analyzer.analyze_batch(["thanks"])[0]
+
+def test_export_options_follow_the_installed_versions():
+    # The pinned image versions predate both arguments
+    assert export_options("2.1.0", "4.35.0") == ({}, {})
+    assert export_options("2.5.1+cpu", "4.36.0") == ({"attn_implementation": "eager"}, {"dynamo": False})
+
+def test_unknown_backend_is_rejected(tiny_model_dir):
+    with pytest.raises(ValueError):
+        TransformerAnalyzer(model_name=tiny_model_dir, backend="tensorrt")
+
+def test_onnx_analyzer_built_before_a_fork_works_in_the_child(tiny_model_dir, tmp_path):
+    # What src.serve does: build in the master, run only in the forked workers
+    analyzer = TransformerAnalyzer(model_name=tiny_model_dir, backend="onnx", cache_dir=str(tmp_path))
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(write, json.dumps(analyzer.analyze_batch(TEXTS)).encode())
+        finally:
+            os._exit(0)
+    os.close(write)
+    with os.fdopen(read) as f:
+        child = json.loads(f.read())
+    os.waitpid(pid, 0)
+
+    for expected, actual in zip(analyzer.analyze_batch(TEXTS), child):
+        assert actual["overall_sentiment"] == pytest.approx(expected["overall_sentiment"])
+
+def test_threads_are_split_across_workers(monkeypatch):
+    monkeypatch.setattr("src.models.backends.available_cpus", lambda: 8)
+    assert [threads_per_worker(workers) for workers in (1, 2, 4, 8, 16)] == [8, 4, 2, 1, 1]
+    assert threads_per_worker(4, threads=3) == 3
@@ -0,0 +1,128 @@
+# services/sentiment-analysis/tests/test_batching.py
+import asyncio
+import threading
+
+import pytest
+
+from src.models.batcher import MicroBatcher
+from src.models.transformer_analyzer import TransformerAnalyzer
+
+def test_concurrent_submits_are_coalesced():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+def test_batches_are_capped_at_max_batch_size():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(len(items))
+        return items
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == list(range(7))
+    assert calls == [3, 3, 1]
+
+def test_batch_errors_propagate_to_every_caller():
+    def batch_fn(items):
+        raise ValueError("model exploded")
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=5)
+        results = await asyncio.gather(
+            *(batcher.submit(i) for i in range(3)), return_exceptions=True
+        )
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+def test_short_results_fail_every_caller_instead_of_hanging():
+    async def run():
+        batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=4, max_wait_ms=5)
+        results = await asyncio.wait_for(asyncio.gather(
+            *(batcher.submit(i) for i in range(3)), return_exceptions=True
+        ), timeout=5)
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+def test_batch_fn_runs_off_the_event_loop_thread():
+    threads = []
+
+    def batch_fn(items):
+        threads.append(threading.get_ident())
+        return items
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_wait_ms=1)
+        await batcher.submit("hello")
+        await batcher.close()
+
+    asyncio.run(run())
+    assert threads and threads[0] != threading.get_ident()
+
+def test_transformer_batch_matches_single_pass(tiny_model_dir):
+    analyzer = TransformerAnalyzer(model_name=tiny_model_dir)
+    texts = ["i feel great", "i am so very tired and sad today .", "thanks"]
+
+    batched = analyzer.analyze_batch(texts)
+    for text, result in zip(texts, batched):
+        single = analyzer.analyze(text)
+        assert result["overall_sentiment"] == pytest.approx(single["overall_sentiment"], abs=1e-5)
+        assert result["confidence"] == pytest.approx(single["confidence"], abs=1e-5)
+        for emotion, score in single["emotions"].items():
+            assert result["emotions"][emotion] == pytest.approx(score, abs=1e-5)
+
+    assert analyzer.analyze_batch([]) == []
+
+LONG_TEXT = " ".join(["i am so very tired and sad today ."] * 30)  # ~270 tokens, several windows long
+
+def test_long_texts_are_scored_in_overlapping_windows(tiny_model_dir):
+    analyzer = TransformerAnalyzer(model_name=tiny_model_dir, max_length=32, overlap=8, max_chunks=4)
+
+    features, owners = analyzer._tokenize(["thanks", LONG_TEXT])
+    lengths = [len(ids) for ids in features["input_ids"]]
+    assert owners == [0, 1, 1, 1, 1]  # Capped at max_chunks
+    assert max(lengths) <= 32
+
+    truncating = TransformerAnalyzer(model_name=tiny_model_dir, max_length=32, long_text="truncate")
+    features, owners = truncating._tokenize(["thanks", LONG_TEXT])
+    assert owners == [0, 1]
+
+    # Windows of a short text are the text itself, so both strategies agree on it
+    chunked, truncated = analyzer.analyze("thanks"), truncating.analyze("thanks")
+    assert chunked["overall_sentiment"] == pytest.approx(truncated["overall_sentiment"], abs=1e-6)
+    assert -1 <= analyzer.analyze(LONG_TEXT)["overall_sentiment"] <= 1
+
+def test_length_bucketing_preserves_results(tiny_model_dir):
+    texts = ["thanks", LONG_TEXT, "i feel great", "not okay", "i am so very tired and sad today ."]
+    padded = TransformerAnalyzer(model_name=tiny_model_dir, max_batch_tokens=0)
+    bucketed = TransformerAnalyzer(model_name=tiny_model_dir, max_batch_tokens=64)
+
+    buckets = list(bucketed._buckets([3, 64, 5, 4, 12]))
+    assert sorted(i for batch in buckets for i in batch) == [0, 1, 2, 3, 4]
+    assert all(len(batch) * max([3, 64, 5, 4, 12][i] for i in batch) <= 64 for batch in buckets)
+
+    for expected, actual in zip(padded.analyze_batch(texts), bucketed.analyze_batch(texts)):
+        assert actual["overall_sentiment"] == pytest.approx(expected["overall_sentiment"], abs=1e-5)
+        assert actual["confidence"] == pytest.approx(expected["confidence"], abs=1e-5)
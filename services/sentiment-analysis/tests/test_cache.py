@@ -0,0 +1,90 @@
+# services/sentiment-analysis/tests/test_cache.py
+import json
+
+from src.models.ensemble_analyzer import EnsembleAnalyzer
+from src.utils.cache import LRUCache, RedisCache, ResultCache, normalize_text
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def execute(self):
+        pass
+
+def test_normalize_text_keeps_case_and_collapses_whitespace():
+    assert normalize_text("  I feel   SO\ttired\n") == "I feel SO tired"
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats["evictions"] == 1
+
+def test_lru_expires_entries():
+    cache = LRUCache(ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats["expirations"] == 1
+
+def test_repeated_messages_skip_the_analyzers(fake_analyzers):
+    cache = ResultCache(LRUCache())
+    ensemble = EnsembleAnalyzer(analyzers=fake_analyzers, cache=cache)
+
+    first = ensemble.analyze("thanks")
+    assert ensemble.analyze("  thanks ") == first
+    assert ensemble.analyze_batch(["thanks", "ok", "ok"])[0] == first
+    # "thanks" once, then "ok" once despite appearing twice in the batch
+    assert fake_analyzers["transformer"].calls == 2
+    assert cache.get_stats()["local"]["hits"] == 2
+
+def test_changing_weights_invalidates(fake_analyzers):
+    cache = ResultCache(LRUCache())
+    ensemble = EnsembleAnalyzer(analyzers=fake_analyzers, cache=cache)
+
+    before = ensemble.analyze("I don't know")
+    ensemble.weights = {"vader": 0.5, "transformer": 0.5}
+    after = ensemble.analyze("I don't know")
+
+    assert fake_analyzers["transformer"].calls == 2
+    assert after["overall_sentiment"] != before["overall_sentiment"]
+    assert len(cache.local) == 1
+
+def test_redis_tier_is_shared_between_replicas(fake_analyzers):
+    client = FakeRedis()
+    first = EnsembleAnalyzer(
+        analyzers=fake_analyzers,
+        cache=ResultCache(LRUCache(), RedisCache("", client=client)),
+    )
+    second = EnsembleAnalyzer(
+        analyzers=fake_analyzers,
+        cache=ResultCache(LRUCache(), RedisCache("", client=client)),
+    )
+
+    result = first.analyze_batch(["hello there"])[0]
+    assert json.loads(next(iter(client.store.values())))["model_version"] == result["model_version"]
+    assert second.analyze("hello there")["overall_sentiment"] == result["overall_sentiment"]
+    assert fake_analyzers["transformer"].calls == 1
+    assert second.cache.get_stats()["redis"]["hits"] == 1
+
+def test_redis_errors_fall_through(fake_analyzers):
+    class DownRedis(FakeRedis):
+        def mget(self, keys):
+            raise ConnectionError("redis down")
+
+    cache = ResultCache(LRUCache(), RedisCache("", client=DownRedis()))
+    ensemble = EnsembleAnalyzer(analyzers=fake_analyzers, cache=cache)
+    assert ensemble.analyze("hello")["model_version"] == EnsembleAnalyzer.MODEL_VERSION
+    assert cache.get_stats()["redis"]["errors"] == 1
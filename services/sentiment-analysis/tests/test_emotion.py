@@ -0,0 +1,65 @@
+# services/sentiment-analysis/tests/test_emotion.py
+import pytest
+
+from src.models.cascade import CascadePolicy
+from src.models.emotion_analyzer import EmotionAnalyzer
+from src.models.ensemble_analyzer import EnsembleAnalyzer
+from src.models.transformer_analyzer import TransformerAnalyzer
+from src.models.vader_analyzer import VADERAnalyzer
+
+TEXTS = ["i feel great", "i am so very tired and sad today .", "thanks", "not okay !"]
+
+@pytest.fixture(scope="module")
+def models(tiny_model_dir, tiny_emotion_model_dir):
+    return TransformerAnalyzer(model_name=tiny_model_dir), EmotionAnalyzer(model_name=tiny_emotion_model_dir)
+
+def test_emotion_analyzer_reports_every_emotion_type(models):
+    _, emotion = models
+    for result in emotion.analyze_batch(TEXTS):
+        assert set(result["emotions"]) == {"joy", "anger", "sadness", "fear", "surprise", "disgust"}
+        assert all(0 <= score <= 1 for score in result["emotions"].values())
+        assert sum(result["emotions"].values()) <= 1 + 1e-6  # "neutral" takes the rest
+
+def test_shared_encoding_matches_separate_tokenization(models):
+    transformer, emotion = models
+    assert transformer.shares_encoding_with(emotion)
+
+    encoded = transformer.encode(TEXTS)
+    assert emotion.analyze_batch(TEXTS, encoded=encoded) == pytest.approx(emotion.analyze_batch(TEXTS))
+    subset = encoded.subset([3, 1])
+    assert transformer.analyze_batch([TEXTS[3], TEXTS[1]], encoded=subset) == \
+        transformer.analyze_batch([TEXTS[3], TEXTS[1]])
+
+def test_ensemble_takes_emotions_from_the_emotion_model(models, monkeypatch):
+    transformer, emotion = models
+    ensemble = EnsembleAnalyzer(
+        analyzers={"vader": VADERAnalyzer(), "transformer": transformer}, emotion_analyzer=emotion
+    )
+    expected = emotion.analyze_batch(TEXTS)
+
+    # Tokenized once, by the transformer
+    monkeypatch.setattr(emotion, "encode", lambda texts: pytest.fail("emotion model re-tokenized"))
+    results = ensemble.analyze_batch(TEXTS)
+    for result, emotions in zip(results, expected):
+        assert result["emotions"] == pytest.approx(emotions["emotions"])
+    assert ensemble.analyze(TEXTS[0])["emotions"] == pytest.approx(expected[0]["emotions"])
+
+    cascading = EnsembleAnalyzer(
+        analyzers={"vader": VADERAnalyzer(), "transformer": transformer}, emotion_analyzer=emotion,
+        cascade=CascadePolicy(vader_threshold=0.3, emotions_on_exit=True)
+    )
+    for result, emotions in zip(cascading.analyze_batch(TEXTS), expected):
+        assert result["emotions"] == pytest.approx(emotions["emotions"])
+    ensemble.close()
+    cascading.close()
+
+def test_emotion_failure_keeps_heuristic_emotions(models):
+    transformer, _ = models
+
+    class Broken:
+        def analyze_batch(self, texts, encoded=None):
+            raise RuntimeError("boom")
+
+    ensemble = EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer(), "transformer": transformer},
+                                emotion_analyzer=Broken())
+    assert set(ensemble.analyze_batch(["thanks"])[0]["emotions"]) == {"joy", "anger", "sadness"}
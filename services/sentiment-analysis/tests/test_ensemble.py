@@ -0,0 +1,161 @@
+# services/sentiment-analysis/tests/test_ensemble.py
+import pytest
+
+from src.models.cascade import CascadePolicy
+from src.models.ensemble_analyzer import EnsembleAnalyzer
+from shared.models.sentiment_models import EmotionType
+
+EMOTION_TYPES = [emotion.value for emotion in EmotionType]
+
+MESSAGES = [
+    "ok",
+    "I don't know what to do anymore.",
+    "Today was GREAT! Thanks for asking",
+    "why does this keep happening?",
+    "",
+]
+
+def test_batch_matches_single_message_path(fake_analyzers):
+    ensemble = EnsembleAnalyzer(analyzers=fake_analyzers)
+
+    batched = ensemble.analyze_batch(MESSAGES)
+    assert len(batched) == len(MESSAGES)
+    for text, result in zip(MESSAGES, batched):
+        single = ensemble.analyze(text)
+        assert result["overall_sentiment"] == pytest.approx(single["overall_sentiment"])
+        assert result["confidence"] == pytest.approx(single["confidence"])
+        assert result["emotions"] == pytest.approx(single["emotions"])
+        assert result["linguistic_features"] == single["linguistic_features"]
+        assert result["model_version"] == single["model_version"]
+
+def test_batch_returns_native_floats(fake_analyzers):
+    result = EnsembleAnalyzer(analyzers=fake_analyzers).analyze_batch(["hello there"])[0]
+    assert type(result["overall_sentiment"]) is float
+    assert type(result["confidence"]) is float
+    assert all(type(score) is float for score in result["emotions"].values())
+
+def test_batch_skips_failing_analyzer(fake_analyzers):
+    class Broken:
+        def analyze_batch(self, texts):
+            raise RuntimeError("boom")
+
+    fake_analyzers["transformer"] = Broken()
+    ensemble = EnsembleAnalyzer(analyzers=fake_analyzers)
+    result = ensemble.analyze_batch(["hello"])[0]
+    assert result["overall_sentiment"] == pytest.approx(
+        fake_analyzers["vader"].analyze("hello")["overall_sentiment"]
+    )
+
+def test_batch_raises_when_all_analyzers_fail():
+    class Broken:
+        def analyze_batch(self, texts):
+            raise RuntimeError("boom")
+
+    ensemble = EnsembleAnalyzer(analyzers={"vader": Broken()})
+    with pytest.raises(Exception, match="All analyzers failed"):
+        ensemble.analyze_batch(["hello"])
+    assert ensemble.analyze_batch([]) == []
+
+class ScriptedAnalyzer:
+    """Returns a fixed score per text and records what it was asked to score"""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.seen = []
+
+    def analyze_batch(self, texts):
+        self.seen.extend(texts)
+        return [
+            {"overall_sentiment": self.scores[text], "confidence": abs(self.scores[text]), "emotions": {}}
+            for text in texts
+        ]
+
+def test_cascade_skips_transformer_for_confident_short_messages():
+    texts = ["thanks so much!", "I am not happy at all", "meh", "It was a long day at work and " * 5]
+    vader = ScriptedAnalyzer({texts[0]: 0.9, texts[1]: 0.8, texts[2]: 0.1, texts[3]: 0.9})
+    transformer = ScriptedAnalyzer({text: -0.5 for text in texts})
+    ensemble = EnsembleAnalyzer(
+        analyzers={"vader": vader, "transformer": transformer},
+        cascade=CascadePolicy(vader_threshold=0.6, max_words=12, allow_negation=False)
+    )
+
+    results = ensemble.analyze_batch(texts)
+
+    # Only the first is short, confident and free of negation
+    assert transformer.seen == texts[1:]
+    assert results[0]["overall_sentiment"] == pytest.approx(0.9)
+    assert results[2]["overall_sentiment"] == pytest.approx(0.3 * 0.1 + 0.7 * -0.5)
+    assert ensemble.path_counts == {"early_exit": 1, "full": 3}
+
+    assert ensemble.analyze(texts[0]) == results[0]
+    assert ensemble.path_counts == {"early_exit": 2, "full": 3}
+
+def test_cascade_runs_emotion_model_only_for_remaining_messages():
+    texts = ["thanks so much!", "I am not happy at all", "meh"]
+    vader = ScriptedAnalyzer({texts[0]: 0.9, texts[1]: 0.8, texts[2]: 0.1})
+    transformer = ScriptedAnalyzer({text: -0.5 for text in texts})
+
+    class Emotions:
+        def __init__(self):
+            self.seen = []
+
+        def analyze_batch(self, texts, encoded=None):
+            self.seen.extend(texts)
+            return [{"emotions": {**dict.fromkeys(EMOTION_TYPES, 0.0), "sadness": 1.0}} for _ in texts]
+
+    emotion = Emotions()
+    ensemble = EnsembleAnalyzer(
+        analyzers={"vader": vader, "transformer": transformer}, emotion_analyzer=emotion,
+        cascade=CascadePolicy(vader_threshold=0.6, max_words=12, allow_negation=False)
+    )
+    results = ensemble.analyze_batch(texts)
+
+    assert emotion.seen == texts[1:]
+    assert results[0]["emotions"]["sadness"] == 0.0  # VADER's, from the early exit
+    # Reported under the same keys as the emotion model's
+    assert all(set(result["emotions"]) == set(EMOTION_TYPES) for result in results)
+    assert all(result["emotions"]["sadness"] == 1.0 for result in results[1:])
+
+    emotion.seen.clear()
+    ensemble.cascade.emotions_on_exit = True
+    results = ensemble.analyze_batch(texts)
+    assert emotion.seen == texts
+    assert all(result["emotions"]["sadness"] == 1.0 for result in results)
+    ensemble.close()
+
+def test_cascade_tokenizes_only_the_messages_the_models_read():
+    texts = ["thanks so much!", "I am not happy at all", "meh"]
+    vader = ScriptedAnalyzer({texts[0]: 0.9, texts[1]: 0.8, texts[2]: 0.1})
+
+    class Transformer(ScriptedAnalyzer):
+        encoded = []
+
+        def encode(self, texts):
+            self.encoded.append(list(texts))
+            return texts
+
+        def shares_encoding_with(self, other):
+            return True
+
+        def analyze_batch(self, texts, encoded=None):
+            assert encoded == texts
+            return super().analyze_batch(texts)
+
+    class Emotions:
+        def analyze_batch(self, texts, encoded=None):
+            return [{"emotions": dict.fromkeys(EMOTION_TYPES, 0.0)} for _ in texts]
+
+    transformer = Transformer({text: -0.5 for text in texts})
+    ensemble = EnsembleAnalyzer(
+        analyzers={"vader": vader, "transformer": transformer}, emotion_analyzer=Emotions(),
+        cascade=CascadePolicy(vader_threshold=0.6, max_words=12, allow_negation=False)
+    )
+    ensemble.analyze_batch(texts)
+    assert transformer.encoded == [texts[1:]]
+    ensemble.close()
+
+def test_cascade_changes_cache_namespace():
+    analyzers = {"vader": ScriptedAnalyzer({}), "transformer": ScriptedAnalyzer({})}
+    plain = EnsembleAnalyzer(analyzers=analyzers)
+    cascading = EnsembleAnalyzer(analyzers=analyzers, cascade=CascadePolicy())
+    assert plain.cache_namespace() != cascading.cache_namespace()
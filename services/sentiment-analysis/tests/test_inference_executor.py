@@ -0,0 +1,81 @@
+# services/sentiment-analysis/tests/test_inference_executor.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.models.ensemble_analyzer import EnsembleAnalyzer
+from src.models.inference_executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
+from src.models.vader_analyzer import VADERAnalyzer
+
+def test_call_runs_off_the_event_loop_thread():
+    executor = InferenceExecutor()
+
+    async def run():
+        return await executor.call(threading.get_ident)
+
+    assert asyncio.run(run()) != threading.get_ident()
+    executor.shutdown()
+
+def test_rejects_calls_beyond_max_pending():
+    executor = InferenceExecutor(max_workers=2, max_pending=2, timeout=2)
+    release = threading.Event()
+
+    async def run():
+        slow = [asyncio.ensure_future(executor.call(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(InferenceQueueFull):
+            await executor.call(time.sleep, 0)
+        release.set()
+        await asyncio.gather(*slow)
+
+    asyncio.run(run())
+    assert executor.stats["rejected"] == 1
+    assert executor.pending == 0
+    executor.shutdown()
+
+def test_enforces_timeout():
+    executor = InferenceExecutor(timeout=0.05)
+
+    async def run():
+        with pytest.raises(InferenceTimeout):
+            await executor.run(asyncio.sleep(1))
+
+    asyncio.run(run())
+    assert executor.stats["timed_out"] == 1
+    assert executor.pending == 0
+    executor.shutdown()
+
+def test_chunks_share_one_admission_and_one_timeout():
+    executor = InferenceExecutor(max_pending=1, timeout=0.15)
+    started = []
+
+    def score(chunk):
+        started.append(chunk)
+        assert executor.pending == 1
+        time.sleep(0.06)
+        return [len(text) for text in chunk]
+
+    async def run():
+        assert await executor.call_chunks(score, [["a", "bb"], ["ccc"]]) == [1, 2, 3]
+        # Each chunk fits the timeout, but together they don't; the rest never start
+        with pytest.raises(InferenceTimeout):
+            await executor.call_chunks(score, [["a"]] * 5)
+
+    asyncio.run(run())
+    assert len(started) < 2 + 5
+    assert executor.stats["admitted"] == 2 and executor.pending == 0
+    executor.shutdown()
+
+def test_process_pool_offload_matches_in_thread_results(fake_analyzers):
+    messages = ["I feel awful today", "thanks, that really helped!", "ok"]
+    analyzers = {"vader": VADERAnalyzer(), "transformer": fake_analyzers["transformer"]}
+    expected = EnsembleAnalyzer(analyzers=analyzers).analyze_batch(messages)
+
+    executor = InferenceExecutor(process_workers=1)
+    try:
+        offloaded = EnsembleAnalyzer(analyzers=analyzers, process_pool=executor.process_pool)
+        assert offloaded.analyze_batch(messages) == expected
+    finally:
+        executor.shutdown()
@@ -0,0 +1,78 @@
+# services/sentiment-analysis/tests/test_loader.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.models.ensemble_analyzer import EnsembleAnalyzer
+from src.models.loader import ModelLoader, ModelNotReady
+from src.models.vader_analyzer import VADERAnalyzer
+
+class RecordingAnalyzer:
+    def __init__(self):
+        self.batches = []
+
+    def analyze_batch(self, texts):
+        self.batches.append(list(texts))
+        return [{} for _ in texts]
+
+def test_loader_warms_up_before_reporting_ready():
+    analyzer = RecordingAnalyzer()
+    loader = ModelLoader(lambda: analyzer, imports=["json"], warmup_texts=["ok", "a longer message"])
+
+    with pytest.raises(ModelNotReady):
+        loader.get()
+    assert loader.status()["state"] == "pending"
+
+    assert loader.load() is analyzer
+    assert loader.ready and loader.get() is analyzer
+    assert analyzer.batches == [["ok", "a longer message"]]
+    assert set(loader.timings) >= {"import_seconds", "load_seconds", "first_inference_seconds", "ready_seconds"}
+
+    # Loading again reuses the analyzer without another warm-up
+    assert loader.load() is analyzer
+    assert len(analyzer.batches) == 1
+
+def test_preloaded_analyzer_is_only_warmed_up_by_load():
+    built = []
+    loader = ModelLoader(lambda: built.append(RecordingAnalyzer()) or built[-1], warmup_texts=["ok"])
+
+    analyzer = loader.preload()
+    assert analyzer.batches == [] and not loader.ready
+    assert loader.preload() is analyzer
+
+    assert loader.load() is analyzer
+    assert len(built) == 1 and analyzer.batches == [["ok"]]
+    assert loader.ready
+
+def test_failed_load_is_reported():
+    def factory():
+        raise RuntimeError("weights missing")
+
+    loader = ModelLoader(factory)
+    with pytest.raises(RuntimeError):
+        loader.load()
+    assert loader.state == "failed"
+    assert loader.status()["error"] == "weights missing"
+    with pytest.raises(ModelNotReady):
+        loader.get()
+
+def test_endpoints_are_gated_on_readiness(monkeypatch):
+    loader = ModelLoader(lambda: EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer()}, weights={"vader": 1.0}))
+    monkeypatch.setattr(routes, "loader", loader)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    client = TestClient(app)
+    request = {"session_id": "session-1", "message": "I feel great today"}
+
+    assert client.get("/api/v1/sentiment/health").status_code == 200
+    assert client.get("/api/v1/sentiment/ready").status_code == 503
+    response = client.post("/api/v1/sentiment/analyze", json=request)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    loader.load()
+    ready = client.get("/api/v1/sentiment/ready")
+    assert ready.status_code == 200
+    assert ready.json()["models"]["state"] == "ready"
+    assert client.post("/api/v1/sentiment/analyze", json=request).json()["overall_sentiment"] > 0
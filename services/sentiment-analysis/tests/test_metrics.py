@@ -0,0 +1,56 @@
+# services/sentiment-analysis/tests/test_metrics.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared.utils import metrics
+
+pytestmark = pytest.mark.skipif(not metrics.ENABLED, reason="prometheus_client not installed")
+
+def stage_count(stage):
+    return metrics.REGISTRY.get_sample_value(
+        "stage_duration_seconds_count", {"service": metrics.SERVICE, "stage": stage}
+    ) or 0
+
+def test_timed_records_one_observation_per_block():
+    before = stage_count("test_stage")
+    for _ in range(3):
+        with metrics.timed("test_stage"):
+            pass
+    assert stage_count("test_stage") == before + 3
+
+def test_timed_still_records_when_the_block_raises():
+    before = stage_count("failing_stage")
+    with pytest.raises(ValueError):
+        with metrics.timed("failing_stage"):
+            raise ValueError("boom")
+    assert stage_count("failing_stage") == before + 1
+
+def test_callbacks_are_read_at_scrape_time_and_broken_ones_skipped():
+    queue = []
+    metrics.register_gauge("test_queue_depth", "Test queue", lambda: len(queue))
+    metrics.register_gauge("test_broken_gauge", "Raises on scrape", lambda: 1 / 0)
+
+    queue.extend([1, 2])
+    assert metrics.REGISTRY.get_sample_value("test_queue_depth", {"service": metrics.SERVICE}) == 2
+    assert metrics.REGISTRY.get_sample_value("test_broken_gauge", {"service": metrics.SERVICE}) is None
+
+def test_instrumented_app_serves_metrics_labelled_by_route_template():
+    app = FastAPI()
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return {"session_id": session_id}
+
+    metrics.instrument_app(app, "test-service")
+    client = TestClient(app)
+    client.get("/sessions/a")
+    client.get("/sessions/b")
+
+    body = client.get("/metrics").text
+    assert 'route="/sessions/{session_id}"' in body
+    assert "/sessions/a" not in body
+    assert metrics.REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"service": "test-service", "method": "GET", "route": "/sessions/{session_id}", "status": "200"}
+    ) == 2
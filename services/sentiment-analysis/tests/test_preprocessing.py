@@ -0,0 +1,45 @@
+# services/sentiment-analysis/tests/test_preprocessing.py
+import pytest
+
+from src.utils.preprocessing import extract_linguistic_features, extract_linguistic_features_batch
+
+def test_features_of_a_typical_message():
+    features = extract_linguistic_features("I can't do this anymore. Nothing ever works out for me!! Why?")
+
+    assert features["word_count"] == 12
+    assert features["sentence_count"] == 3
+    assert features["avg_sentence_length"] == pytest.approx(4.0)
+    assert features["exclamation_count"] == 2
+    assert features["question_count"] == 1
+    assert features["caps_ratio"] == pytest.approx(3 / 61)
+    assert features["first_person_ratio"] == pytest.approx(2 / 12)  # I, me
+    assert features["negation_count"] == 2  # can't, nothing
+    assert features["absolutist_ratio"] == pytest.approx(2 / 12)  # nothing, ever
+
+def test_sentence_boundaries():
+    assert extract_linguistic_features("no terminator here")["sentence_count"] == 1
+    assert extract_linguistic_features("Wait... what?! ok")["sentence_count"] == 3
+    assert extract_linguistic_features("...")["sentence_count"] == 0
+
+def test_curly_apostrophes_and_empty_text():
+    assert extract_linguistic_features("I don’t know")["negation_count"] == 1
+    assert extract_linguistic_features("I’m fine")["first_person_ratio"] == pytest.approx(0.5)
+
+    empty = extract_linguistic_features("")
+    assert empty["word_count"] == 0 and empty["caps_ratio"] == 0 and empty["avg_sentence_length"] == 0
+
+@pytest.mark.parametrize("text", ["never!!!", "'never'", "*never*", "(never).", "not—never", "“never”", "‘never’"])
+def test_punctuation_around_words_does_not_hide_them(text):
+    features = extract_linguistic_features(text)
+    assert features["negation_count"] >= 1 and features["absolutist_ratio"] > 0
+
+def test_punctuation_runs_are_not_words():
+    features = extract_linguistic_features("...me). (i'm) 'myself'?! --")
+    assert features["word_count"] == 3
+    assert features["first_person_ratio"] == pytest.approx(1.0)
+    # The non-ASCII path agrees
+    assert extract_linguistic_features("...me). (i’m) ‘myself’?! —")["first_person_ratio"] == pytest.approx(1.0)
+
+def test_batch_matches_single():
+    texts = ["I always mess up.", "", "Thanks!"]
+    assert extract_linguistic_features_batch(texts) == [extract_linguistic_features(t) for t in texts]
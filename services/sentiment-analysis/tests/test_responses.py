@@ -0,0 +1,93 @@
+# services/sentiment-analysis/tests/test_responses.py
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared.utils.responses import dumps
+from shared.utils.score_codec import CONTENT_TYPE, decode_scores
+from src.api import routes
+from src.api.schemas import SentimentAnalysisResponse
+from src.models.ensemble_analyzer import EnsembleAnalyzer
+from src.models.loader import ModelLoader
+from src.models.vader_analyzer import VADERAnalyzer
+
+def test_dumps_handles_models_and_numpy_values():
+    model = SentimentAnalysisResponse.model_construct(
+        session_id="s", message_id="m", timestamp=datetime(2024, 3, 1, 12, 30),
+        overall_sentiment=0.5, confidence=0.75, emotions={"joy": 0.25}, linguistic_features={"word_count": 3},
+        model_version="ensemble_v1.0", processing_time_ms=1.5
+    )
+    decoded = json.loads(dumps({"score": model, "mean": np.mean([1.0, 2.0]), "scores": np.array([0.5, 1.5])}))
+    assert decoded["score"] == json.loads(model.model_dump_json())
+    assert decoded["mean"] == 1.5 and decoded["scores"] == [0.5, 1.5]
+
+def test_analyze_endpoints_return_prebuilt_responses(monkeypatch):
+    loader = ModelLoader(lambda: EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer()}, weights={"vader": 1.0}))
+    loader.load()
+    monkeypatch.setattr(routes, "loader", loader)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    client = TestClient(app)
+    messages = [{"session_id": "session-1", "message": "I feel great today"},
+                {"session_id": "session-2", "message": "This is awful"}]
+
+    single = client.post("/api/v1/sentiment/analyze", json=messages[0])
+    assert single.headers["content-type"] == "application/json"
+    SentimentAnalysisResponse.model_validate(single.json())
+
+    batch = client.post("/api/v1/sentiment/analyze-batch", json={"messages": messages})
+    scores = [SentimentAnalysisResponse.model_validate(item) for item in batch.json()]
+    assert [score.session_id for score in scores] == ["session-1", "session-2"]
+    assert scores[0].overall_sentiment > 0 > scores[1].overall_sentiment
+
+    binary = client.post("/api/v1/sentiment/analyze-batch", json={"messages": messages},
+                         headers={"Accept": CONTENT_TYPE})
+    assert binary.headers["content-type"] == CONTENT_TYPE
+    assert [score["session_id"] for score in decode_scores(binary.content)] == ["session-1", "session-2"]
+
+class StalledProducer:
+    content_type = "application/json"
+
+    async def publish_many(self, items):
+        await asyncio.sleep(60)
+
+def test_stalled_stream_does_not_hold_up_responses(monkeypatch):
+    loader = ModelLoader(lambda: EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer()}, weights={"vader": 1.0}))
+    loader.load()
+    monkeypatch.setattr(routes, "loader", loader)
+    monkeypatch.setattr(routes, "producer", StalledProducer())
+    monkeypatch.setattr(routes.settings, "STREAM_PUBLISH_TIMEOUT_MS", 50)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+
+    start = time.perf_counter()
+    response = TestClient(app).post("/api/v1/sentiment/analyze", json={"session_id": "s", "message": "fine"})
+    assert response.status_code == 200
+    assert time.perf_counter() - start < 5
+
+class RecordingProducer:
+    content_type = "application/json"
+
+    def __init__(self):
+        self.published = []
+
+    async def publish_many(self, items):
+        self.published.extend(items)
+
+def test_published_scores_carry_the_user_id(monkeypatch):
+    loader = ModelLoader(lambda: EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer()}, weights={"vader": 1.0}))
+    loader.load()
+    producer = RecordingProducer()
+    monkeypatch.setattr(routes, "loader", loader)
+    monkeypatch.setattr(routes, "producer", producer)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+
+    messages = [{"session_id": "s1", "message": "fine", "user_id": "user-1"}, {"session_id": "s2", "message": "ok"}]
+    TestClient(app).post("/api/v1/sentiment/analyze-batch", json={"messages": messages})
+    assert [(key, payload.get("user_id")) for key, payload in producer.published] == [("s1", "user-1"), ("s2", None)]
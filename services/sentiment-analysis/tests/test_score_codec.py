@@ -0,0 +1,75 @@
+# services/sentiment-analysis/tests/test_score_codec.py
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from shared.utils.messaging import PAYLOAD_CODECS
+from shared.utils.score_codec import (
+    CONTENT_TYPE, EMOTIONS, accepts, decode_columns, decode_score_payloads, decode_scores, encode_scores
+)
+from src.api.schemas import SentimentAnalysisResponse
+
+def response(i, **overrides):
+    fields = dict(
+        session_id=f"session-{i}",
+        message_id=f"message-{i}",
+        timestamp=datetime(2024, 3, 1, 12, 0, i, 123456),
+        overall_sentiment=-0.25 * i,
+        confidence=0.5,
+        emotions={"joy": 0.25, "sadness": 0.75},
+        linguistic_features={"word_count": 12, "caps_ratio": 0.125, "negation_count": 1},
+        model_version="ensemble_v1.0",
+        processing_time_ms=2.5,
+    )
+    fields.update(overrides)
+    return SentimentAnalysisResponse(**fields)
+
+def test_round_trips_models_and_keeps_counts_integral():
+    responses = [response(i) for i in range(3)]
+    decoded = decode_scores(encode_scores(responses))
+    # All values above are exact in float32
+    assert decoded == [r.model_dump() for r in responses]
+    assert isinstance(decoded[0]["linguistic_features"]["word_count"], int)
+
+    aware = response(0, timestamp=datetime(2024, 3, 1, tzinfo=timezone.utc))
+    assert decode_scores(encode_scores([aware]))[0]["timestamp"] == aware.timestamp
+
+def test_stream_payloads_match_the_json_shape():
+    score = response(1, processing_time_ms=0.0)
+    payload = score.model_dump(mode="json")
+    assert decode_score_payloads(encode_scores([payload])) == [payload]
+
+    encode, decode = PAYLOAD_CODECS[CONTENT_TYPE]
+    assert decode(encode(score)) == payload
+
+def test_unknown_emotions_and_features_survive_and_floats_round_to_float32():
+    score = response(0, overall_sentiment=0.1, emotions={"joy": 0.5, "neutral": 0.4},
+                     linguistic_features={"word_count": 3, "language": "en"})
+    [decoded] = decode_scores(encode_scores([score]))
+    assert decoded["emotions"] == {"joy": 0.5, "neutral": 0.4}
+    assert decoded["linguistic_features"] == {"word_count": 3, "language": "en"}
+    assert decoded["overall_sentiment"] == pytest.approx(0.1, abs=1e-7)
+
+def test_columns_view_the_batch_with_nan_for_missing_values():
+    columns = decode_columns(encode_scores([response(i) for i in range(4)]))
+    assert len(columns) == 4 and columns.session_ids[3] == "session-3"
+    np.testing.assert_array_equal(columns.overall_sentiment, [0.0, -0.25, -0.5, -0.75])
+    assert columns.emotions.shape == (4, len(EMOTIONS))
+    assert columns.emotions[0, EMOTIONS.index("sadness")] == 0.75
+    assert math.isnan(columns.emotions[0, EMOTIONS.index("anger")])
+
+def test_user_ids_round_trip_after_the_trailer():
+    scores = [response(0, emotions={"neutral": 0.5}).model_dump(mode="json") for _ in range(3)]
+    scores[0]["user_id"], scores[2]["user_id"] = "user-1", "user-2"
+    data = encode_scores(scores)
+    assert decode_score_payloads(data) == scores
+    assert decode_columns(data).user_ids == ["user-1", None, "user-2"]
+    assert decode_columns(encode_scores([response(0)])).user_ids == [None]
+
+def test_rejects_other_payloads_and_negotiates_on_accept():
+    with pytest.raises(ValueError):
+        decode_scores(b'{"session_id": "s"}')
+    assert accepts(f"{CONTENT_TYPE}, application/json;q=0.5")
+    assert not accepts("application/json") and not accepts(None)
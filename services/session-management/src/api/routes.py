@@ -1 +1,35 @@
+# services/session-management/src/api/routes.py
+from fastapi import APIRouter, HTTPException, Query
+from .schemas import SentimentHistoryPage, SessionSummary
+from ..database.history import SessionHistoryStore
+from shared.utils.config import settings
+from shared.utils.responses import FastJSONResponse
+from typing import Optional
 
+router = APIRouter(prefix="/sessions", tags=["sessions"], default_response_class=FastJSONResponse)
+
+# Connected to the pool (and hot cache) by main.startup()
+history = SessionHistoryStore()
+
+@router.get("/{session_id}", response_model=SessionSummary)
+async def get_session(session_id: str,
+                      recent: int = Query(settings.SESSION_SUMMARY_RECENT, ge=0, le=settings.SESSION_HISTORY_MAX_PAGE_SIZE)):
+    # Aggregates plus the latest few scores; the full history is paged below
+    summary = await history.summary(session_id, recent)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    return summary
+
+@router.get("/{session_id}/sentiment", response_model=SentimentHistoryPage)
+async def get_sentiment_history(session_id: str,
+                                limit: int = Query(settings.SESSION_HISTORY_PAGE_SIZE, ge=1,
+                                                   le=settings.SESSION_HISTORY_MAX_PAGE_SIZE),
+                                cursor: Optional[str] = None):
+    session_uuid = await history.resolve(session_id)
+    if session_uuid is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    try:
+        items, next_cursor = await history.page(session_uuid, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": session_id, "items": items, "next_cursor": next_cursor}
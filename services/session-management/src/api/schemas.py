@@ -1 +1,35 @@
+# services/session-management/src/api/schemas.py
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
 
+class SentimentPoint(BaseModel):
+    id: str
+    message_id: str
+    timestamp: datetime
+    overall_sentiment: float
+    confidence: float
+    emotions: Dict[str, float]
+
+class SessionSummary(BaseModel):
+    session_id: str
+    user_id: Optional[str] = None
+    status: str
+    start_time: datetime
+    last_activity: datetime
+    message_count: int
+    sentiment_count: int
+    avg_sentiment: Optional[float] = None
+    min_sentiment: Optional[float] = None
+    max_sentiment: Optional[float] = None
+    sentiment_stddev: Optional[float] = None
+    drift_events_count: int
+    negative_drift_count: int
+    positive_drift_count: int
+    max_drift_magnitude: Optional[float] = None
+    recent_sentiment: List[SentimentPoint]
+
+class SentimentHistoryPage(BaseModel):
+    session_id: str
+    items: List[SentimentPoint]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for older scores
@@ -0,0 +1,172 @@
+# services/session-management/src/consumer.py
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .database.connection import WriteBehindBuffer
+from shared.utils.config import settings
+from shared.utils.messaging import (
+    DRIFT_EVENTS_STREAM, SENTIMENT_SCORES_STREAM, StreamConsumer, StreamMessage, create_client
+)
+
+# Row ids are derived from the stream payloads, so a redelivered message maps to
+# the rows it already wrote and the buffer's ON CONFLICT retry skips them
+_ROW_IDS = uuid.uuid5(uuid.NAMESPACE_URL, "sentiment-drift/session-management")
+
+# Creates sessions on their first score and keeps last_activity current; users
+# that don't exist (yet) are left NULL rather than failing the foreign key
+_UPSERT_SESSIONS = """
+    INSERT INTO sessions (id, session_id, user_id, start_time, last_activity, status, created_at, updated_at)
+    SELECT d.id, d.session_id, u.id, d.seen, d.seen, 'active', now(), now()
+    FROM unnest($1::uuid[], $2::text[], $3::uuid[], $4::timestamptz[]) AS d(id, session_id, user_id, seen)
+    LEFT JOIN users u ON u.id = d.user_id
+    ON CONFLICT (session_id) DO UPDATE SET
+        last_activity = GREATEST(sessions.last_activity, EXCLUDED.last_activity),
+        user_id = COALESCE(sessions.user_id, EXCLUDED.user_id),
+        updated_at = now()
+    RETURNING id, session_id, user_id
+"""
+
+class SessionStreamWriter:
+    """Stores published sentiment scores and drift events through the write-behind buffer.
+    
+    Each batch upserts its sessions in one statement, queues a messages row
+    and a sentiment_scores row per score (or a drift_events row per event)
+    and flushes before the batch is acknowledged, so a crash redelivers
+    anything not yet committed. Scores don't carry the message text, so
+    messages rows are stored with empty content. A drift event's message
+    may not be written yet, so its id goes into the event's metadata
+    rather than the message_id foreign key.
+    
+    Replicas share one consumer group over every partition; nothing here
+    depends on order.
+    """
+    
+    def __init__(self, buffer: WriteBehindBuffer, pool: Any,
+                 scores: Optional[StreamConsumer] = None, drift_events: Optional[StreamConsumer] = None):
+        self.buffer = buffer
+        self.pool = pool
+        self.scores = scores
+        self.drift_events = drift_events
+        self.stats = {"scores": 0, "drift_events": 0}
+    
+    async def handle_scores(self, messages: List[StreamMessage]) -> None:
+        sessions = await self._upsert_sessions(messages)
+        messages_rows, score_rows = [], []
+        for message in messages:
+            score = message.payload
+            session_uuid = sessions[message.key][0]
+            timestamp = _timestamp(score.get("timestamp"), message)
+            message_uuid = _message_uuid(score.get("message_id"), message)
+            messages_rows.append({
+                "id": message_uuid,
+                "message_id": str(score.get("message_id") or message_uuid),
+                "session_id": session_uuid,
+                "content": "",
+                "role": "user",
+                "timestamp": timestamp,
+            })
+            score_rows.append({
+                "id": uuid.uuid5(_ROW_IDS, f"score:{message_uuid}"),
+                "message_id": message_uuid,
+                "session_id": session_uuid,
+                "overall_sentiment": score["overall_sentiment"],
+                "confidence": score.get("confidence", 0.0),
+                "emotions": score.get("emotions") or {},
+                "linguistic_features": score.get("linguistic_features"),
+                "model_version": score.get("model_version") or "unknown",
+                "timestamp": timestamp,
+            })
+        await self.buffer.add_many("messages", messages_rows)
+        await self.buffer.add_many("sentiment_scores", score_rows)
+        # Committed before the batch is acknowledged
+        await self.buffer.flush()
+        self.stats["scores"] += len(score_rows)
+    
+    async def handle_drift_events(self, messages: List[StreamMessage]) -> None:
+        sessions = await self._upsert_sessions(messages)
+        rows = []
+        for message in messages:
+            event = message.payload
+            session_uuid, user_uuid = sessions[message.key]
+            rows.append({
+                "id": uuid.uuid5(_ROW_IDS, f"drift:{message.key}:{event.get('message_id') or message.id}"),
+                "session_id": session_uuid,
+                "user_id": user_uuid,
+                "event_type": "drift_detected",
+                "drift_magnitude": event["drift_magnitude"],
+                "drift_direction": event["drift_direction"],
+                "confidence": event["confidence"],
+                "detection_method": event["detection_method"],
+                "window_analyzed": event["window_analyzed"],
+                "current_sentiment": event["current_sentiment"],
+                "metadata": {
+                    "message_id": event.get("message_id"),
+                    "methods_detected": event.get("methods_detected"),
+                },
+                "timestamp": _timestamp(event.get("timestamp"), message),
+            })
+        await self.buffer.add_many("drift_events", rows)
+        await self.buffer.flush()
+        self.stats["drift_events"] += len(rows)
+    
+    async def _upsert_sessions(self, messages: List[StreamMessage]) -> Dict[str, tuple]:
+        """External session_id -> (sessions.id, sessions.user_id) for every session in the batch"""
+        seen: Dict[str, datetime] = {}
+        users: Dict[str, Optional[uuid.UUID]] = {}
+        for message in messages:
+            timestamp = _timestamp(message.payload.get("timestamp"), message)
+            seen[message.key] = max(seen.get(message.key, timestamp), timestamp)
+            users[message.key] = users.get(message.key) or _uuid(message.payload.get("user_id"))
+        session_ids = list(seen)
+        rows = await self.pool.fetch(
+            _UPSERT_SESSIONS,
+            [uuid.uuid4() for _ in session_ids],
+            session_ids,
+            [users[session_id] for session_id in session_ids],
+            [seen[session_id] for session_id in session_ids]
+        )
+        return {row["session_id"]: (row["id"], row["user_id"]) for row in rows}
+    
+    async def run(self) -> None:
+        consumers = [(self.scores, self.handle_scores), (self.drift_events, self.handle_drift_events)]
+        await asyncio.gather(*(consumer.run(handler) for consumer, handler in consumers if consumer is not None))
+    
+    def stop(self) -> None:
+        for consumer in (self.scores, self.drift_events):
+            if consumer is not None:
+                consumer.stop()
+
+def _timestamp(value: Any, message: StreamMessage) -> datetime:
+    if value is None:
+        # The entry's own time, so a redelivered message gets the same timestamp
+        milliseconds = int(message.id.split("-")[0])
+        return datetime.fromtimestamp(milliseconds / 1000, timezone.utc)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    # Published timestamps are naive UTC (datetime.utcnow)
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def _uuid(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+def _message_uuid(message_id: Any, message: StreamMessage) -> uuid.UUID:
+    return _uuid(message_id) or uuid.uuid5(_ROW_IDS, f"message:{message_id or message.stream + '/' + message.id}")
+
+def build_writer(buffer: WriteBehindBuffer, pool: Any, client: Any = None) -> SessionStreamWriter:
+    # XREADGROUP blocks for up to STREAM_BLOCK_MS before answering
+    client = client or create_client(
+        socket_timeout=settings.STREAM_BLOCK_MS / 1000 + settings.REDIS_SOCKET_TIMEOUT_SECONDS
+    )
+    name = os.getenv("HOSTNAME", socket.gethostname())
+    return SessionStreamWriter(
+        buffer, pool,
+        scores=StreamConsumer(client, SENTIMENT_SCORES_STREAM, group="session-management", consumer=name),
+        drift_events=StreamConsumer(client, DRIFT_EVENTS_STREAM, group="session-management", consumer=name)
+    )
@@ -0,0 +1,203 @@
+# services/session-management/src/database/aggregates.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from .connection import TABLE_COLUMNS
+
+# Adds one flush's per-session deltas to the running aggregates on sessions.
+# LEAST/GREATEST skip NULLs, so the first score or event initialises min/max.
+_APPLY_DELTAS = """
+    UPDATE sessions AS s SET
+        message_count = s.message_count + d.messages,
+        user_message_count = s.user_message_count + d.user_messages,
+        assistant_message_count = s.assistant_message_count + d.assistant_messages,
+        sentiment_count = s.sentiment_count + d.scores,
+        sentiment_sum = s.sentiment_sum + d.score_sum,
+        sentiment_sum_sq = s.sentiment_sum_sq + d.score_sum_sq,
+        avg_sentiment = CASE WHEN s.sentiment_count + d.scores > 0
+            THEN (s.sentiment_sum + d.score_sum) / (s.sentiment_count + d.scores)
+            ELSE s.avg_sentiment END,
+        min_sentiment = LEAST(s.min_sentiment, d.score_min),
+        max_sentiment = GREATEST(s.max_sentiment, d.score_max),
+        drift_events_count = s.drift_events_count + d.drifts,
+        negative_drift_count = s.negative_drift_count + d.negative_drifts,
+        positive_drift_count = s.positive_drift_count + d.positive_drifts,
+        max_drift_magnitude = GREATEST(s.max_drift_magnitude, d.drift_max)
+    FROM unnest(
+        $1::uuid[], $2::int[], $3::int[], $4::int[], $5::int[], $6::float8[], $7::float8[],
+        $8::float8[], $9::float8[], $10::int[], $11::int[], $12::int[], $13::float8[]
+    ) AS d(session_id, messages, user_messages, assistant_messages, scores, score_sum, score_sum_sq,
+           score_min, score_max, drifts, negative_drifts, positive_drifts, drift_max)
+    WHERE s.id = d.session_id
+"""
+
+# Recomputes the aggregates from the base tables (one GROUP BY per table, so
+# there is no join fan-out) and rewrites only the sessions that disagree
+_RECONCILE = """
+    WITH target AS (
+        SELECT id FROM sessions
+        WHERE ($1::uuid[] IS NULL OR id = ANY($1::uuid[]))
+          AND ($2::timestamptz IS NULL OR last_activity >= $2::timestamptz)
+    ),
+    m AS (
+        SELECT session_id,
+               COUNT(*) AS message_count,
+               COUNT(*) FILTER (WHERE role = 'user') AS user_message_count,
+               COUNT(*) FILTER (WHERE role = 'assistant') AS assistant_message_count
+        FROM messages WHERE session_id IN (SELECT id FROM target) GROUP BY session_id
+    ),
+    sc AS (
+        SELECT session_id,
+               COUNT(*) AS sentiment_count,
+               SUM(overall_sentiment) AS sentiment_sum,
+               SUM(overall_sentiment * overall_sentiment) AS sentiment_sum_sq,
+               AVG(overall_sentiment) AS avg_sentiment,
+               MIN(overall_sentiment) AS min_sentiment,
+               MAX(overall_sentiment) AS max_sentiment
+        FROM sentiment_scores WHERE session_id IN (SELECT id FROM target) GROUP BY session_id
+    ),
+    de AS (
+        SELECT session_id,
+               COUNT(*) AS drift_events_count,
+               COUNT(*) FILTER (WHERE drift_direction = 'negative') AS negative_drift_count,
+               COUNT(*) FILTER (WHERE drift_direction = 'positive') AS positive_drift_count,
+               MAX(drift_magnitude) AS max_drift_magnitude
+        FROM drift_events WHERE session_id IN (SELECT id FROM target) GROUP BY session_id
+    ),
+    expected AS (
+        SELECT t.id,
+               COALESCE(m.message_count, 0) AS message_count,
+               COALESCE(m.user_message_count, 0) AS user_message_count,
+               COALESCE(m.assistant_message_count, 0) AS assistant_message_count,
+               COALESCE(sc.sentiment_count, 0) AS sentiment_count,
+               COALESCE(sc.sentiment_sum, 0) AS sentiment_sum,
+               COALESCE(sc.sentiment_sum_sq, 0) AS sentiment_sum_sq,
+               sc.avg_sentiment, sc.min_sentiment, sc.max_sentiment,
+               COALESCE(de.drift_events_count, 0) AS drift_events_count,
+               COALESCE(de.negative_drift_count, 0) AS negative_drift_count,
+               COALESCE(de.positive_drift_count, 0) AS positive_drift_count,
+               de.max_drift_magnitude
+        FROM target t
+        LEFT JOIN m ON m.session_id = t.id
+        LEFT JOIN sc ON sc.session_id = t.id
+        LEFT JOIN de ON de.session_id = t.id
+    )
+    UPDATE sessions AS s SET
+        message_count = e.message_count,
+        user_message_count = e.user_message_count,
+        assistant_message_count = e.assistant_message_count,
+        sentiment_count = e.sentiment_count,
+        sentiment_sum = e.sentiment_sum,
+        sentiment_sum_sq = e.sentiment_sum_sq,
+        avg_sentiment = e.avg_sentiment,
+        min_sentiment = e.min_sentiment,
+        max_sentiment = e.max_sentiment,
+        drift_events_count = e.drift_events_count,
+        negative_drift_count = e.negative_drift_count,
+        positive_drift_count = e.positive_drift_count,
+        max_drift_magnitude = e.max_drift_magnitude
+    FROM expected e
+    WHERE s.id = e.id AND (
+          (s.message_count, s.user_message_count, s.assistant_message_count, s.sentiment_count,
+            s.drift_events_count, s.negative_drift_count, s.positive_drift_count,
+            s.min_sentiment, s.max_sentiment, s.max_drift_magnitude)
+          IS DISTINCT FROM
+          (e.message_count, e.user_message_count, e.assistant_message_count, e.sentiment_count,
+           e.drift_events_count, e.negative_drift_count, e.positive_drift_count,
+           e.min_sentiment, e.max_sentiment, e.max_drift_magnitude)
+          -- Floating point sums only count as drift beyond rounding error
+          OR abs(s.sentiment_sum - e.sentiment_sum) > 1e-6
+      )
+"""
+
+class SessionAggregator:
+    """Keeps the per-session analytics columns up to date from buffered writes.
+    
+    Called by WriteBehindBuffer inside each flush transaction: the flushed
+    messages, scores and drift events are folded into one delta per session
+    and applied with a single UPDATE, so the aggregates commit atomically
+    with the rows they describe. reconcile() recomputes them from the base
+    tables to repair anything written outside the buffer.
+    """
+    
+    def __init__(self, tables: Optional[Dict[str, Sequence[str]]] = None):
+        tables = tables or TABLE_COLUMNS
+        self._messages = {c: i for i, c in enumerate(tables.get("messages", ()))}
+        self._scores = {c: i for i, c in enumerate(tables.get("sentiment_scores", ()))}
+        self._drifts = {c: i for i, c in enumerate(tables.get("drift_events", ()))}
+    
+    def deltas(self, batch: Dict[str, List[tuple]]) -> Dict[Any, List[Any]]:
+        """Per-session [messages, user, assistant, scores, sum, sum_sq, min, max, drifts, neg, pos, max_magnitude]"""
+        deltas: Dict[Any, List[Any]] = {}
+        
+        def delta(session_id):
+            entry = deltas.get(session_id)
+            if entry is None:
+                entry = deltas[session_id] = [0, 0, 0, 0, 0.0, 0.0, None, None, 0, 0, 0, None]
+            return entry
+        
+        if batch.get("messages"):
+            session, role = self._messages["session_id"], self._messages["role"]
+            for record in batch["messages"]:
+                entry = delta(record[session])
+                entry[0] += 1
+                entry[1] += record[role] == "user"
+                entry[2] += record[role] == "assistant"
+        
+        if batch.get("sentiment_scores"):
+            session, score = self._scores["session_id"], self._scores["overall_sentiment"]
+            for record in batch["sentiment_scores"]:
+                entry = delta(record[session])
+                value = record[score]
+                entry[3] += 1
+                entry[4] += value
+                entry[5] += value * value
+                entry[6] = value if entry[6] is None else min(entry[6], value)
+                entry[7] = value if entry[7] is None else max(entry[7], value)
+        
+        if batch.get("drift_events"):
+            session = self._drifts["session_id"]
+            direction, magnitude = self._drifts["drift_direction"], self._drifts["drift_magnitude"]
+            for record in batch["drift_events"]:
+                entry = delta(record[session])
+                entry[8] += 1
+                entry[9] += record[direction] == "negative"
+                entry[10] += record[direction] == "positive"
+                entry[11] = record[magnitude] if entry[11] is None else max(entry[11], record[magnitude])
+        
+        return deltas
+    
+    async def apply(self, connection: Any, batch: Dict[str, List[tuple]]) -> int:
+        """Add a flushed batch to the session aggregates; returns the sessions touched"""
+        deltas = self.deltas(batch)
+        if not deltas:
+            return 0
+        # A stable order means concurrent flushes lock shared sessions in the same order
+        session_ids = sorted(deltas, key=str)
+        columns = list(zip(*(deltas[session_id] for session_id in session_ids)))
+        await connection.execute(_APPLY_DELTAS, session_ids, *columns)
+        return len(session_ids)
+    
+    async def reconcile(self, connection: Any, session_ids: Optional[Sequence[Any]] = None,
+                        active_since: Optional[datetime] = None) -> int:
+        """Recompute aggregates from the base tables; returns how many sessions were corrected"""
+        status = await connection.execute(
+            _RECONCILE, list(session_ids) if session_ids is not None else None, active_since
+        )
+        return int(status.split()[-1])
+
+async def reconcile_periodically(pool: Any, aggregator: SessionAggregator,
+                                 interval_seconds: float, window: timedelta) -> None:
+    """Background job: reconcile sessions active within ``window`` every ``interval_seconds``"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with pool.acquire() as connection:
+                corrected = await aggregator.reconcile(
+                    connection, active_since=datetime.now(timezone.utc) - window
+                )
+            if corrected:
+                print(f"Session aggregate reconciliation corrected {corrected} sessions")
+        except Exception as e:
+            print(f"Session aggregate reconciliation failed: {e}")
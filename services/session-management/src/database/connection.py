@@ -1 +1,294 @@
+# services/session-management/src/database/connection.py
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
 
+import asyncpg
+
+from shared.utils.config import settings
+from shared.utils.metrics import timed
+
+# Columns written by the buffer, in the order tables are flushed (parents before
+# children, so foreign keys resolve within one transaction)
+TABLE_COLUMNS: "OrderedDict[str, Sequence[str]]" = OrderedDict([
+    ("messages", (
+        "id", "message_id", "session_id", "content", "role", "timestamp", "metadata", "created_at"
+    )),
+    ("sentiment_scores", (
+        "id", "message_id", "session_id", "overall_sentiment", "confidence", "emotions",
+        "linguistic_features", "model_version", "timestamp", "created_at"
+    )),
+    ("drift_events", (
+        "id", "session_id", "user_id", "message_id", "event_type", "drift_magnitude",
+        "drift_direction", "confidence", "detection_method", "window_analyzed",
+        "baseline_sentiment", "current_sentiment", "recommended_action", "action_taken",
+        "metadata", "timestamp", "created_at"
+    )),
+])
+
+# Errors caused by the rows themselves; anything else (connection loss, server
+# restart) is retried without blaming the batch
+ROW_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+async def _init_connection(connection: asyncpg.Connection) -> None:
+    # COPY uses the binary protocol: jsonb is a version byte followed by the JSON text
+    await connection.set_type_codec(
+        "jsonb",
+        encoder=lambda value: b"\x01" + json.dumps(value).encode("utf-8"),
+        decoder=lambda data: json.loads(data[1:]),
+        schema="pg_catalog",
+        format="binary"
+    )
+
+class Database:
+    """Process-wide asyncpg connection pool"""
+    
+    def __init__(self, dsn: str = settings.DATABASE_URL,
+                 min_size: int = settings.DB_POOL_MIN_SIZE,
+                 max_size: int = settings.DB_POOL_MAX_SIZE,
+                 server_settings: Optional[Dict[str, str]] = None):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.server_settings = server_settings
+        self.pool: Optional[asyncpg.Pool] = None
+    
+    async def connect(self) -> asyncpg.Pool:
+        if self.pool is None:
+            self.pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                server_settings=self.server_settings,
+                init=_init_connection
+            )
+        return self.pool
+    
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+    
+    def acquire(self):
+        """``async with db.acquire() as connection:``"""
+        return self.pool.acquire()
+    
+    async def execute(self, query: str, *args) -> str:
+        return await self.pool.execute(query, *args)
+    
+    async def fetch(self, query: str, *args) -> List[asyncpg.Record]:
+        return await self.pool.fetch(query, *args)
+    
+    async def fetchrow(self, query: str, *args) -> Optional[asyncpg.Record]:
+        return await self.pool.fetchrow(query, *args)
+
+class WriteBehindBuffer:
+    """Buffers inserts and writes them to Postgres in bulk with COPY.
+    
+    Rows are queued per table and flushed when ``max_rows`` are pending or
+    ``flush_interval_ms`` has passed, whichever comes first. Each flush copies
+    every table in one transaction, so a failure leaves nothing half-written;
+    the rows go back to the front of the queue and are retried (at-least-once).
+    Once ``max_pending`` rows are buffered or in flight, ``add`` waits for a
+    flush to drain them instead of growing without bound.
+    
+    Retries insert through a staging table with ON CONFLICT DO NOTHING, so
+    rows whose commit succeeded but was never acknowledged aren't written
+    (or aggregated) twice. After ``max_attempts`` failed flushes the batch
+    is split table by table and bisected: rows that still fail on their own
+    with a data or constraint error are logged and dropped (``dead_lettered``)
+    instead of blocking every row behind them.
+    """
+    
+    def __init__(self, pool: Any, max_rows: int = settings.WRITE_BUFFER_MAX_ROWS,
+                 flush_interval_ms: float = settings.WRITE_BUFFER_FLUSH_INTERVAL_MS,
+                 max_pending: int = settings.WRITE_BUFFER_MAX_PENDING,
+                 max_attempts: int = settings.WRITE_BUFFER_MAX_ATTEMPTS,
+                 tables: Optional[Dict[str, Sequence[str]]] = None,
+                 aggregator: Optional[Any] = None, history_cache: Optional[Any] = None):
+        self.pool = pool
+        self.aggregator = aggregator  # Folds each flushed batch into derived tables
+        self.history_cache = history_cache  # Sees each batch once it has committed
+        self.max_rows = max(1, max_rows)
+        self.flush_interval = max(1.0, flush_interval_ms) / 1000
+        self.max_pending = max(self.max_rows, max_pending)
+        self.max_attempts = max(1, max_attempts)
+        self.tables = OrderedDict(tables or TABLE_COLUMNS)
+        self.stats = {"rows_written": 0, "flushes": 0, "errors": 0, "backpressure_waits": 0,
+                      "duplicates_skipped": 0, "dead_lettered": 0}
+        
+        self._buffers: Dict[str, List[tuple]] = {table: [] for table in self.tables}
+        self._pending = 0  # Buffered plus in-flight rows
+        self._failures = 0  # Consecutive failed flushes of the rows at the front of the queue
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    def __len__(self) -> int:
+        return self._pending
+    
+    def start(self) -> None:
+        """Start the background flusher on the running loop"""
+        if self._worker is None or self._worker.done():
+            self._closing = False
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+    
+    async def add(self, table: str, row: Dict[str, Any]) -> None:
+        """Queue one row; missing id/created_at are filled in, other missing columns are NULL"""
+        columns = self.tables[table]
+        while self._pending >= self.max_pending:
+            self.stats["backpressure_waits"] += 1
+            if self._worker is None:
+                await self.flush()  # No background flusher; drain inline
+                continue
+            self._drained.clear()
+            self._flush_requested.set()
+            await self._drained.wait()
+        
+        self._buffers[table].append(self._to_record(columns, row))
+        self._pending += 1
+        if self._pending >= self.max_rows:
+            self._flush_requested.set()
+    
+    async def add_many(self, table: str, rows: Sequence[Dict[str, Any]]) -> None:
+        for row in rows:
+            await self.add(table, row)
+    
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written"""
+        async with self._flush_lock:
+            batch = {table: rows for table, rows in self._buffers.items() if rows}
+            if not batch:
+                return 0
+            self._buffers = {table: [] for table in self.tables}
+            
+            try:
+                with timed("db_flush"):
+                    if self._failures >= self.max_attempts:
+                        stored = await self._write_isolating_rows(batch)
+                    else:
+                        # A failed flush may still have committed; only a retry can conflict
+                        stored = await self._write(batch, skip_duplicates=self._failures > 0)
+            except Exception:
+                self.stats["errors"] += 1
+                self._failures += 1
+                # Put the rows back ahead of anything queued meanwhile and retry later
+                for table, rows in batch.items():
+                    self._buffers[table] = rows + self._buffers[table]
+                raise
+            self._failures = 0
+            
+            if self.history_cache is not None and stored:
+                await self.history_cache.record(stored)
+            
+            taken = sum(len(rows) for rows in batch.values())
+            count = sum(len(rows) for rows in stored.values())
+            self._pending -= taken
+            self.stats["rows_written"] += count
+            self.stats["flushes"] += 1
+            if self._pending < self.max_pending:
+                self._drained.set()
+            return count
+    
+    async def close(self) -> None:
+        """Stop the flusher and write whatever is still buffered"""
+        self._closing = True
+        if self._worker is not None:
+            self._flush_requested.set()
+            await self._worker
+            self._worker = None
+        # Enough attempts to reach the row-isolating fallback before giving up
+        for attempt in range(self.max_attempts + 1):
+            try:
+                await self.flush()
+                return
+            except Exception as e:
+                print(f"Write-behind flush failed on close (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(min(self.flush_interval, 1.0))
+        print(f"Write-behind buffer closed with {self._pending} rows unwritten")
+    
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Write-behind flush failed, retrying: {e}")
+                await asyncio.sleep(max(self.flush_interval, 0.1))
+    
+    async def _write(self, batch: Dict[str, List[tuple]], skip_duplicates: bool) -> Dict[str, List[tuple]]:
+        """Write ``batch`` in one transaction; returns (and aggregates) only the rows it inserted"""
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                if skip_duplicates:
+                    batch = {table: await self._insert_new(connection, table, rows)
+                             for table, rows in batch.items()}
+                    batch = {table: rows for table, rows in batch.items() if rows}
+                else:
+                    for table, rows in batch.items():
+                        await connection.copy_records_to_table(
+                            table, records=rows, columns=list(self.tables[table])
+                        )
+                if self.aggregator is not None and batch:
+                    await self.aggregator.apply(connection, batch)
+        return batch
+    
+    async def _insert_new(self, connection: Any, table: str, rows: List[tuple]) -> List[tuple]:
+        """COPY into a staging table and insert the rows whose id isn't there yet"""
+        columns = list(self.tables[table])
+        column_list = ", ".join(columns)
+        staging = f"_staging_{table}"
+        await connection.execute(f"CREATE TEMP TABLE {staging} (LIKE {table}) ON COMMIT DROP")
+        await connection.copy_records_to_table(staging, records=rows, columns=columns)
+        inserted = await connection.fetch(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT DO NOTHING RETURNING id"
+        )
+        ids = {record["id"] for record in inserted}
+        position = columns.index("id")
+        new = []
+        for row in rows:
+            # A row queued twice (e.g. from a redelivered message) is inserted once
+            if row[position] in ids:
+                ids.discard(row[position])
+                new.append(row)
+        self.stats["duplicates_skipped"] += len(rows) - len(new)
+        return new
+    
+    async def _write_isolating_rows(self, batch: Dict[str, List[tuple]]) -> Dict[str, List[tuple]]:
+        """Write each table on its own, bisecting whatever a row error rejects; returns the rows stored"""
+        stored = {}
+        for table, rows in batch.items():
+            rows = await self._bisect(table, rows)
+            if rows:
+                stored[table] = rows
+        return stored
+    
+    async def _bisect(self, table: str, rows: List[tuple]) -> List[tuple]:
+        try:
+            return (await self._write({table: rows}, skip_duplicates=True)).get(table, [])
+        except ROW_ERRORS as e:
+            if len(rows) == 1:
+                self.stats["dead_lettered"] += 1
+                print(f"Write-behind dropped a {table} row after {self.max_attempts} attempts: {e}: {rows[0]!r}")
+                return []
+        middle = len(rows) // 2
+        return await self._bisect(table, rows[:middle]) + await self._bisect(table, rows[middle:])
+    
+    def _to_record(self, columns: Sequence[str], row: Dict[str, Any]) -> tuple:
+        if "id" not in row or "created_at" not in row:
+            row = dict(row)
+            row.setdefault("id", uuid.uuid4())
+            row.setdefault("created_at", datetime.now(timezone.utc))
+        return tuple(row.get(column) for column in columns)
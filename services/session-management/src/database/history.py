@@ -0,0 +1,264 @@
+# services/session-management/src/database/history.py
+import base64
+import json
+import math
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from shared.utils.config import settings
+from .connection import TABLE_COLUMNS
+
+# Sorts above every score; its presence means the set holds the session's newest
+# scores with nothing missing (see HotHistoryCache)
+COMPLETE = b"~complete"
+
+# Fields of a history entry, in the order they are selected
+ENTRY_FIELDS = ("id", "message_id", "timestamp", "overall_sentiment", "confidence", "emotions")
+
+# Newest first, resuming strictly before the cursor. The timestamp bound is what
+# idx_sentiment_scores_session_timestamp scans (and prunes partitions by); the
+# row comparison only breaks ties between scores with the same timestamp.
+_PAGE = """
+    SELECT id, message_id, "timestamp", overall_sentiment, confidence, emotions
+    FROM sentiment_scores
+    WHERE session_id = $1
+      AND ($2::timestamptz IS NULL OR ("timestamp" <= $2 AND ("timestamp", id) < ($2, $3::uuid)))
+    ORDER BY "timestamp" DESC, id DESC
+    LIMIT $4
+"""
+
+_SESSION = """
+    SELECT id, session_id, user_id, start_time, last_activity, status, message_count, sentiment_count,
+           avg_sentiment, min_sentiment, max_sentiment, sentiment_sum, sentiment_sum_sq,
+           drift_events_count, negative_drift_count, positive_drift_count, max_drift_magnitude
+    FROM sessions WHERE session_id = $1
+"""
+
+def encode_cursor(timestamp: datetime, score_id: Any) -> str:
+    """Opaque keyset cursor for the entry a page ended on"""
+    raw = f"{timestamp.isoformat()}|{score_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, score_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), uuid.UUID(score_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+
+def _entry(values: Sequence[Any]) -> Dict[str, Any]:
+    entry = dict(zip(ENTRY_FIELDS, values))
+    entry["id"] = str(entry["id"])
+    entry["message_id"] = str(entry["message_id"])
+    return entry
+
+class HotHistoryCache:
+    """The newest ``size`` sentiment scores of each active session, in Redis.
+    
+    One sorted set per session, scored by timestamp, so reading the latest
+    scores is a single ZREVRANGE. WriteBehindBuffer calls ``record`` after
+    each flush commits, and sets expire ``ttl_seconds`` after a session's
+    last write, so only active sessions stay cached.
+    
+    A set is only served once it carries the COMPLETE marker, which
+    ``fill`` adds after loading the newest scores from Postgres. Scores
+    recorded before that are merged in, so a fill racing a flush can't
+    lose one. Redis errors count as misses and reads fall back to Postgres.
+    
+    A complete set is only correct while the buffer is the only writer of
+    sentiment_scores (main enables the cache with the stream writer for
+    that reason). Anything else that inserts or deletes scores must call
+    ``invalidate`` for the sessions it touched, or ``clear``, as
+    partition retention does.
+    """
+    
+    def __init__(self, client: Any, size: int = settings.SESSION_HISTORY_HOT_SIZE,
+                 ttl_seconds: int = settings.SESSION_HISTORY_TTL_SECONDS,
+                 prefix: str = "session:history:", tables: Optional[Dict[str, Sequence[str]]] = None):
+        self.client = client
+        self.size = max(1, size)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        columns = list((tables or TABLE_COLUMNS)["sentiment_scores"])
+        self._positions = [columns.index(field) for field in ENTRY_FIELDS]
+        self._session = columns.index("session_id")
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0, "errors": 0}
+    
+    def key(self, session_id: Any) -> str:
+        return f"{self.prefix}{session_id}"
+    
+    async def record(self, batch: Dict[str, List[tuple]]) -> int:
+        """Add a committed flush's scores; returns the sessions touched. Never raises."""
+        by_session: Dict[Any, Dict[bytes, float]] = {}
+        for record in batch.get("sentiment_scores", ()):
+            entry = _entry([record[i] for i in self._positions])
+            by_session.setdefault(record[self._session], {})[_encode(entry)] = record[self._positions[2]].timestamp()
+        if not by_session:
+            return 0
+        try:
+            await self._write(by_session)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Hot history update failed: {e}")
+            # Drop what may now be missing a score; the next read refills from Postgres
+            try:
+                await self.client.delete(*(self.key(session_id) for session_id in by_session))
+            except Exception:
+                pass
+            return 0
+        self.stats["recorded"] += sum(len(entries) for entries in by_session.values())
+        return len(by_session)
+    
+    async def invalidate(self, session_ids: Sequence[Any]) -> None:
+        """Forget sessions whose scores changed outside the buffer; the next read refills them"""
+        if not session_ids:
+            return
+        try:
+            await self.client.delete(*(self.key(session_id) for session_id in session_ids))
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Hot history invalidation failed: {e}")
+    
+    async def clear(self) -> int:
+        """Forget every session; returns the number of sets dropped"""
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}*", count=1000)]
+        if keys:
+            await self.client.delete(*keys)
+        return len(keys)
+    
+    async def recent(self, session_id: Any, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Newest ``limit`` entries, newest first, or None when the cache can't answer"""
+        if limit > self.size:
+            return None
+        try:
+            members = await self.client.zrevrange(self.key(session_id), 0, limit)
+        except Exception:
+            self.stats["errors"] += 1
+            members = []
+        if not members or members[0] != COMPLETE:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return [_decode(member) for member in members[1:]]
+    
+    async def fill(self, session_id: Any, entries: List[Dict[str, Any]]) -> None:
+        """Load the session's newest scores (newest first, as read from Postgres) and mark it complete"""
+        mapping = {_encode(entry): entry["timestamp"].timestamp() for entry in entries[:self.size]}
+        mapping[COMPLETE] = math.inf
+        try:
+            await self._write({session_id: mapping})
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Hot history fill failed: {e}")
+    
+    async def _write(self, by_session: Dict[Any, Dict[bytes, float]]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for session_id, mapping in by_session.items():
+            key = self.key(session_id)
+            pipeline.zadd(key, mapping)
+            # Keep the newest entries plus the marker, which always ranks highest
+            pipeline.zremrangebyrank(key, 0, -(self.size + 2))
+            pipeline.expire(key, self.ttl_seconds)
+        await pipeline.execute()
+
+def _encode(entry: Dict[str, Any]) -> bytes:
+    # The id leads the member, so scores with equal timestamps order by id as in Postgres
+    return json.dumps({**entry, "timestamp": entry["timestamp"].isoformat()}).encode("utf-8")
+
+def _decode(member: bytes) -> Dict[str, Any]:
+    entry = json.loads(member)
+    entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+    return entry
+
+class SessionHistoryStore:
+    """Read path for session summaries and sentiment history.
+    
+    Summaries come from the aggregate columns SessionAggregator keeps on
+    sessions plus the latest few scores, never the full history. History
+    is paged newest first: pages from the start are served from the hot
+    cache when it holds them, and everything else by keyset pagination
+    on (session_id, timestamp), which costs the same at any depth.
+    """
+    
+    def __init__(self, pool: Any = None, cache: Optional[HotHistoryCache] = None,
+                 max_cached_ids: int = 100000):
+        self.pool = pool
+        self.cache = cache
+        self.max_cached_ids = max_cached_ids
+        # External session_id -> sessions.id; the mapping never changes once created
+        self._session_ids: "OrderedDict[str, Any]" = OrderedDict()
+    
+    async def summary(self, session_id: str, recent: int = settings.SESSION_SUMMARY_RECENT) -> Optional[Dict[str, Any]]:
+        row = await self.pool.fetchrow(_SESSION, session_id)
+        if row is None:
+            return None
+        self._remember(session_id, row["id"])
+        
+        count = row["sentiment_count"]
+        std = None
+        if count:
+            mean = row["sentiment_sum"] / count
+            std = math.sqrt(max(0.0, row["sentiment_sum_sq"] / count - mean * mean))
+        entries, _ = await self.page(row["id"], recent) if recent > 0 else ([], None)
+        return {
+            "session_id": row["session_id"],
+            "user_id": str(row["user_id"]) if row["user_id"] is not None else None,
+            "status": row["status"],
+            "start_time": row["start_time"],
+            "last_activity": row["last_activity"],
+            "message_count": row["message_count"],
+            "sentiment_count": count,
+            "avg_sentiment": row["avg_sentiment"],
+            "min_sentiment": row["min_sentiment"],
+            "max_sentiment": row["max_sentiment"],
+            "sentiment_stddev": std,
+            "drift_events_count": row["drift_events_count"],
+            "negative_drift_count": row["negative_drift_count"],
+            "positive_drift_count": row["positive_drift_count"],
+            "max_drift_magnitude": row["max_drift_magnitude"],
+            "recent_sentiment": entries,
+        }
+    
+    async def resolve(self, session_id: str) -> Optional[Any]:
+        """sessions.id for an external session_id"""
+        internal = self._session_ids.get(session_id)
+        if internal is not None:
+            self._session_ids.move_to_end(session_id)
+            return internal
+        internal = await self.pool.fetchval("SELECT id FROM sessions WHERE session_id = $1", session_id)
+        if internal is not None:
+            self._remember(session_id, internal)
+        return internal
+    
+    async def page(self, session_uuid: Any, limit: int,
+                   cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """(entries newest first, cursor for the next page or None)"""
+        if cursor is None and self.cache is not None and limit <= self.cache.size:
+            entries = await self.cache.recent(session_uuid, limit)
+            if entries is None:
+                # Read enough to refill the cache as well as answer this page
+                entries = await self._fetch(session_uuid, self.cache.size)
+                await self.cache.fill(session_uuid, entries)
+                entries = entries[:limit]
+        else:
+            before = decode_cursor(cursor) if cursor is not None else (None, None)
+            entries = await self._fetch(session_uuid, limit, *before)
+        
+        next_cursor = None
+        if len(entries) == limit and entries:
+            next_cursor = encode_cursor(entries[-1]["timestamp"], entries[-1]["id"])
+        return entries, next_cursor
+    
+    async def _fetch(self, session_uuid: Any, limit: int, before: Optional[datetime] = None,
+                     before_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+        rows = await self.pool.fetch(_PAGE, session_uuid, before, before_id, limit)
+        return [_entry(tuple(row)) for row in rows]
+    
+    def _remember(self, session_id: str, internal: Any) -> None:
+        self._session_ids[session_id] = internal
+        self._session_ids.move_to_end(session_id)
+        if len(self._session_ids) > self.max_cached_ids:
+            self._session_ids.popitem(last=False)
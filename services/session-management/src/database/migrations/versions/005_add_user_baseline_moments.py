@@ -0,0 +1,28 @@
+"""Add streaming sentiment baseline moments to users
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-01-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # users.sentiment_baseline holds the mean; these complete the running moments
+    # so drift detection can merge new scores without rereading history
+    op.add_column('users', sa.Column('sentiment_baseline_variance', sa.Float, nullable=True))
+    op.add_column('users', sa.Column('sentiment_baseline_count', sa.Integer,
+                                     nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'sentiment_baseline_count')
+    op.drop_column('users', 'sentiment_baseline_variance')
@@ -0,0 +1,151 @@
+"""Maintain session analytics incrementally on the sessions table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-01-06 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# Same definition as migration 004, restored on downgrade
+MATERIALIZED_VIEW = """
+    CREATE MATERIALIZED VIEW session_analytics AS
+    SELECT 
+        s.id as session_id,
+        s.user_id,
+        s.start_time,
+        s.end_time,
+        s.status,
+        COUNT(m.id) as message_count,
+        COUNT(CASE WHEN m.role = 'user' THEN 1 END) as user_message_count,
+        COUNT(CASE WHEN m.role = 'assistant' THEN 1 END) as assistant_message_count,
+        AVG(sent.overall_sentiment) as avg_sentiment,
+        MIN(sent.overall_sentiment) as min_sentiment,
+        MAX(sent.overall_sentiment) as max_sentiment,
+        STDDEV(sent.overall_sentiment) as sentiment_stddev,
+        COUNT(de.id) as drift_events_count,
+        COUNT(CASE WHEN de.drift_direction = 'negative' THEN 1 END) as negative_drift_count,
+        COUNT(CASE WHEN de.drift_direction = 'positive' THEN 1 END) as positive_drift_count,
+        MAX(de.drift_magnitude) as max_drift_magnitude
+    FROM sessions s
+    LEFT JOIN messages m ON s.id = m.session_id
+    LEFT JOIN sentiment_scores sent ON m.id = sent.message_id
+    LEFT JOIN drift_events de ON s.id = de.session_id
+    GROUP BY s.id, s.user_id, s.start_time, s.end_time, s.status;
+    
+    CREATE UNIQUE INDEX idx_session_analytics_session_id 
+    ON session_analytics (session_id);
+"""
+
+COUNTER_COLUMNS = [
+    'message_count',
+    'user_message_count',
+    'assistant_message_count',
+    'sentiment_count',
+    'negative_drift_count',
+    'positive_drift_count',
+]
+
+
+def upgrade() -> None:
+    # Running aggregates next to the columns added in 003 (avg/min/max_sentiment,
+    # drift_events_count); the write path adds each flush's deltas to them
+    for column in COUNTER_COLUMNS:
+        op.add_column('sessions', sa.Column(column, sa.Integer, nullable=False, server_default='0'))
+    op.add_column('sessions', sa.Column('sentiment_sum', sa.Float, nullable=False, server_default='0'))
+    op.add_column('sessions', sa.Column('sentiment_sum_sq', sa.Float, nullable=False, server_default='0'))
+    op.add_column('sessions', sa.Column('max_drift_magnitude', sa.Float, nullable=True))
+    op.alter_column('sessions', 'drift_events_count', server_default='0')
+    
+    # Backfill from the base tables; each table is aggregated on its own so
+    # drift events no longer multiply message and score counts
+    op.execute("""
+        UPDATE sessions s SET
+            message_count = COALESCE(m.message_count, 0),
+            user_message_count = COALESCE(m.user_message_count, 0),
+            assistant_message_count = COALESCE(m.assistant_message_count, 0),
+            sentiment_count = COALESCE(sc.sentiment_count, 0),
+            sentiment_sum = COALESCE(sc.sentiment_sum, 0),
+            sentiment_sum_sq = COALESCE(sc.sentiment_sum_sq, 0),
+            avg_sentiment = sc.avg_sentiment,
+            min_sentiment = sc.min_sentiment,
+            max_sentiment = sc.max_sentiment,
+            drift_events_count = COALESCE(de.drift_events_count, 0),
+            negative_drift_count = COALESCE(de.negative_drift_count, 0),
+            positive_drift_count = COALESCE(de.positive_drift_count, 0),
+            max_drift_magnitude = de.max_drift_magnitude
+        FROM sessions s2
+        LEFT JOIN (
+            SELECT session_id,
+                   COUNT(*) AS message_count,
+                   COUNT(*) FILTER (WHERE role = 'user') AS user_message_count,
+                   COUNT(*) FILTER (WHERE role = 'assistant') AS assistant_message_count
+            FROM messages GROUP BY session_id
+        ) m ON m.session_id = s2.id
+        LEFT JOIN (
+            SELECT session_id,
+                   COUNT(*) AS sentiment_count,
+                   SUM(overall_sentiment) AS sentiment_sum,
+                   SUM(overall_sentiment * overall_sentiment) AS sentiment_sum_sq,
+                   AVG(overall_sentiment) AS avg_sentiment,
+                   MIN(overall_sentiment) AS min_sentiment,
+                   MAX(overall_sentiment) AS max_sentiment
+            FROM sentiment_scores GROUP BY session_id
+        ) sc ON sc.session_id = s2.id
+        LEFT JOIN (
+            SELECT session_id,
+                   COUNT(*) AS drift_events_count,
+                   COUNT(*) FILTER (WHERE drift_direction = 'negative') AS negative_drift_count,
+                   COUNT(*) FILTER (WHERE drift_direction = 'positive') AS positive_drift_count,
+                   MAX(drift_magnitude) AS max_drift_magnitude
+            FROM drift_events GROUP BY session_id
+        ) de ON de.session_id = s2.id
+        WHERE s.id = s2.id
+    """)
+    
+    # Readers keep querying session_analytics; it is now a plain view over the
+    # maintained columns, so there is nothing to refresh
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS session_analytics")
+    op.execute("""
+        CREATE VIEW session_analytics AS
+        SELECT 
+            id as session_id,
+            user_id,
+            start_time,
+            end_time,
+            status,
+            message_count,
+            user_message_count,
+            assistant_message_count,
+            avg_sentiment,
+            min_sentiment,
+            max_sentiment,
+            CASE WHEN sentiment_count > 1 THEN
+                SQRT(GREATEST(sentiment_sum_sq - sentiment_sum * sentiment_sum / sentiment_count, 0)
+                     / (sentiment_count - 1))
+            END as sentiment_stddev,
+            drift_events_count,
+            negative_drift_count,
+            positive_drift_count,
+            max_drift_magnitude
+        FROM sessions
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS session_analytics")
+    op.execute(MATERIALIZED_VIEW)
+    
+    op.alter_column('sessions', 'drift_events_count', server_default=None)
+    op.drop_column('sessions', 'max_drift_magnitude')
+    op.drop_column('sessions', 'sentiment_sum_sq')
+    op.drop_column('sessions', 'sentiment_sum')
+    for column in reversed(COUNTER_COLUMNS):
+        op.drop_column('sessions', column)
@@ -0,0 +1,135 @@
+"""Range-partition sentiment_scores and drift_events on timestamp
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-01-07 12:00:00.000000
+
+"""
+from datetime import datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# Must match PARTITIONED_TABLES / partition_name in src/database/partitions.py,
+# which creates later partitions and applies retention
+INTERVALS = {'sentiment_scores': 'day', 'drift_events': 'month'}
+PREMAKE = 3
+
+FOREIGN_KEYS = {
+    'sentiment_scores': [
+        ('message_id', 'messages', 'CASCADE'),
+        ('session_id', 'sessions', 'CASCADE'),
+    ],
+    'drift_events': [
+        ('session_id', 'sessions', 'CASCADE'),
+        ('user_id', 'users', 'SET NULL'),
+        ('message_id', 'messages', 'SET NULL'),
+    ],
+}
+
+# Secondary indexes other than the time ones; session_id alone is covered by
+# the (session_id, timestamp) index
+INDEXES = {
+    'sentiment_scores': [
+        ('idx_sentiment_scores_session_timestamp', ['session_id', 'timestamp'], None),
+        ('idx_sentiment_scores_overall_sentiment', ['overall_sentiment'], None),
+        ('idx_sentiment_emotions_gin', ['emotions'], 'gin'),
+    ],
+    'drift_events': [
+        ('idx_drift_events_session_timestamp', ['session_id', 'timestamp'], None),
+        ('idx_drift_events_user_id', ['user_id'], None),
+        ('idx_drift_events_type', ['event_type'], None),
+        ('idx_drift_events_magnitude', ['drift_magnitude'], None),
+        ('idx_drift_events_direction', ['drift_direction'], None),
+    ],
+}
+
+
+def _partition_ranges(table, first, last):
+    interval = INTERVALS[table]
+    start = first if interval == 'day' else first.replace(day=1)
+    while start <= last:
+        if interval == 'day':
+            end = start + timedelta(days=1)
+            name = f"{table}_p{start:%Y%m%d}"
+        else:
+            end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            name = f"{table}_p{start:%Y%m}"
+        yield name, start, end
+        start = end
+
+
+def _create_secondary_indexes(table):
+    for name, columns, using in INDEXES[table]:
+        if using:
+            op.create_index(name, table, columns, postgresql_using=using)
+        else:
+            op.create_index(name, table, columns)
+
+
+def _add_foreign_keys(table):
+    for column, referent, on_delete in FOREIGN_KEYS[table]:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, referent, [column], ['id'], ondelete=on_delete)
+
+
+def upgrade() -> None:
+    # A partitioned table's unique keys must include the partition key, so
+    # drift_events can no longer be the target of a single-column foreign key
+    op.drop_constraint('response_adaptations_drift_event_id_fkey', 'response_adaptations', type_='foreignkey')
+    
+    bind = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+    
+    for table in INTERVALS:
+        legacy = f'{table}_unpartitioned'
+        op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        op.execute(f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")')
+        
+        # Cover the existing rows plus a few intervals ahead
+        oldest = bind.execute(sa.text(f'SELECT min("timestamp") FROM {legacy}')).scalar()
+        first = oldest.date() if oldest is not None else today
+        last = today
+        for _ in range(PREMAKE):
+            last = list(_partition_ranges(table, last, last))[0][2]
+        for name, start, end in _partition_ranges(table, first, last):
+            op.execute(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        
+        # Load before indexing; building indexes once is much cheaper than maintaining them per row
+        op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+        op.execute(f'DROP TABLE {legacy}')
+        
+        op.create_primary_key(f'{table}_pkey', table, ['id', 'timestamp'])
+        _add_foreign_keys(table)
+        _create_secondary_indexes(table)
+        # Rows arrive in time order, so a BRIN index answers time ranges at a
+        # fraction of a B-tree's size and write cost
+        op.create_index(f'idx_{table}_timestamp_brin', table, ['timestamp'], postgresql_using='brin')
+
+
+def downgrade() -> None:
+    for table in INTERVALS:
+        partitioned = f'{table}_partitioned'
+        op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+        op.execute(f'CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {partitioned}')
+        op.execute(f'DROP TABLE {partitioned} CASCADE')
+        
+        op.create_primary_key(f'{table}_pkey', table, ['id'])
+        _add_foreign_keys(table)
+        _create_secondary_indexes(table)
+        op.create_index(f'idx_{table}_session_id', table, ['session_id'])
+        op.create_index(f'idx_{table}_timestamp', table, ['timestamp'])
+    
+    op.create_foreign_key(
+        'response_adaptations_drift_event_id_fkey', 'response_adaptations', 'drift_events',
+        ['drift_event_id'], ['id'], ondelete='CASCADE'
+    )
@@ -0,0 +1,152 @@
+# services/session-management/src/database/partitions.py
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.utils.config import settings
+
+# Range-partitioned on "timestamp" by migration 007; scores arrive far faster
+# than drift events, so they get daily partitions
+PARTITIONED_TABLES: Dict[str, str] = {
+    "sentiment_scores": "day",
+    "drift_events": "month",
+}
+
+def partition_start(day: date, interval: str) -> date:
+    """First day of the partition containing ``day``"""
+    return day if interval == "day" else day.replace(day=1)
+
+def next_partition_start(start: date, interval: str) -> date:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def partition_name(table: str, start: date, interval: str) -> str:
+    return f"{table}_p{start:%Y%m%d}" if interval == "day" else f"{table}_p{start:%Y%m}"
+
+def parse_partition_start(table: str, name: str, interval: str) -> Optional[date]:
+    """Inverse of partition_name; None for partitions this module did not create"""
+    suffix = name[len(table) + 2:] if name.startswith(f"{table}_p") else ""
+    try:
+        if interval == "day":
+            return datetime.strptime(suffix, "%Y%m%d").date()
+        return datetime.strptime(suffix, "%Y%m").date()
+    except ValueError:
+        return None
+
+def partition_ranges(table: str, interval: str, first: date, last: date) -> List[Tuple[str, date, date]]:
+    """(name, from, to) for every partition overlapping [first, last]"""
+    ranges = []
+    start = partition_start(first, interval)
+    while start <= last:
+        end = next_partition_start(start, interval)
+        ranges.append((partition_name(table, start, interval), start, end))
+        start = end
+    return ranges
+
+def create_partition_sql(table: str, name: str, start: date, end: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+_LIST_PARTITIONS = """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = $1::regclass
+"""
+
+class PartitionManager:
+    """Creates time partitions ahead of time and drops expired ones.
+    
+    Partitions are created ``premake`` intervals ahead so writes never hit
+    a missing range (there is deliberately no DEFAULT partition: it would
+    have to be scanned every time a new partition is attached). Retention
+    detaches and drops whole partitions instead of DELETEing rows, so old
+    data goes away without long row locks or table bloat.
+    """
+    
+    def __init__(self, tables: Optional[Dict[str, str]] = None,
+                 premake: int = settings.PARTITION_PREMAKE,
+                 retention_days: int = settings.PARTITION_RETENTION_DAYS):
+        self.tables = tables or PARTITIONED_TABLES
+        self.premake = premake
+        self.retention_days = retention_days  # 0 keeps everything
+    
+    async def existing(self, connection: Any, table: str) -> Dict[date, str]:
+        interval = self.tables[table]
+        partitions = {}
+        for record in await connection.fetch(_LIST_PARTITIONS, table):
+            start = parse_partition_start(table, record["relname"], interval)
+            if start is not None:
+                partitions[start] = record["relname"]
+        return partitions
+    
+    async def ensure(self, connection: Any, today: date) -> List[str]:
+        """Create the current partition and ``premake`` after it; returns the new names"""
+        created = []
+        for table, interval in self.tables.items():
+            existing = await self.existing(connection, table)
+            last = partition_start(today, interval)
+            for _ in range(self.premake):
+                last = next_partition_start(last, interval)
+            for name, start, end in partition_ranges(table, interval, today, last):
+                if start not in existing:
+                    await connection.execute(create_partition_sql(table, name, start, end))
+                    created.append(name)
+        return created
+    
+    async def apply_retention(self, connection: Any, today: date) -> List[str]:
+        """Drop partitions whose whole range is older than the retention period"""
+        if not self.retention_days:
+            return []
+        cutoff = today - timedelta(days=self.retention_days)
+        dropped = []
+        for table, interval in self.tables.items():
+            for start, name in sorted((await self.existing(connection, table)).items()):
+                if next_partition_start(start, interval) > cutoff:
+                    break
+                # Detach first so the parent's lock is brief, then drop the standalone table
+                await connection.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                await connection.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+        return dropped
+    
+    async def run(self, connection: Any, today: Optional[date] = None) -> Dict[str, List[str]]:
+        today = today or datetime.now(timezone.utc).date()
+        return {
+            "created": await self.ensure(connection, today),
+            "dropped": await self.apply_retention(connection, today)
+        }
+
+async def maintain_partitions_periodically(pool: Any, manager: PartitionManager,
+                                           interval_seconds: float, history_cache: Any = None) -> None:
+    """Background job: run partition maintenance now and then every ``interval_seconds``"""
+    while True:
+        try:
+            async with pool.acquire() as connection:
+                result = await manager.run(connection)
+            if result["created"] or result["dropped"]:
+                print(f"Partition maintenance: created {result['created']}, dropped {result['dropped']}")
+            if result["dropped"] and history_cache is not None:
+                # Dropped scores may still be in cached sets
+                await history_cache.clear()
+        except Exception as e:
+            print(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+if __name__ == "__main__":
+    # One-off run, e.g. from a CronJob: python -m src.database.partitions
+    from .connection import Database
+    
+    async def main():
+        db = Database(min_size=1, max_size=1)
+        await db.connect()
+        try:
+            async with db.acquire() as connection:
+                print(await PartitionManager().run(connection))
+        finally:
+            await db.close()
+    
+    asyncio.run(main())
@@ -1 +1,79 @@
+# services/session-management/src/main.py
+from fastapi import FastAPI
+from .api.routes import history, router
+from .consumer import build_writer
+from .database.aggregates import SessionAggregator, reconcile_periodically
+from .database.connection import Database, WriteBehindBuffer
+from .database.history import HotHistoryCache
+from .database.partitions import PartitionManager, maintain_partitions_periodically
+from shared.utils.config import settings
+from shared.utils.messaging import create_client
+from shared.utils.metrics import instrument_app, register_counter, register_gauge
+from datetime import datetime, timedelta, timezone
+import asyncio
+import uvicorn
 
+app = FastAPI(
+    title="Session Management Service",
+    description="Sessions, messages and sentiment history storage",
+    version="1.0.0"
+)
+
+app.include_router(router, prefix="/api/v1")
+instrument_app(app, "session-management")
+
+db = Database()
+
+@app.on_event("startup")
+async def startup():
+    pool = await db.connect()
+    # Make sure today's partitions exist before the first write lands
+    manager = PartitionManager()
+    async with pool.acquire() as connection:
+        await manager.ensure(connection, datetime.now(timezone.utc).date())
+    aggregator = SessionAggregator()
+    history.pool = pool
+    # Cached sets are served as complete, which holds only while the buffer (fed
+    # by the stream writer below) is the only writer of scores
+    if settings.SESSION_HISTORY_CACHE_ENABLED and settings.STREAMS_ENABLED:
+        history.cache = HotHistoryCache(create_client())
+        for stat, label in (("hits", "hit"), ("misses", "miss")):
+            register_counter("session_history_cache_requests", "Hot history lookups",
+                             lambda stat=stat: history.cache.stats[stat], {"result": label})
+    app.state.partition_maintenance = asyncio.create_task(maintain_partitions_periodically(
+        pool, manager, interval_seconds=settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+        history_cache=history.cache
+    ))
+    app.state.write_buffer = WriteBehindBuffer(pool, aggregator=aggregator, history_cache=history.cache)
+    app.state.write_buffer.start()
+    register_gauge("write_buffer_pending", "Rows buffered or in flight to Postgres",
+                   lambda: len(app.state.write_buffer))
+    register_counter("write_buffer_rows_written", "Rows copied to Postgres",
+                     lambda: app.state.write_buffer.stats["rows_written"])
+    # Published scores and drift events reach Postgres through the buffer
+    app.state.stream_writer = None
+    if settings.STREAMS_ENABLED:
+        app.state.stream_writer = build_writer(app.state.write_buffer, pool)
+        app.state.stream_writer_task = asyncio.create_task(app.state.stream_writer.run())
+    app.state.reconciler = asyncio.create_task(reconcile_periodically(
+        pool, aggregator,
+        interval_seconds=settings.SESSION_RECONCILE_INTERVAL_SECONDS,
+        window=timedelta(hours=settings.SESSION_RECONCILE_WINDOW_HOURS)
+    ))
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.reconciler.cancel()
+    app.state.partition_maintenance.cancel()
+    if app.state.stream_writer is not None:
+        # Finish the batch in hand; anything unacknowledged is redelivered
+        app.state.stream_writer.stop()
+        await app.state.stream_writer_task
+    # Flush buffered rows before the pool goes away
+    await app.state.write_buffer.close()
+    if history.cache is not None:
+        await history.cache.client.aclose()
+    await db.close()
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8003)
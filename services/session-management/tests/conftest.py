@@ -0,0 +1,218 @@
+# services/session-management/tests/conftest.py
+import sys
+from pathlib import Path
+
+import asyncpg
+import pytest
+
+# Services import shared config/models from the repository root
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.staged = {}
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.pool.fail_next:
+            self.pool.fail_next -= 1
+            raise ConnectionError("connection reset")
+        if table.startswith("_staging_"):
+            self.staged[table[len("_staging_"):]] = (list(columns), list(records))
+            return
+        self.pool.store(table, columns, records)
+        if self.pool.lose_ack:
+            self.pool.lose_ack -= 1
+            raise ConnectionError("connection lost after commit")
+
+    async def execute(self, query, *args):
+        self.pool.statements.append((query, args))
+        return "UPDATE 0"
+
+    async def fetch(self, query, *args):
+        # INSERT INTO <table> (...) SELECT ... FROM _staging_<table> ON CONFLICT DO NOTHING RETURNING id
+        table = query.split()[2]
+        columns, records = self.staged.pop(table)
+        existing = {row[0] for row in self.pool.rows(table)}
+        new = []
+        for row in records:
+            if row[0] not in existing:
+                existing.add(row[0])
+                new.append(row)
+        self.pool.store(table, columns, new)
+        return [{"id": row[0]} for row in new]
+
+class FakePool:
+    """Records COPY calls instead of talking to Postgres"""
+
+    def __init__(self):
+        self.copies = []
+        self.statements = []
+        self.sessions = {}  # session_id -> (id, user_id), for the stream writer's upsert
+        self.fail_next = 0
+        self.lose_ack = 0  # Commit the next COPY but report it as failed
+        self.reject = None  # Row predicate raising a constraint violation, checked before storing
+
+    def acquire(self):
+        return FakeConnection(self)
+
+    async def fetch(self, query, *args):
+        # The stream writer's session upsert: unnest(ids, session_ids, user_ids, seen)
+        self.statements.append((query, args))
+        ids, session_ids, user_ids, _ = args
+        for new_id, session_id, user_id in zip(ids, session_ids, user_ids):
+            current_id, current_user = self.sessions.get(session_id, (new_id, None))
+            self.sessions[session_id] = (current_id, current_user or user_id)
+        return [{"id": self.sessions[s][0], "session_id": s, "user_id": self.sessions[s][1]} for s in session_ids]
+
+    def store(self, table, columns, records):
+        records = list(records)
+        if self.reject is not None and any(self.reject(row) for row in records):
+            raise asyncpg.ForeignKeyViolationError("violates foreign key constraint")
+        existing = {row[0] for row in self.rows(table)}
+        if any(row[0] in existing for row in records):
+            raise asyncpg.UniqueViolationError("duplicate key value violates unique constraint")
+        self.copies.append((table, list(columns), records))
+
+    def rows(self, table):
+        return [row for name, _, records in self.copies if name == table for row in records]
+
+@pytest.fixture
+def fake_pool():
+    return FakePool()
+
+class FakeRedis:
+    """The sorted-set subset of redis.asyncio the hot history cache uses"""
+
+    def __init__(self):
+        self.zsets = {}
+        self.ttls = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("redis unavailable")
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def zadd(self, key, mapping):
+        self._check()
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zremrangebyrank(self, key, start, stop):
+        self._check()
+        ordered = self._ordered(key)
+        stop = len(ordered) + stop if stop < 0 else stop
+        for member in ordered[start:stop + 1]:
+            del self.zsets[key][member]
+
+    async def zrevrange(self, key, start, stop):
+        self._check()
+        return list(reversed(self._ordered(key)))[start:stop + 1]
+
+    async def expire(self, key, seconds):
+        self._check()
+        if key in self.zsets:
+            self.ttls[key] = seconds
+
+    async def delete(self, *keys):
+        self._check()
+        for key in keys:
+            self.zsets.pop(key, None)
+
+    async def scan_iter(self, match=None, count=None):
+        self._check()
+        for key in list(self.zsets):
+            if match is None or key.startswith(match.rstrip("*")):
+                yield key
+
+    def _ordered(self, key):
+        zset = self.zsets.get(key, {})
+        return sorted(zset, key=lambda member: (zset[member], member))
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.calls.append((getattr(self.client, name), args))
+        return queue
+
+    async def execute(self):
+        return [await method(*args) for method, args in self.calls]
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+class FakeStreams:
+    """The Redis Streams subset StreamProducer and StreamConsumer use, for one consumer group"""
+
+    def __init__(self):
+        self.streams = {}  # name -> [(id, fields)]
+        self.delivered = {}  # name -> entries handed out with ">"
+        self.pending = {}  # (name, id) -> consumer
+
+    async def xadd(self, name, fields, **kwargs):
+        entries = self.streams.setdefault(name, [])
+        message_id = f"{len(entries) + 1}-0"
+        entries.append((message_id, fields))
+        return message_id
+
+    async def xgroup_create(self, name, group, id="0", mkstream=False):
+        self.streams.setdefault(name, [])
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        response = []
+        for name, start in streams.items():
+            entries = self.streams.get(name, [])
+            if start == ">":
+                offset = self.delivered.get(name, 0)
+                batch = entries[offset:offset + count]
+                self.delivered[name] = offset + len(batch)
+                for message_id, _ in batch:
+                    self.pending[(name, message_id)] = consumer
+            else:
+                batch = [(message_id, fields) for message_id, fields in entries
+                         if self.pending.get((name, message_id)) == consumer][:count]
+            if batch:
+                response.append([name, batch])
+        return response
+
+    async def xack(self, name, group, *ids):
+        for message_id in ids:
+            self.pending.pop((name, message_id), None)
+
+    def pipeline(self, transaction=True):
+        return FakeStreamPipeline(self)
+
+class FakeStreamPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.client, name), args, kwargs))
+        return queue
+
+    async def execute(self):
+        return [await method(*args, **kwargs) for method, args, kwargs in self.calls]
+
+@pytest.fixture
+def fake_streams():
+    return FakeStreams()
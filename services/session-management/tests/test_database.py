@@ -0,0 +1,276 @@
+# services/session-management/tests/test_database.py
+import asyncio
+import os
+import uuid
+from datetime import date, datetime, timezone
+
+import asyncpg
+import pytest
+
+from src.database.aggregates import SessionAggregator
+from src.database.connection import TABLE_COLUMNS, WriteBehindBuffer
+from src.database.partitions import PartitionManager, partition_ranges
+
+def score_row(session_id, value):
+    return {
+        "message_id": uuid.uuid4(),
+        "session_id": session_id,
+        "overall_sentiment": value,
+        "confidence": 0.9,
+        "emotions": {"joy": 0.1},
+        "model_version": "ensemble_v1.0",
+        "timestamp": datetime.now(timezone.utc)
+    }
+
+def test_buffer_flushes_when_max_rows_reached(fake_pool):
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=10, flush_interval_ms=60000, max_pending=100)
+        buffer.start()
+        session_id = uuid.uuid4()
+        for i in range(25):
+            await buffer.add("sentiment_scores", score_row(session_id, i / 25))
+        await asyncio.sleep(0.01)
+        assert len(fake_pool.rows("sentiment_scores")) >= 20
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    rows = fake_pool.rows("sentiment_scores")
+    assert len(rows) == 25 and len(buffer) == 0
+    columns = list(TABLE_COLUMNS["sentiment_scores"])
+    assert fake_pool.copies[0][1] == columns
+    # Order is preserved and generated columns are filled in
+    assert [row[columns.index("overall_sentiment")] for row in rows] == [i / 25 for i in range(25)]
+    assert all(row[columns.index("id")] is not None for row in rows)
+    assert all(row[columns.index("linguistic_features")] is None for row in rows)
+
+def test_buffer_flushes_parent_tables_first(fake_pool):
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100)
+        await buffer.add("drift_events", {"session_id": uuid.uuid4(), "drift_magnitude": 0.5})
+        await buffer.add("sentiment_scores", score_row(uuid.uuid4(), 0.1))
+        await buffer.add("messages", {"message_id": "m1", "content": "hi", "role": "user"})
+        assert await buffer.flush() == 3
+
+    asyncio.run(scenario())
+    assert [table for table, _, _ in fake_pool.copies] == ["messages", "sentiment_scores", "drift_events"]
+
+def test_failed_flush_keeps_rows_for_retry(fake_pool):
+    fake_pool.fail_next = 1
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100)
+        for i in range(3):
+            await buffer.add("sentiment_scores", score_row(uuid.uuid4(), i))
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        assert len(buffer) == 3
+        await buffer.add("sentiment_scores", score_row(uuid.uuid4(), 3))
+        assert await buffer.flush() == 4
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    values = [row[3] for row in fake_pool.rows("sentiment_scores")]
+    assert values == [0, 1, 2, 3]
+    assert buffer.stats["errors"] == 1
+
+def test_retry_after_a_lost_commit_acknowledgement_skips_written_rows(fake_pool):
+    fake_pool.lose_ack = 1
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100)
+        for i in range(3):
+            await buffer.add("sentiment_scores", score_row(uuid.uuid4(), i))
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        await buffer.add("sentiment_scores", score_row(uuid.uuid4(), 3))
+        assert await buffer.flush() == 1  # Only the new row
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert [row[3] for row in fake_pool.rows("sentiment_scores")] == [0, 1, 2, 3]
+    assert buffer.stats["duplicates_skipped"] == 3 and len(buffer) == 0
+
+def test_row_that_always_fails_is_dropped_after_max_attempts(fake_pool):
+    bad = uuid.uuid4()
+    fake_pool.reject = lambda row: row[2] == bad
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100, max_attempts=2)
+        for i in range(7):
+            await buffer.add("sentiment_scores", score_row(bad if i == 4 else uuid.uuid4(), i))
+        for _ in range(2):
+            with pytest.raises(asyncpg.ForeignKeyViolationError):
+                await buffer.flush()
+        assert await buffer.flush() == 6
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert sorted(row[3] for row in fake_pool.rows("sentiment_scores")) == [0, 1, 2, 3, 5, 6]
+    assert buffer.stats["dead_lettered"] == 1 and len(buffer) == 0
+
+def test_isolated_retry_passes_on_only_the_rows_it_inserted(fake_pool):
+    fake_pool.lose_ack = 1
+
+    class Recorder:
+        def __init__(self):
+            self.batches = []
+
+        async def apply(self, connection, batch):
+            self.batches.append(batch)
+
+        async def record(self, batch):
+            self.batches.append(batch)
+
+    aggregator, cache = Recorder(), Recorder()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100, max_attempts=1,
+                                   aggregator=aggregator, history_cache=cache)
+        for i in range(3):
+            await buffer.add("sentiment_scores", score_row(uuid.uuid4(), i))
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        await buffer.add("sentiment_scores", score_row(uuid.uuid4(), 3))
+        assert await buffer.flush() == 1
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert [row[3] for row in fake_pool.rows("sentiment_scores")] == [0, 1, 2, 3]
+    assert buffer.stats["rows_written"] == 1 and buffer.stats["duplicates_skipped"] == 3
+    # The rows of the lost commit are never aggregated or cached a second time
+    assert [[row[3] for row in batch["sentiment_scores"]] for batch in aggregator.batches] == [[3]]
+    assert [[row[3] for row in batch["sentiment_scores"]] for batch in cache.batches] == [[3]]
+
+def test_close_keeps_retrying_until_bad_rows_are_isolated(fake_pool):
+    bad = uuid.uuid4()
+    fake_pool.reject = lambda row: row[2] == bad
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100, flush_interval_ms=1, max_attempts=2)
+        await buffer.add("sentiment_scores", score_row(bad, 0))
+        await buffer.add("sentiment_scores", score_row(uuid.uuid4(), 1))
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert [row[3] for row in fake_pool.rows("sentiment_scores")] == [1]
+    assert len(buffer) == 0
+
+def test_add_waits_for_drain_when_buffer_is_full(fake_pool):
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=5, flush_interval_ms=60000, max_pending=5)
+        buffer.start()
+        for i in range(50):
+            await buffer.add("sentiment_scores", score_row(uuid.uuid4(), i))
+            assert len(buffer) <= 5
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert len(fake_pool.rows("sentiment_scores")) == 50
+    assert buffer.stats["backpressure_waits"] > 0
+
+def test_aggregator_folds_batch_into_per_session_deltas(fake_pool):
+    first, second = uuid.uuid4(), uuid.uuid4()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100, aggregator=SessionAggregator())
+        await buffer.add("messages", {"session_id": first, "role": "user"})
+        await buffer.add("messages", {"session_id": first, "role": "assistant"})
+        for value in [0.5, -0.25, 0.1]:
+            await buffer.add("sentiment_scores", score_row(first, value))
+        await buffer.add("sentiment_scores", score_row(second, -0.9))
+        await buffer.add("drift_events", {"session_id": second, "drift_direction": "negative",
+                                          "drift_magnitude": 0.6})
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    # One UPDATE for the whole flush, with one array element per session
+    assert len(fake_pool.statements) == 1
+    query, args = fake_pool.statements[0]
+    assert query.strip().startswith("UPDATE sessions")
+    rows = {session_id: values for session_id, *values in zip(*args)}
+    assert rows[first][:5] == [2, 1, 1, 3, pytest.approx(0.35)]
+    assert rows[first][5:8] == [pytest.approx(0.25 + 0.0625 + 0.01), -0.25, 0.5]
+    assert rows[first][8:] == [0, 0, 0, None]
+    assert rows[second] == [0, 0, 0, 1, -0.9, pytest.approx(0.81), -0.9, -0.9, 1, 1, 0, 0.6]
+
+def test_partition_ranges_cover_month_and_year_boundaries():
+    monthly = partition_ranges("drift_events", "month", date(2024, 11, 15), date(2025, 1, 1))
+    assert monthly == [
+        ("drift_events_p202411", date(2024, 11, 1), date(2024, 12, 1)),
+        ("drift_events_p202412", date(2024, 12, 1), date(2025, 1, 1)),
+        ("drift_events_p202501", date(2025, 1, 1), date(2025, 2, 1)),
+    ]
+    daily = partition_ranges("sentiment_scores", "day", date(2024, 2, 28), date(2024, 3, 1))
+    assert [name for name, _, _ in daily] == [
+        "sentiment_scores_p20240228", "sentiment_scores_p20240229", "sentiment_scores_p20240301"
+    ]
+
+class FakeCatalog:
+    """Answers the pg_inherits lookup from a dict of table -> partition names"""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+
+    async def fetch(self, query, table):
+        return [{"relname": name} for name in self.partitions[table]]
+
+    async def execute(self, query):
+        self.statements.append(query)
+
+def test_partition_manager_premakes_and_drops_expired_partitions():
+    catalog = FakeCatalog({
+        "sentiment_scores": ["sentiment_scores_p20240101", "sentiment_scores_p20240310"],
+        "drift_events": ["drift_events_p202312", "drift_events_p202401", "drift_events_p202403"],
+    })
+    manager = PartitionManager(premake=2, retention_days=60)
+
+    result = asyncio.run(manager.run(catalog, today=date(2024, 3, 10)))
+
+    assert result["created"] == [
+        "sentiment_scores_p20240311", "sentiment_scores_p20240312",
+        "drift_events_p202404", "drift_events_p202405",
+    ]
+    # Cutoff is 2024-01-10: only partitions entirely before it go
+    assert result["dropped"] == ["sentiment_scores_p20240101", "drift_events_p202312"]
+    assert "ALTER TABLE drift_events DETACH PARTITION drift_events_p202312" in catalog.statements
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="needs a migrated Postgres (TEST_DATABASE_URL)")
+def test_buffer_copies_into_postgres():
+    from src.database.connection import Database
+
+    async def scenario():
+        db = Database(os.environ["TEST_DATABASE_URL"], min_size=1, max_size=2)
+        pool = await db.connect()
+        try:
+            now = datetime.now(timezone.utc)
+            session_pk = uuid.uuid4()
+            await db.execute(
+                "INSERT INTO sessions (id, session_id, start_time, last_activity, status, created_at, updated_at) "
+                "VALUES ($1, $2, $3, $3, 'active', $3, $3)",
+                session_pk, f"test-{session_pk}", now
+            )
+            message_pk = uuid.uuid4()
+            buffer = WriteBehindBuffer(pool, max_rows=100)
+            await buffer.add("messages", {
+                "id": message_pk, "message_id": f"m-{message_pk}", "session_id": session_pk,
+                "content": "hello", "role": "user", "timestamp": now
+            })
+            row = score_row(session_pk, 0.25)
+            row["message_id"] = message_pk
+            await buffer.add("sentiment_scores", row)
+            await buffer.close()
+
+            stored = await db.fetchrow(
+                "SELECT overall_sentiment, emotions FROM sentiment_scores WHERE session_id = $1", session_pk
+            )
+            assert stored["overall_sentiment"] == 0.25
+            assert stored["emotions"] == {"joy": 0.1}
+            await db.execute("DELETE FROM sessions WHERE id = $1", session_pk)
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
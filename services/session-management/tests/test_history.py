@@ -0,0 +1,138 @@
+# services/session-management/tests/test_history.py
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.database.connection import TABLE_COLUMNS, WriteBehindBuffer
+from src.database.history import HotHistoryCache, SessionHistoryStore, decode_cursor, encode_cursor
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+def score(session_id, i, timestamp=None):
+    return {
+        "id": uuid.UUID(int=i + 1),
+        "message_id": uuid.uuid4(),
+        "session_id": session_id,
+        "overall_sentiment": round(i / 1000, 3),
+        "confidence": 0.9,
+        "emotions": {"joy": 0.1},
+        "timestamp": timestamp or START + timedelta(seconds=i),
+    }
+
+class HistoryPool:
+    """Answers the history queries from in-memory rows, like Postgres would"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetches = []
+
+    async def fetch(self, query, session_id, before, before_id, limit):
+        self.fetches.append((before, limit))
+        rows = sorted((r for r in self.rows if r["session_id"] == session_id),
+                      key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        if before is not None:
+            rows = [r for r in rows if (r["timestamp"], r["id"]) < (before, before_id)]
+        fields = ("id", "message_id", "timestamp", "overall_sentiment", "confidence", "emotions")
+        return [tuple(r[f] for f in fields) for r in rows[:limit]]
+
+def as_batch(rows):
+    columns = TABLE_COLUMNS["sentiment_scores"]
+    return {"sentiment_scores": [tuple(row.get(c) for c in columns) for row in rows]}
+
+def test_cursor_round_trip_and_rejects_garbage():
+    score_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(START, score_id)) == (START, score_id)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_keyset_pages_cover_history_once_including_timestamp_ties():
+    session_id = uuid.uuid4()
+    # Pairs of scores share a timestamp, so pages must break ties on id
+    rows = [score(session_id, i, START + timedelta(seconds=i // 2)) for i in range(25)]
+    store = SessionHistoryStore(HistoryPool(rows))
+
+    async def scenario():
+        seen, cursor = [], None
+        while True:
+            entries, cursor = await store.page(session_id, 7, cursor)
+            seen.extend(entries)
+            if cursor is None:
+                return seen
+
+    seen = asyncio.run(scenario())
+    assert [e["id"] for e in seen] == [str(uuid.UUID(int=i + 1)) for i in reversed(range(25))]
+
+def test_hot_cache_serves_only_after_fill_and_keeps_newest(fake_redis):
+    session_id = uuid.uuid4()
+    rows = [score(session_id, i) for i in range(30)]
+    pool = HistoryPool(rows[:20])
+    cache = HotHistoryCache(fake_redis, size=10, ttl_seconds=60)
+    store = SessionHistoryStore(pool, cache)
+
+    async def scenario():
+        # Recorded before any fill: the set exists but isn't known to be complete
+        await cache.record(as_batch(rows[15:20]))
+        assert await cache.recent(session_id, 5) is None
+
+        first, _ = await store.page(session_id, 5)  # Miss: reads Postgres and fills
+        pool.rows = rows
+        await cache.record(as_batch(rows[20:]))  # A later flush
+        second, cursor = await store.page(session_id, 10)
+        return first, second, cursor
+
+    first, second, cursor = asyncio.run(scenario())
+    assert [e["overall_sentiment"] for e in first] == [0.019, 0.018, 0.017, 0.016, 0.015]
+    assert [e["overall_sentiment"] for e in second] == [round(i / 1000, 3) for i in range(29, 19, -1)]
+    assert len(pool.fetches) == 1 and cache.stats["hits"] == 1
+    assert decode_cursor(cursor)[0] == START + timedelta(seconds=20)
+    assert len(fake_redis.zsets[cache.key(session_id)]) == 11  # 10 scores and the marker
+
+def test_invalidated_sessions_are_read_from_postgres_again(fake_redis):
+    session_id, other = uuid.uuid4(), uuid.uuid4()
+    pool = HistoryPool([score(session_id, i) for i in range(5)] + [score(other, i) for i in range(3)])
+    cache = HotHistoryCache(fake_redis, size=10)
+    store = SessionHistoryStore(pool, cache)
+
+    async def scenario():
+        await store.page(session_id, 5)
+        await store.page(other, 3)
+        # A score written around the buffer
+        pool.rows.append(score(session_id, 9))
+        await cache.invalidate([session_id])
+        entries, _ = await store.page(session_id, 5)
+        assert entries[0]["overall_sentiment"] == 0.009
+        assert await cache.recent(other, 3) is not None
+
+        assert await cache.clear() == 2
+        assert await cache.recent(other, 3) is None
+
+    asyncio.run(scenario())
+    assert len(pool.fetches) == 3
+
+def test_redis_failure_falls_back_to_postgres(fake_redis):
+    session_id = uuid.uuid4()
+    store = SessionHistoryStore(HistoryPool([score(session_id, i) for i in range(5)]),
+                                HotHistoryCache(fake_redis, size=10))
+    fake_redis.fail = True
+    entries, _ = asyncio.run(store.page(session_id, 3))
+    assert len(entries) == 3 and store.cache.stats["errors"] == 2
+
+def test_buffer_records_committed_scores(fake_pool, fake_redis):
+    session_id = uuid.uuid4()
+    cache = HotHistoryCache(fake_redis, size=10)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(fake_pool, max_rows=100, history_cache=cache)
+        for i in range(3):
+            await buffer.add("sentiment_scores", score(session_id, i))
+        fake_pool.fail_next = 1
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        assert cache.stats["recorded"] == 0  # Nothing cached until the rows commit
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert cache.stats["recorded"] == 3
+    assert len(fake_redis.zsets[cache.key(session_id)]) == 3
@@ -18,6 +18,9 @@ class Settings(BaseSettings):
     MODEL_CACHE_DIR: str = "./models"
     VADER_ENABLED: bool = True
     TRANSFORMER_MODEL: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+    TRANSFORMER_BACKEND: str = "torch"  # torch, onnx or onnx-int8
+    EMOTION_MODEL: str = "j-hartmann/emotion-english-distilroberta-base"
+    EMOTION_MODEL_ENABLED: bool = True
     
     # API
     API_V1_STR: str = "/api/v1"
@@ -27,6 +30,79 @@ class Settings(BaseSettings):
     # Performance  
     MAX_CONCURRENT_REQUESTS: int = 100
     SENTIMENT_ANALYSIS_TIMEOUT: int = 5
+    BATCH_SIZE: int = 32
+    BATCH_MAX_WAIT_MS: float = 5.0
+    MAX_BATCH_MESSAGES: int = 1000
+    INFERENCE_THREADS: int = 1
+    INFERENCE_PROCESSES: int = 0
+    WEB_WORKERS: int = 1  # Server processes per pod (python -m src.serve)
+    MODEL_PRELOAD: bool = True  # Build the models before forking so WEB_WORKERS share their memory
+    INTRA_OP_THREADS: int = 0  # Per worker; 0 splits the pod's CPUs across WEB_WORKERS
+    MAX_TEXT_LENGTH: int = 512  # Tokens per transformer window
+    LONG_TEXT_STRATEGY: str = "chunk"  # chunk (overlapping windows) or truncate
+    CHUNK_OVERLAP_TOKENS: int = 64
+    MAX_CHUNKS_PER_MESSAGE: int = 8
+    MAX_BATCH_TOKENS: int = 8192  # Padded tokens per forward pass; 0 pads the whole batch together
+    CASCADE_ENABLED: bool = False  # Skip the transformer when VADER alone is confident
+    CASCADE_VADER_THRESHOLD: float = 0.6  # Minimum |VADER compound| to exit early
+    CASCADE_MAX_WORDS: int = 12  # Longer messages always get the transformer
+    CASCADE_ALLOW_NEGATION: bool = False  # Negated phrasing is where VADER errs most
+    CASCADE_EMOTIONS_ON_EXIT: bool = False  # Run the emotion model on early exits too (they keep VADER's otherwise)
+    
+    # Caching
+    ENABLE_CACHING: bool = True
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_REDIS_ENABLED: bool = False
+    
+    # Database pool and write-behind buffer
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    WRITE_BUFFER_MAX_ROWS: int = 500
+    WRITE_BUFFER_FLUSH_INTERVAL_MS: float = 200.0
+    WRITE_BUFFER_MAX_PENDING: int = 10000
+    WRITE_BUFFER_MAX_ATTEMPTS: int = 3  # Failed flushes of a batch before it is split to isolate bad rows
+    SESSION_RECONCILE_INTERVAL_SECONDS: int = 900
+    SESSION_RECONCILE_WINDOW_HOURS: int = 24
+    PARTITION_PREMAKE: int = 3
+    PARTITION_RETENTION_DAYS: int = 365
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 3600
+    
+    # Session history reads
+    SESSION_HISTORY_CACHE_ENABLED: bool = True  # Newest scores of active sessions in Redis; needs STREAMS_ENABLED
+    SESSION_HISTORY_HOT_SIZE: int = 200  # Scores kept per session
+    SESSION_HISTORY_TTL_SECONDS: int = 3600  # Idle sessions drop out of the cache
+    SESSION_HISTORY_PAGE_SIZE: int = 50
+    SESSION_HISTORY_MAX_PAGE_SIZE: int = 500
+    SESSION_SUMMARY_RECENT: int = 10  # Latest scores included in a session summary
+    
+    # Drift worker (stream consumer)
+    DRIFT_USER_BASELINES: bool = True  # Seed new sessions from, and update, the users' stored baselines
+    DRIFT_BASELINE_FLUSH_INTERVAL_SECONDS: float = 30.0
+    DRIFT_SNAPSHOT_INTERVAL_SECONDS: float = 60.0  # Session state written to Redis for a replacement pod
+    DRIFT_SESSION_IDLE_SECONDS: float = 1800.0
+    
+    # Messaging (Redis Streams)
+    STREAMS_ENABLED: bool = False
+    STREAM_PARTITIONS: int = 16
+    STREAM_MAXLEN: int = 1000000
+    STREAM_BATCH_SIZE: int = 256
+    STREAM_BLOCK_MS: int = 1000
+    STREAM_MAX_DELIVERIES: int = 5
+    STREAM_CONSUMER_INDEX: int = -1  # -1: the pod's StatefulSet ordinal (see messaging.consumer_index)
+    STREAM_CONSUMER_COUNT: int = 1  # Partition owners; must match the drift worker's replicas
+    STREAM_CLAIM_IDLE_MS: int = 60000  # Entries pending this long with another consumer (e.g. a replaced pod) are taken over
+    STREAM_CLAIM_INTERVAL_SECONDS: float = 30.0
+    STREAM_PUBLISH_TIMEOUT_MS: float = 250.0  # Publishing gives up after this, so requests don't wait on Redis
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 1.0  # Per command; blocking stream reads get their block time on top
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 1.0
+    # Encoding of published sentiment scores; consumers read either, so switch
+    # to application/json only while consumers that predate the binary one run
+    STREAM_SCORE_CONTENT_TYPE: str = "application/vnd.sentiment-scores"
+    
+    # Monitoring
+    ENABLE_METRICS: bool = True
+    METRICS_PORT: int = 9090  # Standalone /metrics port for workers without an HTTP app
     
     class Config:
         env_file = ".env"
@@ -1 +1,333 @@
+# shared/utils/messaging.py
+import asyncio
+import json
+import os
+import re
+import socket
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import ResponseError
+except ImportError:  # Only services that publish or consume need redis
+    aioredis = None
+    ResponseError = Exception
+
+from .config import settings
+from .score_codec import CONTENT_TYPE as SCORES_CONTENT_TYPE, JSON_CONTENT_TYPE, decode_score_payloads, encode_scores
+
+# Stream names; each is split into STREAM_PARTITIONS physical streams "<name>:<n>"
+SENTIMENT_SCORES_STREAM = "sentiment.scores"
+DRIFT_EVENTS_STREAM = "drift.events"
+
+# Content type of an entry's "data" field -> (encode, decode) for one payload;
+# entries without a "ct" field are JSON
+PAYLOAD_CODECS = {
+    JSON_CONTENT_TYPE: (lambda payload: json.dumps(payload, default=str), json.loads),
+    SCORES_CONTENT_TYPE: (lambda score: encode_scores([score]), lambda data: decode_score_payloads(data)[0]),
+}
+
+def partition_for(key: str, partitions: int) -> int:
+    """Stable partition of a key (session_id); crc32 so every process agrees"""
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+def partition_stream(stream: str, partition: int) -> str:
+    return f"{stream}:{partition}"
+
+def assigned_partitions(consumer_index: int, consumer_count: int, partitions: int) -> List[int]:
+    """Partitions owned by one of ``consumer_count`` consumers (round robin)"""
+    return [p for p in range(partitions) if p % consumer_count == consumer_index]
+
+def consumer_index(consumer_count: int = settings.STREAM_CONSUMER_COUNT,
+                   configured: int = settings.STREAM_CONSUMER_INDEX,
+                   hostname: Optional[str] = None) -> int:
+    """This instance's index among ``consumer_count`` partition owners.
+    
+    STREAM_CONSUMER_INDEX when set, otherwise the ordinal a StatefulSet gives
+    its pods' hostnames ("drift-worker-2" -> 2). Replicas of a Deployment
+    have no ordinal and would all read the same partitions, so several
+    consumers without one is an error rather than a default.
+    """
+    if configured >= 0:
+        index = configured
+    elif consumer_count == 1:
+        index = 0
+    else:
+        hostname = hostname or os.getenv("HOSTNAME") or socket.gethostname()
+        match = re.search(r"-(\d+)$", hostname)
+        if match is None:
+            raise ValueError(f"Can't derive a stream consumer index from hostname {hostname!r}; "
+                             f"run consumers as a StatefulSet or set STREAM_CONSUMER_INDEX")
+        index = int(match.group(1))
+    if not 0 <= index < consumer_count:
+        raise ValueError(f"Stream consumer index {index} is outside 0..{consumer_count - 1}; "
+                         f"STREAM_CONSUMER_COUNT must match the number of replicas")
+    return index
+
+def create_client(url: str = settings.REDIS_URL,
+                  socket_timeout: float = settings.REDIS_SOCKET_TIMEOUT_SECONDS) -> Any:
+    """Async client whose commands fail after ``socket_timeout`` instead of hanging on a stalled server"""
+    if aioredis is None:
+        raise ImportError("The redis package is required for messaging")
+    return aioredis.Redis.from_url(url, socket_timeout=socket_timeout,
+                                   socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS)
+
+@dataclass
+class StreamMessage:
+    stream: str
+    id: str
+    key: str
+    payload: Dict[str, Any]
+
+class StreamProducer:
+    """Publishes payloads to the partition of their key.
+    
+    All messages for one key (session) land in the same partition stream, so
+    the single consumer owning that partition sees them in publish order.
+    Payloads are encoded as ``content_type`` (one of PAYLOAD_CODECS), which
+    consumers read back from each entry.
+    """
+    
+    def __init__(self, client: Any, stream: str, partitions: int = settings.STREAM_PARTITIONS,
+                 maxlen: Optional[int] = settings.STREAM_MAXLEN, content_type: str = JSON_CONTENT_TYPE):
+        self.client = client
+        self.stream = stream
+        self.partitions = partitions
+        self.maxlen = maxlen
+        self.content_type = content_type
+        self._encode = PAYLOAD_CODECS[content_type][0]
+    
+    async def publish(self, key: str, payload: Dict[str, Any]) -> str:
+        message_id = await self.client.xadd(
+            partition_stream(self.stream, partition_for(key, self.partitions)),
+            self._fields(key, payload),
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        return _decode(message_id)
+    
+    async def publish_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Publish (key, payload) pairs in one round trip, keeping their order per key"""
+        pipe = self.client.pipeline(transaction=False)
+        count = 0
+        for key, payload in items:
+            pipe.xadd(
+                partition_stream(self.stream, partition_for(key, self.partitions)),
+                self._fields(key, payload),
+                maxlen=self.maxlen,
+                approximate=True
+            )
+            count += 1
+        if not count:
+            return []
+        return [_decode(message_id) for message_id in await pipe.execute()]
+    
+    def _fields(self, key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.content_type == JSON_CONTENT_TYPE:
+            return {"key": key, "data": self._encode(payload)}
+        return {"key": key, "ct": self.content_type, "data": self._encode(payload)}
+
+class StreamConsumer:
+    """Consumer-group reader for the partitions assigned to this instance.
+    
+    Each partition stream is read by exactly one consumer, which keeps
+    per-key ordering while instances scale out by splitting partitions.
+    Batches come from one XREADGROUP across all assigned partitions and are
+    acknowledged after the handler succeeds (at-least-once). On startup and
+    after a failed batch the consumer re-reads its own pending entries
+    before taking new ones, so a failed message is retried ahead of later
+    messages for the same key. Once a batch has failed ``max_deliveries``
+    times its messages are retried one at a time, and only those that still
+    fail are moved to the dead-letter stream.
+    
+    Consumer names aren't stable (a replaced pod gets a new hostname), so on
+    startup and every ``claim_interval`` seconds the consumer takes over
+    entries of its partitions that another consumer has left pending for
+    ``claim_idle_ms`` (XAUTOCLAIM).
+    """
+    
+    def __init__(self, client: Any, stream: str, group: str, consumer: str,
+                 partitions: Optional[Sequence[int]] = None,
+                 batch_size: int = settings.STREAM_BATCH_SIZE,
+                 block_ms: int = settings.STREAM_BLOCK_MS,
+                 max_deliveries: int = settings.STREAM_MAX_DELIVERIES,
+                 claim_idle_ms: int = settings.STREAM_CLAIM_IDLE_MS,
+                 claim_interval: float = settings.STREAM_CLAIM_INTERVAL_SECONDS):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.partitions = list(partitions if partitions is not None else range(settings.STREAM_PARTITIONS))
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.max_deliveries = max_deliveries
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval = claim_interval
+        self.dead_letter_stream = f"{stream}:dead"
+        self.stats = {"batches": 0, "messages": 0, "failures": 0, "dead_lettered": 0, "claimed": 0}
+        
+        self._streams = [partition_stream(stream, p) for p in self.partitions]
+        self._attempts: Dict[str, int] = {}
+        self._recovering = True  # Drain our own pending entries first
+        self._running = False
+    
+    async def ensure_groups(self) -> None:
+        for name in self._streams:
+            try:
+                await self.client.xgroup_create(name, self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+    
+    async def claim_idle(self) -> int:
+        """Take over entries left pending for claim_idle_ms; returns how many were claimed"""
+        claimed = 0
+        for name in self._streams:
+            start = "0-0"
+            while True:
+                # JUSTID: ownership only; the entries are read (in order) by the next pending read
+                response = await self.client.xautoclaim(name, self.group, self.consumer, self.claim_idle_ms,
+                                                        start_id=start, count=self.batch_size, justid=True)
+                start = _decode(response[0])
+                claimed += len(response[1])
+                if start == "0-0":
+                    break
+        if claimed:
+            self._recovering = True
+            self.stats["claimed"] += claimed
+        return claimed
+    
+    async def read(self) -> List[StreamMessage]:
+        """Next batch: pending entries while recovering, otherwise new ones"""
+        start = "0" if self._recovering else ">"
+        response = await self.client.xreadgroup(
+            self.group, self.consumer,
+            {name: start for name in self._streams},
+            count=self.batch_size,
+            block=None if self._recovering else self.block_ms
+        )
+        messages = []
+        received = 0
+        for name, entries in response or []:
+            for message_id, fields in entries:
+                if fields is None:
+                    continue  # Trimmed away while pending; nothing left to process
+                received += 1
+                fields = {_decode(k): v for k, v in fields.items()}
+                try:
+                    decode = PAYLOAD_CODECS[_decode(fields.get("ct", JSON_CONTENT_TYPE))][1]
+                    payload = decode(fields["data"])
+                except Exception as e:
+                    # Redelivering won't make it decode; set it aside so the rest still flow
+                    await self._dead_letter_entry(_decode(name), _decode(message_id), fields, repr(e))
+                    continue
+                messages.append(StreamMessage(
+                    stream=_decode(name),
+                    id=_decode(message_id),
+                    key=_decode(fields.get("key", "")),
+                    payload=payload
+                ))
+        if self._recovering and not received:
+            self._recovering = False
+        return messages
+    
+    async def ack(self, messages: Sequence[StreamMessage]) -> None:
+        if not messages:
+            return
+        by_stream: Dict[str, List[str]] = {}
+        for message in messages:
+            by_stream.setdefault(message.stream, []).append(message.id)
+            self._attempts.pop(message.id, None)
+        pipe = self.client.pipeline(transaction=False)
+        for name, ids in by_stream.items():
+            pipe.xack(name, self.group, *ids)
+        await pipe.execute()
+    
+    async def dead_letter(self, message: StreamMessage, error: str) -> None:
+        await self.client.xadd(self.dead_letter_stream, {
+            "stream": message.stream,
+            "id": message.id,
+            "key": message.key,
+            "data": json.dumps(message.payload, default=str),
+            "error": error
+        })
+        await self.ack([message])
+        self.stats["dead_lettered"] += 1
+    
+    async def _dead_letter_entry(self, stream: str, message_id: str, fields: Dict[str, Any], error: str) -> None:
+        """Dead-letter an entry that couldn't be decoded, keeping its raw fields"""
+        raw = {name: fields[name] for name in ("key", "ct", "data") if name in fields}
+        await self.client.xadd(self.dead_letter_stream, {"stream": stream, "id": message_id, **raw, "error": error})
+        await self.client.xack(stream, self.group, message_id)
+        self.stats["dead_lettered"] += 1
+    
+    async def process(self, handler: Callable[[List[StreamMessage]], Awaitable[None]]) -> int:
+        """Read one batch and hand it to ``handler``; returns the number of messages handled"""
+        messages = await self.read()
+        if not messages:
+            return 0
+        try:
+            await handler(messages)
+        except Exception:
+            self.stats["failures"] += 1
+            self._recovering = True
+            exhausted = False
+            for message in messages:
+                attempts = self._attempts.get(message.id, 0) + 1
+                self._attempts[message.id] = attempts
+                exhausted = exhausted or attempts >= self.max_deliveries
+            if exhausted:
+                # Find the messages at fault instead of dead-lettering the whole batch
+                return await self._process_each(handler, messages)
+            return 0
+        
+        await self.ack(messages)
+        self.stats["batches"] += 1
+        self.stats["messages"] += len(messages)
+        return len(messages)
+    
+    async def _process_each(self, handler: Callable[[List[StreamMessage]], Awaitable[None]],
+                            messages: List[StreamMessage]) -> int:
+        handled = 0
+        for message in messages:
+            try:
+                await handler([message])
+            except Exception as e:
+                if self._attempts.get(message.id, 0) < self.max_deliveries:
+                    break  # Retry it, and everything after it, with the next pending read
+                await self.dead_letter(message, repr(e))
+                continue
+            await self.ack([message])
+            handled += 1
+        self.stats["messages"] += handled
+        return handled
+    
+    async def run(self, handler: Callable[[List[StreamMessage]], Awaitable[None]],
+                  retry_delay: float = 1.0) -> None:
+        """Consume until stop() is called"""
+        await self.ensure_groups()
+        self._running = True
+        next_claim = 0.0
+        while self._running:
+            failures = self.stats["failures"]
+            try:
+                if time.monotonic() >= next_claim:
+                    await self.claim_idle()
+                    next_claim = time.monotonic() + self.claim_interval
+                await self.process(handler)
+            except Exception as e:
+                # Redis errors (timeouts, failover); unacknowledged entries are re-read afterwards
+                print(f"Stream consumer error, retrying: {e!r}")
+                self.stats["failures"] += 1
+                self._recovering = True
+            if self.stats["failures"] != failures:
+                await asyncio.sleep(retry_delay)
+    
+    def stop(self) -> None:
+        self._running = False
+
+def _decode(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
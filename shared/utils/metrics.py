@@ -0,0 +1,166 @@
+# shared/utils/metrics.py
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Histogram,
+                                   generate_latest, start_http_server)
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # Metrics become no-ops without prometheus_client
+    CollectorRegistry = None
+
+from .config import settings
+
+# Request and stage latencies span sub-millisecond cache hits to multi-second batches
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ENABLED = settings.ENABLE_METRICS and CollectorRegistry is not None
+SERVICE = "unknown"
+
+class _CallbackCollector:
+    """Reads gauges and counters from callbacks at scrape time.
+
+    Queue depths and cache statistics already live on their objects, so
+    exporting them this way costs nothing on the request path.
+    """
+
+    def __init__(self):
+        self.callbacks: List[Tuple[str, str, str, Dict[str, str], Callable[[], float]]] = []
+
+    def collect(self):
+        families = {}
+        for name, kind, documentation, labels, fn in self.callbacks:
+            key = (name, kind)
+            if key not in families:
+                family_type = GaugeMetricFamily if kind == "gauge" else CounterMetricFamily
+                families[key] = family_type(name, documentation, labels=["service", *labels])
+            try:
+                value = float(fn())
+            except Exception:
+                continue  # A broken callback must not fail the whole scrape
+            families[key].add_metric([SERVICE, *labels.values()], value)
+        return list(families.values())
+
+if ENABLED:
+    REGISTRY = CollectorRegistry()
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds", "HTTP request latency",
+        ["service", "method", "route", "status"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+    )
+    STAGE_LATENCY = Histogram(
+        "stage_duration_seconds", "Latency of hot-path stages (tokenize, model_forward, db_flush, ...)",
+        ["service", "stage"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+    )
+    _callbacks = _CallbackCollector()
+    REGISTRY.register(_callbacks)
+else:
+    REGISTRY = None
+
+# Labelled children are cached: .labels() is the slowest part of an observation
+_stages: Dict[str, Any] = {}
+
+def init_metrics(service: str) -> None:
+    """Name the service every metric from this process is labelled with"""
+    global SERVICE
+    SERVICE = service
+    _stages.clear()
+
+def observe(stage: str, seconds: float) -> None:
+    if not ENABLED:
+        return
+    child = _stages.get(stage)
+    if child is None:
+        child = _stages[stage] = STAGE_LATENCY.labels(SERVICE, stage)
+    child.observe(seconds)
+
+class timed:
+    """``with timed("tokenize"):`` records the block's duration under that stage
+
+    A slotted class rather than a generator-based context manager: it is
+    entered on every batch, and this is several times cheaper.
+    """
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        observe(self.stage, time.perf_counter() - self.start)
+
+def register_gauge(name: str, documentation: str, fn: Callable[[], float],
+                   labels: Optional[Dict[str, str]] = None) -> None:
+    """Export ``fn()`` as a gauge, read at scrape time"""
+    if ENABLED:
+        _callbacks.callbacks.append((name, "gauge", documentation, labels or {}, fn))
+
+def register_counter(name: str, documentation: str, fn: Callable[[], float],
+                     labels: Optional[Dict[str, str]] = None) -> None:
+    """Export an existing monotonically increasing count (e.g. a stats dict entry)"""
+    if ENABLED:
+        _callbacks.callbacks.append((name, "counter", documentation, labels or {}, fn))
+
+def metrics_response() -> Tuple[bytes, str]:
+    """(body, content type) for a /metrics endpoint"""
+    if not ENABLED:
+        return b"", "text/plain; charset=utf-8"
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def instrument_app(app: Any, service: str) -> None:
+    """Add request latency middleware and a /metrics endpoint to a FastAPI app"""
+    from fastapi import Response
+
+    init_metrics(service)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        body, content_type = metrics_response()
+        return Response(content=body, media_type=content_type)
+
+    if ENABLED:
+        app.add_middleware(_RequestMetrics)
+
+class _RequestMetrics:
+    """ASGI middleware timing each HTTP request.
+
+    Plain ASGI instead of @app.middleware("http"), which wraps every
+    request in extra tasks and streams and costs far more than the timing.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._children: Dict[Tuple[str, str, int], Any] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router leaves the matched route in scope; its template, not the
+            # raw path, keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            key = (scope["method"], route, status)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = REQUEST_LATENCY.labels(SERVICE, scope["method"], route, str(status))
+            child.observe(time.perf_counter() - start)
+
+def start_metrics_server(service: str, port: int = settings.METRICS_PORT) -> None:
+    """Serve /metrics on its own port, for workers without an HTTP app"""
+    init_metrics(service)
+    if ENABLED:
+        start_http_server(port, registry=REGISTRY)
@@ -0,0 +1,39 @@
+# shared/utils/responses.py
+"""JSON responses rendered with orjson.
+
+Handlers that already hold native values (or prebuilt Pydantic models)
+return ``FastJSONResponse(content)`` directly, which skips FastAPI's
+response_model re-validation and jsonable_encoder pass; routers use it
+as their default response class for everything else. NumPy scalars and
+arrays serialize natively. Without orjson installed it falls back to the
+standard encoder.
+"""
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Slower, but the responses are the same
+    orjson = None
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    if orjson is None:
+        # What JSONResponse.render does after FastAPI's own encoding
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,267 @@
+# shared/utils/score_codec.py
+"""Compact binary encoding of sentiment scores.
+
+A batch is a header, one fixed-width little-endian record per score and
+the scores' strings. Records hold the timestamp (int64 µs since the
+epoch, UTC) and float32 values for the sentiment, confidence, processing
+time and every EmotionType and known linguistic feature, in the fixed
+order below; NaN marks a value the score doesn't have. Emotions and
+features outside those orders go into an optional JSON trailer, so any
+score round-trips, with floats rounded to float32 (about 7 digits).
+Scores with a user_id add a block of user ids after everything else,
+which decoders that predate it never read.
+
+Decoding either builds the usual score dicts (struct, no NumPy needed) or
+views a whole batch as NumPy columns without touching each score.
+"""
+import json
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Only columnar decoding needs numpy
+    np = None
+
+from ..models.sentiment_models import EmotionType
+
+CONTENT_TYPE = "application/vnd.sentiment-scores"
+JSON_CONTENT_TYPE = "application/json"
+VERSION = 1
+
+EMOTIONS = tuple(emotion.value for emotion in EmotionType)
+LINGUISTIC_FEATURES = (
+    "word_count", "sentence_count", "avg_sentence_length", "exclamation_count", "question_count",
+    "caps_ratio", "first_person_ratio", "negation_count", "absolutist_ratio"
+)
+# Counts go back out as ints, as the feature extractor produced them
+INTEGER_FEATURES = frozenset(("word_count", "sentence_count", "exclamation_count", "question_count",
+                              "negation_count"))
+
+_HEADER = struct.Struct("<2sBBI")  # magic, version, flags, count
+_MAGIC = b"SC"
+_NAIVE = 1  # Timestamps were naive UTC (datetime.utcnow()) and decode as such
+_EXTRAS = 2  # A JSON trailer of values outside the fixed orders follows the strings
+_USERS = 4  # A user id per score (empty for none) follows the trailer
+
+_RECORD = struct.Struct(f"<q3f{len(EMOTIONS)}f{len(LINGUISTIC_FEATURES)}f")
+_STRINGS = struct.Struct("<HHH")  # Lengths of session_id, message_id, model_version
+_LENGTH = struct.Struct("<I")
+_USER = struct.Struct("<H")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_NAN = float("nan")
+_NANS = repeat(_NAN)
+_EMOTION_SET = frozenset(EMOTIONS)
+_FEATURE_SET = frozenset(LINGUISTIC_FEATURES)
+_INTEGER_ORDER = tuple(feature for feature in LINGUISTIC_FEATURES if feature in INTEGER_FEATURES)
+
+def accepts(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for the binary encoding"""
+    return bool(accept) and CONTENT_TYPE in accept
+
+def encode_scores(scores: Sequence[Any]) -> bytes:
+    """Encode score models or dicts (as from model_dump, either mode) into one batch"""
+    records, strings, extras, user_ids = [], [], {}, []
+    naive = True
+    pack_record, pack_strings = _RECORD.pack, _STRINGS.pack
+    for index, score in enumerate(scores):
+        # A model's field values live in its __dict__
+        get = (score if isinstance(score, dict) else score.__dict__).get
+        timestamp = get("timestamp")
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is None:
+            delta = timestamp - _NAIVE_EPOCH
+        else:
+            delta = timestamp - _EPOCH
+            naive = False
+
+        emotions = get("emotions") or {}
+        features = get("linguistic_features") or {}
+        processing_time = get("processing_time_ms")
+        records.append(pack_record(
+            (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds,
+            get("overall_sentiment"),
+            get("confidence"),
+            _NAN if processing_time is None else processing_time,
+            *map(emotions.get, EMOTIONS, _NANS),
+            *map(features.get, LINGUISTIC_FEATURES, _NANS)
+        ))
+
+        session_id = get("session_id").encode("utf-8")
+        message_id = get("message_id").encode("utf-8")
+        model_version = get("model_version").encode("utf-8")
+        strings.append(pack_strings(len(session_id), len(message_id), len(model_version)))
+        strings.append(session_id + message_id + model_version)
+
+        if not (emotions.keys() <= _EMOTION_SET and features.keys() <= _FEATURE_SET):
+            extras[index] = _extras(emotions, EMOTIONS), _extras(features, LINGUISTIC_FEATURES)
+        user_ids.append(get("user_id"))
+
+    users = any(user_ids)
+    flags = (_NAIVE if naive else 0) | (_EXTRAS if extras else 0) | (_USERS if users else 0)
+    parts = [_HEADER.pack(_MAGIC, VERSION, flags, len(records)), *records, *strings]
+    if extras:
+        trailer = json.dumps(extras, default=str).encode("utf-8")
+        parts += [_LENGTH.pack(len(trailer)), trailer]
+    if users:
+        for user_id in user_ids:
+            encoded = (user_id or "").encode("utf-8")
+            parts += [_USER.pack(len(encoded)), encoded]
+    return b"".join(parts)
+
+def decode_scores(data: bytes) -> List[Dict[str, Any]]:
+    """Score dicts shaped like model_dump(): datetimes, plain floats and ints"""
+    return _decode(data, iso_timestamps=False)
+
+def decode_score_payloads(data: bytes) -> List[Dict[str, Any]]:
+    """Score dicts shaped like model_dump(mode="json"), as JSON stream payloads are"""
+    return _decode(data, iso_timestamps=True)
+
+@dataclass
+class ScoreColumns:
+    """A decoded batch as NumPy columns, one row per score"""
+    session_ids: List[str]
+    message_ids: List[str]
+    model_versions: List[str]
+    timestamps_us: Any  # int64
+    overall_sentiment: Any  # float32
+    confidence: Any  # float32
+    processing_time_ms: Any  # float32, NaN when absent
+    emotions: Any  # float32 (n, len(EMOTIONS)), NaN when absent
+    linguistic_features: Any  # float32 (n, len(LINGUISTIC_FEATURES)), NaN when absent
+    user_ids: List[Optional[str]]
+
+    def __len__(self) -> int:
+        return len(self.session_ids)
+
+def decode_columns(data: bytes) -> ScoreColumns:
+    """View a batch as columns; the numeric ones share memory with ``data``"""
+    if np is None:
+        raise ImportError("numpy is required for columnar decoding")
+    flags, count = _header(data)
+    records = np.frombuffer(data, dtype=_record_dtype(), count=count, offset=_HEADER.size)
+    strings, offset = _strings(data, count)
+    session_ids, message_ids, model_versions = zip(*strings) if strings else ((), (), ())
+    return ScoreColumns(
+        session_ids=list(session_ids),
+        message_ids=list(message_ids),
+        model_versions=list(model_versions),
+        timestamps_us=records["timestamp"],
+        overall_sentiment=records["overall_sentiment"],
+        confidence=records["confidence"],
+        processing_time_ms=records["processing_time_ms"],
+        emotions=records["emotions"],
+        linguistic_features=records["linguistic_features"],
+        user_ids=_user_ids(data, _skip_extras(data, offset, flags), flags, count)
+    )
+
+def _extras(values: Dict[str, Any], known: Sequence[str]) -> Dict[str, Any]:
+    return {key: value for key, value in values.items() if key not in known}
+
+def _header(data: bytes):
+    magic, version, flags, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} sentiment score batch")
+    return flags, count
+
+def _strings(data: bytes, count: int):
+    """(session_id, message_id, model_version) per score, and the offset after them"""
+    offset = _HEADER.size + _RECORD.size * count
+    strings = []
+    for _ in range(count):
+        session_end, message_end, version_end = _STRINGS.unpack_from(data, offset)
+        offset += _STRINGS.size
+        message_end += session_end
+        version_end += message_end
+        strings.append((
+            data[offset:offset + session_end].decode("utf-8"),
+            data[offset + session_end:offset + message_end].decode("utf-8"),
+            data[offset + message_end:offset + version_end].decode("utf-8")
+        ))
+        offset += version_end
+    return strings, offset
+
+def _decode(data: bytes, iso_timestamps: bool) -> List[Dict[str, Any]]:
+    flags, count = _header(data)
+    aware = not flags & _NAIVE
+    emotions_end = 4 + len(EMOTIONS)
+    strings, offset = _strings(data, count)
+    records = _RECORD.iter_unpack(memoryview(data)[_HEADER.size:_HEADER.size + _RECORD.size * count])
+
+    scores = []
+    for values, (session_id, message_id, model_version) in zip(records, strings):
+        delta = timedelta(microseconds=values[0])
+        timestamp = _EPOCH + delta if aware else _NAIVE_EPOCH + delta
+        emotions = dict(zip(EMOTIONS, values[4:emotions_end]))
+        features = dict(zip(LINGUISTIC_FEATURES, values[emotions_end:]))
+        if _has_nan(emotions):
+            emotions = {key: value for key, value in emotions.items() if value == value}
+        if _has_nan(features):
+            features = {key: value for key, value in features.items() if value == value}
+        for feature in _INTEGER_ORDER:
+            value = features.get(feature)
+            if value is not None:
+                features[feature] = int(value)
+        score = {
+            "session_id": session_id,
+            "message_id": message_id,
+            "timestamp": timestamp.isoformat() if iso_timestamps else timestamp,
+            "overall_sentiment": values[1],
+            "confidence": values[2],
+            "emotions": emotions,
+            "linguistic_features": features,
+            "model_version": model_version
+        }
+        if values[3] == values[3]:
+            score["processing_time_ms"] = values[3]
+        scores.append(score)
+
+    if flags & _EXTRAS:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        start = offset + _LENGTH.size
+        for index, (emotions, features) in json.loads(data[start:start + length]).items():
+            scores[int(index)]["emotions"].update(emotions)
+            scores[int(index)]["linguistic_features"].update(features)
+    if flags & _USERS:
+        for score, user_id in zip(scores, _user_ids(data, _skip_extras(data, offset, flags), flags, count)):
+            if user_id is not None:
+                score["user_id"] = user_id
+    return scores
+
+def _skip_extras(data: bytes, offset: int, flags: int) -> int:
+    """Offset after the JSON trailer, if there is one"""
+    if not flags & _EXTRAS:
+        return offset
+    (length,) = _LENGTH.unpack_from(data, offset)
+    return offset + _LENGTH.size + length
+
+def _user_ids(data: bytes, offset: int, flags: int, count: int) -> List[Optional[str]]:
+    if not flags & _USERS:
+        return [None] * count
+    user_ids = []
+    for _ in range(count):
+        (length,) = _USER.unpack_from(data, offset)
+        offset += _USER.size
+        user_ids.append(data[offset:offset + length].decode("utf-8") or None)
+        offset += length
+    return user_ids
+
+def _has_nan(values: Dict[str, float]) -> bool:
+    # NaN propagates through the sum, so one check covers every value
+    total = sum(values.values())
+    return total != total
+
+def _record_dtype():
+    return np.dtype([
+        ("timestamp", "<i8"),
+        ("overall_sentiment", "<f4"),
+        ("confidence", "<f4"),
+        ("processing_time_ms", "<f4"),
+        ("emotions", "<f4", (len(EMOTIONS),)),
+        ("linguistic_features", "<f4", (len(LINGUISTIC_FEATURES),)),
+    ])
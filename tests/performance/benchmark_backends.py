@@ -0,0 +1,124 @@
+# tests/performance/benchmark_backends.py
+"""Accuracy, latency and memory of the fp32 PyTorch, ONNX and int8 ONNX backends.
+
+Each backend runs in a fresh process so peak RSS is its own. Accuracy is
+measured on a small fixed labelled set; agreement and max |delta| are
+against the fp32 PyTorch probabilities.
+
+Usage:
+    python -m tests.performance.benchmark_backends --backends torch,onnx,onnx-int8
+"""
+import argparse
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+from .utils import add_service_to_path, latency_summary, peak_rss_mb
+
+EVAL_SET = [
+    ("Today was actually pretty good, I went for a walk with my sister", "positive"),
+    ("That helped a lot, thank you!", "positive"),
+    ("I finally slept through the night and feel rested", "positive"),
+    ("I'm proud of myself for going to the appointment", "positive"),
+    ("Talking to you makes things feel a bit lighter", "positive"),
+    ("I got the job! I can't believe it", "positive"),
+    ("I went to work and came home", "neutral"),
+    ("What time does the group session start?", "neutral"),
+    ("I had pasta for dinner", "neutral"),
+    ("My appointment got moved to Thursday", "neutral"),
+    ("I'm reading a book about gardening", "neutral"),
+    ("It rained most of the day", "neutral"),
+    ("I've been feeling really low since last week and I can't sleep", "negative"),
+    ("Why does nothing ever work out for me?", "negative"),
+    ("I'm so tired of pretending everything is fine.", "negative"),
+    ("I feel like I'm letting everyone down and I don't know how to fix it", "negative"),
+    ("Everything feels pointless lately", "negative"),
+    ("I had another panic attack at work today", "negative"),
+]
+
+def _run_backend(model_name: str, backend: str, cache_dir: str, iterations: int, queue) -> None:
+    add_service_to_path("sentiment-analysis")
+    from src.models.backends import load_backend
+
+    start = time.perf_counter()
+    tokenizer, model, id2label = load_backend(model_name, backend, cache_dir)
+    load_seconds = time.perf_counter() - start
+
+    def probabilities(texts):
+        encoded = dict(tokenizer(texts, padding=True, truncation=True, return_tensors="np"))
+        logits = model.logits(encoded)
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    texts = [text for text, _ in EVAL_SET]
+    probs = probabilities(texts)
+
+    latencies = []
+    for i in range(iterations):
+        text = texts[i % len(texts)]
+        start = time.perf_counter()
+        probabilities([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    queue.put({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "probabilities": probs.tolist(),
+        "labels": [str(id2label[int(i)]).lower() for i in probs.argmax(axis=-1)],
+        "peak_rss_mb": peak_rss_mb(),
+        **latency_summary(latencies),
+    })
+
+def run_benchmark(model_name: str, backends, cache_dir: str, iterations: int):
+    context = multiprocessing.get_context("spawn")
+    raw = []
+    for backend in backends:
+        queue = context.Queue()
+        process = context.Process(target=_run_backend,
+                                  args=(model_name, backend, cache_dir, iterations, queue))
+        process.start()
+        raw.append(queue.get())
+        process.join()
+
+    gold = [label for _, label in EVAL_SET]
+    reference = next((r for r in raw if r["backend"] == "torch"), raw[0])
+    reference_probs = np.asarray(reference["probabilities"])
+    reference_labels = reference["labels"]
+    results = []
+    for r in raw:
+        probs = np.asarray(r.pop("probabilities"))
+        labels = r.pop("labels")
+        r["accuracy"] = float(np.mean([p == g for p, g in zip(labels, gold)]))
+        r["agreement"] = float(np.mean([p == q for p, q in zip(labels, reference_labels)]))
+        r["max_abs_delta"] = float(np.abs(probs - reference_probs).max())
+        results.append(r)
+    return results
+
+def main():
+    add_service_to_path("sentiment-analysis")
+    from shared.utils.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.TRANSFORMER_MODEL)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--cache-dir", default=settings.MODEL_CACHE_DIR)
+    parser.add_argument("--iterations", type=int, default=200, help="batch-1 requests timed per backend")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.model, args.backends.split(","), args.cache_dir, args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>7} {'p99 ms':>7} {'RSS MB':>7} "
+          f"{'acc':>6} {'agree':>6} {'max|d|':>8}")
+    for row in results:
+        print(f"{row['backend']:<10} {row['load_seconds']:>7.2f} {row['p50_ms']:>7.2f} "
+              f"{row['p99_ms']:>7.2f} {row['peak_rss_mb']:>7.0f} {row['accuracy']:>6.2f} "
+              f"{row['agreement']:>6.2f} {row['max_abs_delta']:>8.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# tests/performance/benchmark_batch_detector.py
+"""Evaluating many live sessions: per-session detectors vs. BatchDriftDetector.
+
+Usage:
+    python -m tests.performance.benchmark_batch_detector --sessions 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from .utils import add_service_to_path
+
+add_service_to_path("drift-detection")
+
+from src.detectors.batch_detector import BatchDriftDetector  # noqa: E402
+from src.detectors.streaming_detector import StreamingDriftDetector  # noqa: E402
+
+def run_benchmark(sessions: int, warmup: int, ticks: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    session_ids = [f"session-{i}" for i in range(sessions)]
+    warm_scores = np.clip(rng.normal(0, 0.4, (warmup, sessions)), -1, 1)
+    tick_scores = np.clip(rng.normal(0, 0.4, (ticks, sessions)), -1, 1)
+
+    # One tick = every session receives one new message and is re-evaluated
+    detectors = {session_id: StreamingDriftDetector() for session_id in session_ids}
+    for row in warm_scores:
+        for session_id, score in zip(session_ids, row.tolist()):
+            detectors[session_id].add_sentiment_score(score)
+    start = time.perf_counter()
+    for row in tick_scores:
+        for session_id, score in zip(session_ids, row.tolist()):
+            detectors[session_id].detect_drift(score)
+    per_session_elapsed = (time.perf_counter() - start) / ticks
+
+    batch = BatchDriftDetector(initial_capacity=sessions)
+    for row in warm_scores:
+        batch.add_scores(session_ids, row)
+    batch.detect()
+    start = time.perf_counter()
+    for row in tick_scores:
+        batch.add_scores(session_ids, row)
+        batch.detect()
+    batch_elapsed = (time.perf_counter() - start) / ticks
+
+    return [
+        {"detector": name, "sessions": sessions, "seconds_per_tick": elapsed,
+         "session_updates_per_second": sessions / elapsed}
+        for name, elapsed in (("per-session", per_session_elapsed), ("batch", batch_elapsed))
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--warmup", type=int, default=30, help="scores per session before timing")
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sessions, args.warmup, args.ticks)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'detector':<12} {'sessions':>9} {'s/tick':>9} {'updates/s':>12}")
+    for row in results:
+        print(f"{row['detector']:<12} {row['sessions']:>9} {row['seconds_per_tick']:>9.3f} "
+              f"{row['session_updates_per_second']:>12.0f}")
+
+if __name__ == "__main__":
+    main()
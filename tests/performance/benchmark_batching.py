@@ -0,0 +1,105 @@
+# tests/performance/benchmark_batching.py
+"""Throughput/latency of batch-1 vs. coalesced transformer inference.
+
+Usage:
+    python -m tests.performance.benchmark_batching --concurrency 1,4,16,64
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from .utils import add_service_to_path, latency_summary
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.config import settings  # noqa: E402
+from src.models.batcher import MicroBatcher  # noqa: E402
+from src.models.transformer_analyzer import TransformerAnalyzer  # noqa: E402
+
+SAMPLE_MESSAGES = [
+    "ok",
+    "thanks",
+    "I don't know",
+    "I've been feeling really low since last week and I can't sleep",
+    "Today was actually pretty good, I went for a walk with my sister",
+    "Why does nothing ever work out for me?",
+    "I'm so tired of pretending everything is fine.",
+    "That helped a lot, thank you!",
+    "Work is stressful but I'm managing",
+    "I feel like I'm letting everyone down and I don't know how to fix it",
+]
+
+async def _drive(batcher: MicroBatcher, concurrency: int, total_requests: int):
+    latencies = []
+    remaining = total_requests
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            text = random.choice(SAMPLE_MESSAGES)
+            start = time.perf_counter()
+            await batcher.submit(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await batcher.close()
+    return elapsed, latencies
+
+def run_benchmark(analyzer: TransformerAnalyzer, concurrency_levels, total_requests: int,
+                  max_batch_size: int, max_wait_ms: float):
+    modes = {
+        "batch-1": {"max_batch_size": 1, "max_wait_ms": 0.0},
+        "coalesced": {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms},
+    }
+    # Warm up kernels and allocator before timing anything
+    analyzer.analyze_batch(SAMPLE_MESSAGES)
+
+    results = []
+    for concurrency in concurrency_levels:
+        for mode, options in modes.items():
+            batcher = MicroBatcher(analyzer.analyze_batch, **options)
+            elapsed, latencies = asyncio.run(_drive(batcher, concurrency, total_requests))
+            row = {
+                "mode": mode,
+                "concurrency": concurrency,
+                "requests": total_requests,
+                "throughput_rps": total_requests / elapsed,
+                "batches": batcher.stats["batches"],
+                "avg_batch_size": batcher.stats["items"] / max(1, batcher.stats["batches"]),
+            }
+            row.update(latency_summary(latencies))
+            results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.TRANSFORMER_MODEL)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-batch-size", type=int, default=settings.BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.BATCH_MAX_WAIT_MS)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    random.seed(0)
+    analyzer = TransformerAnalyzer(model_name=args.model)
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+    results = run_benchmark(analyzer, concurrency_levels, args.requests,
+                            args.max_batch_size, args.max_wait_ms)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    for row in results:
+        print(f"{row['mode']:<10} {row['concurrency']:>5} {row['throughput_rps']:>9.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['avg_batch_size']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# tests/performance/benchmark_drift_detector.py
+"""Per-update cost of the reference vs. streaming drift detectors.
+
+Usage:
+    python -m tests.performance.benchmark_drift_detector --updates 20000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from .utils import add_service_to_path
+
+add_service_to_path("drift-detection")
+
+from src.detectors.statistical_detector import StatisticalDriftDetector  # noqa: E402
+from src.detectors.streaming_detector import StreamingDriftDetector  # noqa: E402
+
+DETECTORS = {
+    "reference": StatisticalDriftDetector,
+    "streaming": StreamingDriftDetector,
+}
+
+def run_benchmark(updates: int, window_sizes, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    scores = np.clip(rng.normal(0.0, 0.4, updates), -1, 1).tolist()
+
+    results = []
+    for window_size in window_sizes:
+        for name, detector_cls in DETECTORS.items():
+            detector = detector_cls(window_size=window_size)
+            start = time.perf_counter()
+            for score in scores:
+                detector.detect_drift(score)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "detector": name,
+                "window_size": window_size,
+                "updates": updates,
+                "us_per_update": elapsed / updates * 1e6,
+                "updates_per_second": updates / elapsed,
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--window-sizes", default="10,30")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    window_sizes = [int(w) for w in args.window_sizes.split(",")]
+    results = run_benchmark(args.updates, window_sizes)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'detector':<10} {'window':>6} {'us/update':>10} {'updates/s':>11}")
+    for row in results:
+        print(f"{row['detector']:<10} {row['window_size']:>6} "
+              f"{row['us_per_update']:>10.1f} {row['updates_per_second']:>11.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# tests/performance/benchmark_emotion.py
+"""Per-message latency of the ensemble with and without the emotion model.
+
+Compares sentiment only, sentiment then emotion run one after the other,
+and the ensemble's concurrent path (the emotion model on its own thread,
+sharing the transformer's tokenization). The stated budget: with the
+emotion model, batch-1 p99 latency must stay within --budget-ms (default
+100 ms on the service's CPU allocation). The command exits non-zero when
+the budget is exceeded.
+
+Usage:
+    python -m tests.performance.benchmark_emotion --batch-sizes 1,32 --budget-ms 100
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from .benchmark_batching import SAMPLE_MESSAGES
+from .utils import add_service_to_path, latency_summary
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.config import settings  # noqa: E402
+from src.models.emotion_analyzer import EmotionAnalyzer  # noqa: E402
+from src.models.ensemble_analyzer import EnsembleAnalyzer  # noqa: E402
+from src.models.transformer_analyzer import TransformerAnalyzer  # noqa: E402
+from src.models.vader_analyzer import VADERAnalyzer  # noqa: E402
+
+def run_benchmark(model_name: str, emotion_model: str, batch_sizes, iterations: int):
+    transformer = TransformerAnalyzer(model_name=model_name)
+    emotion = EmotionAnalyzer(model_name=emotion_model)
+    sentiment_only = EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer(), "transformer": transformer})
+    concurrent = EnsembleAnalyzer(analyzers={"vader": VADERAnalyzer(), "transformer": transformer},
+                                  emotion_analyzer=emotion)
+
+    def sequential(texts):
+        results = sentiment_only.analyze_batch(texts)
+        emotion.analyze_batch(texts)
+        return results
+
+    configs = {
+        "sentiment only": sentiment_only.analyze_batch,
+        "sequential": sequential,
+        "concurrent": concurrent.analyze_batch,
+    }
+    rng = random.Random(0)
+    results = []
+    for batch_size in batch_sizes:
+        batches = [rng.choices(SAMPLE_MESSAGES, k=batch_size) for _ in range(iterations)]
+        for name, analyze in configs.items():
+            analyze(batches[0])  # Warm up
+            latencies = []
+            for texts in batches:
+                start = time.perf_counter()
+                analyze(texts)
+                # Every message in a batch waits for the whole batch
+                latencies.append((time.perf_counter() - start) * 1000)
+            row = {"config": name, "batch_size": batch_size, "shared_tokenization": concurrent._shared_encoding}
+            row.update(latency_summary(latencies))
+            results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.TRANSFORMER_MODEL)
+    parser.add_argument("--emotion-model", default=settings.EMOTION_MODEL)
+    parser.add_argument("--batch-sizes", default="1,32")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="batch-1 p99 budget with emotions")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.model, args.emotion_model,
+                            [int(size) for size in args.batch_sizes.split(",")], args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'config':<16} {'batch':>6} {'p50 ms':>8} {'p99 ms':>8}")
+        for row in results:
+            print(f"{row['config']:<16} {row['batch_size']:>6} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+
+    over = [row for row in results
+            if row["config"] == "concurrent" and row["batch_size"] == 1 and row["p99_ms"] > args.budget_ms]
+    if over:
+        print(f"Emotion latency budget exceeded: p99 {over[0]['p99_ms']:.1f} ms > {args.budget_ms} ms",
+              file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
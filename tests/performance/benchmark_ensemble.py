@@ -0,0 +1,77 @@
+# tests/performance/benchmark_ensemble.py
+"""Throughput and per-batch latency of EnsembleAnalyzer.analyze_batch.
+
+Messages come from the synthetic conversations, so the mix of positive,
+neutral and negative text is fixed by --seed. The result cache is off:
+this measures scoring, not lookups.
+
+Usage:
+    python -m tests.performance.benchmark_ensemble --batch-sizes 1,8,32 --iterations 50
+"""
+import argparse
+import json
+import random
+import time
+
+from .synthetic import make_conversations
+from .utils import add_service_to_path, latency_summary, peak_rss_mb
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.config import settings  # noqa: E402
+from src.models.emotion_analyzer import EmotionAnalyzer  # noqa: E402
+from src.models.ensemble_analyzer import EnsembleAnalyzer  # noqa: E402
+from src.models.transformer_analyzer import TransformerAnalyzer  # noqa: E402
+from src.models.vader_analyzer import VADERAnalyzer  # noqa: E402
+
+def run_benchmark(model_name: str, emotion_model: str, batch_sizes, iterations: int, seed: int = 0):
+    analyzer = EnsembleAnalyzer(
+        analyzers={"vader": VADERAnalyzer(), "transformer": TransformerAnalyzer(model_name=model_name)},
+        emotion_analyzer=EmotionAnalyzer(model_name=emotion_model) if emotion_model else None
+    )
+    messages = [m for conversation in make_conversations(200, seed=seed) for m in conversation.messages]
+    rng = random.Random(seed)
+
+    results = []
+    for batch_size in batch_sizes:
+        batches = [rng.choices(messages, k=batch_size) for _ in range(iterations)]
+        analyzer.analyze_batch(batches[0])  # Warm up
+        latencies = []
+        start = time.perf_counter()
+        for texts in batches:
+            batch_start = time.perf_counter()
+            analyzer.analyze_batch(texts)
+            latencies.append((time.perf_counter() - batch_start) * 1000)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "batch_size": batch_size,
+            "messages_per_second": batch_size * iterations / elapsed,
+            **latency_summary(latencies),
+            "peak_rss_mb": peak_rss_mb(),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.TRANSFORMER_MODEL)
+    parser.add_argument("--emotion-model", default=settings.EMOTION_MODEL if settings.EMOTION_MODEL_ENABLED else "",
+                        help="empty to score sentiment only")
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.model, args.emotion_model, [int(size) for size in args.batch_sizes.split(",")],
+                            args.iterations, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'batch':>6} {'msgs/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8}")
+    for row in results:
+        print(f"{row['batch_size']:>6} {row['messages_per_second']:>9.1f} {row['p50_ms']:>8.2f} "
+              f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['peak_rss_mb']:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# tests/performance/benchmark_ingest.py
+"""Rows/second persisting sentiment scores: single-row INSERT vs. executemany vs. buffered COPY.
+
+Writes into a scratch copy of sentiment_scores (no foreign keys) that is
+dropped afterwards. Needs a migrated Postgres, e.g. a local container:
+
+    docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=password -e POSTGRES_DB=sentiment_drift postgres:15
+
+Usage:
+    python -m tests.performance.benchmark_ingest --rows 20000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .utils import add_service_to_path
+
+add_service_to_path("session-management")
+
+from shared.utils.config import settings  # noqa: E402
+from src.database.connection import TABLE_COLUMNS, Database, WriteBehindBuffer  # noqa: E402
+
+SCRATCH_TABLE = "bench_sentiment_scores"
+COLUMNS = list(TABLE_COLUMNS["sentiment_scores"])
+INSERT_SQL = (
+    f"INSERT INTO {SCRATCH_TABLE} ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join(f'${i + 1}' for i in range(len(COLUMNS)))})"
+)
+
+def make_rows(count: int, sessions: int = 50, seed: int = 0):
+    rng = random.Random(seed)
+    session_ids = [uuid.uuid4() for _ in range(sessions)]
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": uuid.uuid4(),
+        "message_id": uuid.uuid4(),
+        "session_id": rng.choice(session_ids),
+        "overall_sentiment": rng.uniform(-1, 1),
+        "confidence": rng.random(),
+        "emotions": {"joy": rng.random(), "anger": rng.random(), "sadness": rng.random()},
+        "linguistic_features": {"word_count": rng.randint(1, 40)},
+        "model_version": "ensemble_v1.0",
+        "timestamp": now,
+        "created_at": now,
+    } for _ in range(count)]
+
+async def single_row_inserts(db: Database, rows, concurrency: int):
+    queue = list(rows)
+
+    async def writer():
+        while queue:
+            row = queue.pop()
+            await db.execute(INSERT_SQL, *(row[c] for c in COLUMNS))
+
+    await asyncio.gather(*(writer() for _ in range(concurrency)))
+
+async def executemany_inserts(db: Database, rows, batch_size: int):
+    async with db.acquire() as connection:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            await connection.executemany(INSERT_SQL, [tuple(row[c] for c in COLUMNS) for row in batch])
+
+async def buffered_copy(db: Database, rows, batch_size: int, concurrency: int):
+    buffer = WriteBehindBuffer(db.pool, max_rows=batch_size, tables={SCRATCH_TABLE: COLUMNS})
+    buffer.start()
+    queue = list(rows)
+
+    async def producer():
+        while queue:
+            await buffer.add(SCRATCH_TABLE, queue.pop())
+            await asyncio.sleep(0)  # Interleave producers like concurrent requests would
+
+    await asyncio.gather(*(producer() for _ in range(concurrency)))
+    await buffer.close()
+
+async def run_benchmark(dsn: str, total_rows: int, batch_size: int, concurrency: int):
+    db = Database(dsn, min_size=1, max_size=max(2, concurrency))
+    await db.connect()
+    modes = {
+        "single_insert": lambda rows: single_row_inserts(db, rows, concurrency),
+        "executemany": lambda rows: executemany_inserts(db, rows, batch_size),
+        "buffered_copy": lambda rows: buffered_copy(db, rows, batch_size, concurrency),
+    }
+
+    results = []
+    try:
+        for name, run in modes.items():
+            await db.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+            await db.execute(f"CREATE TABLE {SCRATCH_TABLE} (LIKE sentiment_scores INCLUDING DEFAULTS)")
+            rows = make_rows(total_rows)
+            start = time.perf_counter()
+            await run(rows)
+            elapsed = time.perf_counter() - start
+            stored = await db.fetchrow(f"SELECT count(*) AS n FROM {SCRATCH_TABLE}")
+            results.append({
+                "mode": name,
+                "rows": stored["n"],
+                "seconds": elapsed,
+                "rows_per_second": stored["n"] / elapsed,
+            })
+    finally:
+        await db.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        await db.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=settings.WRITE_BUFFER_MAX_ROWS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.dsn, args.rows, args.batch_size, args.concurrency))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<14} {'rows':>8} {'seconds':>9} {'rows/s':>10}")
+    for row in results:
+        print(f"{row['mode']:<14} {row['rows']:>8} {row['seconds']:>9.2f} {row['rows_per_second']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# tests/performance/benchmark_linguistic_features.py
+"""Messages/second of the previous feature code vs. src.utils.preprocessing.
+
+The extractor also computes first-person, negation and absolutist
+features the previous code did not, so equal throughput is a net win.
+
+Usage:
+    python -m tests.performance.benchmark_linguistic_features --messages 20000
+"""
+import argparse
+import json
+import random
+import time
+
+from .benchmark_tokenization import LENGTH_MIX, WORDS
+from .utils import add_service_to_path
+
+add_service_to_path("sentiment-analysis")
+
+from src.utils.preprocessing import extract_linguistic_features_batch  # noqa: E402
+
+def make_messages(count: int, seed: int = 0):
+    """Chat-like messages with capitalised, punctuated sentences"""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        _, low, high = rng.choices(LENGTH_MIX, weights=[share for share, _, _ in LENGTH_MIX])[0]
+        remaining, sentences = rng.randint(low, high), []
+        while remaining > 0:
+            length = min(remaining, rng.randint(3, 18))
+            remaining -= length
+            words = rng.choices(WORDS, k=length)
+            if rng.random() < 0.05:
+                words[rng.randrange(length)] = "NEVER"
+            sentence = " ".join(words).capitalize().replace("i ", "I ")
+            sentences.append(sentence + rng.choice([".", ".", ".", "!", "?", "..."]))
+        messages.append(" ".join(sentences))
+    return messages
+
+def legacy_features(text: str):
+    """The implementation this replaces: several passes, plus a per-character generator"""
+    sentences = text.split('.')
+    words = text.split()
+    return {
+        "word_count": len(words),
+        "sentence_count": len(sentences),
+        "avg_sentence_length": len(words) / len(sentences) if sentences else 0,
+        "exclamation_count": text.count('!'),
+        "question_count": text.count('?'),
+        "caps_ratio": sum(1 for c in text if c.isupper()) / len(text) if text else 0
+    }
+
+def run_benchmark(messages, repeats: int):
+    implementations = {
+        "legacy": lambda texts: [legacy_features(text) for text in texts],
+        "extractor": extract_linguistic_features_batch,
+    }
+    characters = sum(len(text) for text in messages)
+    results = []
+    for name, extract in implementations.items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            extract(messages)
+            best = min(best, time.perf_counter() - start)
+        results.append({
+            "implementation": name,
+            "messages": len(messages),
+            "seconds": best,
+            "messages_per_second": len(messages) / best,
+            "mb_per_second": characters / best / 1e6,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5, help="best of N runs is reported")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(make_messages(args.messages), args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'implementation':<14} {'messages':>9} {'msgs/s':>10} {'MB/s':>7}")
+    for row in results:
+        print(f"{row['implementation']:<14} {row['messages']:>9} {row['messages_per_second']:>10.0f} "
+              f"{row['mb_per_second']:>7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# tests/performance/benchmark_metrics.py
+"""Cost of shared.utils.metrics on the hot path.
+
+Reports the time a ``timed()`` block and the request middleware add,
+with metrics enabled and with them switched off (ENABLE_METRICS=false
+behaviour), next to an uninstrumented baseline.
+
+Usage:
+    python -m tests.performance.benchmark_metrics --calls 200000 --requests 2000
+"""
+import argparse
+import json
+import time
+from contextlib import contextmanager
+
+from .utils import add_service_to_path, latency_summary
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils import metrics  # noqa: E402
+
+@contextmanager
+def switched(enabled: bool):
+    previous = metrics.ENABLED
+    metrics.ENABLED = enabled and previous
+    try:
+        yield
+    finally:
+        metrics.ENABLED = previous
+
+def time_blocks(calls: int, repeats: int):
+    """Nanoseconds per empty block: bare, timed() disabled, timed() enabled"""
+    def bare():
+        for _ in range(calls):
+            pass
+
+    def instrumented():
+        for _ in range(calls):
+            with metrics.timed("benchmark"):
+                pass
+
+    results = []
+    for name, fn, enabled in (("baseline", bare, True), ("timed-disabled", instrumented, False),
+                              ("timed-enabled", instrumented, True)):
+        best = float("inf")
+        with switched(enabled):
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+        results.append({"variant": name, "ns_per_call": best / calls * 1e9})
+    return results
+
+def time_requests(requests: int):
+    """Per-request latency of a trivial endpoint with and without the middleware"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    results = []
+    for name, instrument in (("app-baseline", False), ("app-instrumented", True)):
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            return {"item_id": item_id}
+
+        if instrument:
+            metrics.instrument_app(app, "benchmark")
+        client = TestClient(app)
+        for i in range(100):
+            client.get(f"/items/{i}")
+
+        latencies = []
+        for i in range(requests):
+            start = time.perf_counter()
+            client.get(f"/items/{i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append({"variant": name, "requests": requests, **latency_summary(latencies)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5, help="best of N runs is reported")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    if not metrics.ENABLED:
+        parser.error("metrics are disabled (prometheus_client missing or ENABLE_METRICS=false)")
+
+    blocks = time_blocks(args.calls, args.repeats)
+    requests = time_requests(args.requests)
+    if args.json:
+        print(json.dumps({"blocks": blocks, "requests": requests}, indent=2))
+        return
+
+    print(f"{'variant':<16} {'ns/call':>9}")
+    for row in blocks:
+        print(f"{row['variant']:<16} {row['ns_per_call']:>9.0f}")
+    print()
+    print(f"{'variant':<18} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for row in requests:
+        print(f"{row['variant']:<18} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['mean_ms']:>8.3f}")
+
+if __name__ == "__main__":
+    main()
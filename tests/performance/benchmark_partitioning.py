@@ -0,0 +1,149 @@
+# tests/performance/benchmark_partitioning.py
+"""Query latency and retention cost: plain vs. daily-partitioned sentiment_scores.
+
+Loads the same synthetic dataset (default 100M rows spread evenly over
+--days, in time order) into two scratch schemas: one shaped like the table
+before migration 007 (B-tree indexes on timestamp and session_id,
+timestamp) and one range-partitioned by day with a BRIN timestamp index,
+created through PartitionManager. Loading 100M rows takes a while; use
+--rows to scale down.
+
+Usage:
+    python -m tests.performance.benchmark_partitioning --rows 100000000 --days 90
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from .utils import add_service_to_path, latency_summary
+
+add_service_to_path("session-management")
+
+from shared.utils.config import settings  # noqa: E402
+from src.database.connection import Database  # noqa: E402
+from src.database.partitions import PartitionManager  # noqa: E402
+
+TABLE_SQL = """
+    CREATE TABLE sentiment_scores (
+        id bigint NOT NULL,
+        session_id int NOT NULL,
+        overall_sentiment float8 NOT NULL,
+        "timestamp" timestamptz NOT NULL
+    ) {partitioning}
+"""
+
+# Rows are generated server-side in time order; session ids cycle so every
+# session has scores across the whole period
+LOAD_SQL = """
+    INSERT INTO sentiment_scores
+    SELECT g, g % $4, random() * 2 - 1, $2::timestamptz + (g * $3::float8) * interval '1 second'
+    FROM generate_series($1::bigint, $1::bigint + $5::bigint - 1) g
+"""
+
+QUERIES = {
+    "last_hour_aggregate": (
+        "SELECT count(*), avg(overall_sentiment) FROM sentiment_scores "
+        "WHERE \"timestamp\" >= $1::timestamptz - interval '1 hour'"
+    ),
+    "session_last_day": (
+        "SELECT overall_sentiment, \"timestamp\" FROM sentiment_scores "
+        "WHERE session_id = $2 AND \"timestamp\" >= $1::timestamptz - interval '1 day' "
+        "ORDER BY \"timestamp\""
+    ),
+}
+
+async def build(db: Database, partitioned: bool, rows: int, days: int, sessions: int,
+                start: datetime, chunk: int):
+    await db.execute(TABLE_SQL.format(partitioning='PARTITION BY RANGE ("timestamp")' if partitioned else ""))
+    if partitioned:
+        manager = PartitionManager(tables={"sentiment_scores": "day"}, premake=1, retention_days=0)
+        async with db.acquire() as connection:
+            await manager.ensure(connection, start.date())
+            for offset in range(1, days + 1):
+                await manager.ensure(connection, (start + timedelta(days=offset)).date())
+
+    seconds_per_row = days * 86400 / rows
+    loaded = time.perf_counter()
+    for first in range(0, rows, chunk):
+        await db.execute(LOAD_SQL, first, start, seconds_per_row, sessions, min(chunk, rows - first))
+    load_seconds = time.perf_counter() - loaded
+
+    if partitioned:
+        await db.execute('CREATE INDEX ON sentiment_scores USING brin ("timestamp")')
+    else:
+        await db.execute('CREATE INDEX ON sentiment_scores ("timestamp")')
+    await db.execute('CREATE INDEX ON sentiment_scores (session_id, "timestamp")')
+    await db.execute("VACUUM ANALYZE sentiment_scores")
+
+    size = await db.fetchrow("SELECT pg_total_relation_size('sentiment_scores') AS bytes")
+    if partitioned:
+        size = await db.fetchrow(
+            "SELECT sum(pg_total_relation_size(inhrelid)) AS bytes FROM pg_inherits "
+            "WHERE inhparent = 'sentiment_scores'::regclass"
+        )
+    return {"load_seconds": load_seconds, "total_bytes": int(size["bytes"])}
+
+async def time_queries(db: Database, now: datetime, sessions: int, repeats: int):
+    results = {}
+    for name, sql in QUERIES.items():
+        latencies = []
+        for i in range(repeats):
+            args = (now,) if "$2" not in sql else (now, i % sessions)
+            start = time.perf_counter()
+            await db.fetch(sql, *args)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[name] = latency_summary(latencies)
+    return results
+
+async def time_retention(db: Database, partitioned: bool, start: datetime):
+    """Remove the oldest week: DELETE on the plain table, dropping partitions otherwise"""
+    cutoff = start + timedelta(days=7)
+    begin = time.perf_counter()
+    if partitioned:
+        manager = PartitionManager(tables={"sentiment_scores": "day"}, retention_days=1)
+        async with db.acquire() as connection:
+            await manager.apply_retention(connection, (cutoff + timedelta(days=1)).date())
+    else:
+        await db.execute('DELETE FROM sentiment_scores WHERE "timestamp" < $1', cutoff)
+    return time.perf_counter() - begin
+
+async def run_benchmark(dsn: str, rows: int, days: int, sessions: int, repeats: int, chunk: int):
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = now - timedelta(days=days)
+    results = []
+    for schema, partitioned in (("bench_plain", False), ("bench_partitioned", True)):
+        admin = Database(dsn, min_size=1, max_size=1)
+        await admin.connect()
+        await admin.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await admin.execute(f"CREATE SCHEMA {schema}")
+        db = Database(dsn, min_size=1, max_size=1, server_settings={"search_path": schema})
+        await db.connect()
+        try:
+            result = {"layout": schema, "rows": rows}
+            result.update(await build(db, partitioned, rows, days, sessions, start, chunk))
+            result["queries"] = await time_queries(db, now, sessions, repeats)
+            result["drop_oldest_week_s"] = await time_retention(db, partitioned, start)
+            results.append(result)
+        finally:
+            await db.close()
+            await admin.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            await admin.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--chunk", type=int, default=5_000_000, help="rows per INSERT ... SELECT")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.dsn, args.rows, args.days, args.sessions, args.repeats, args.chunk))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
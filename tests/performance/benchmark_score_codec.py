@@ -0,0 +1,128 @@
+# tests/performance/benchmark_score_codec.py
+"""Bytes and µs per score of the binary score encoding vs. the Pydantic JSON paths.
+
+``pydantic_json`` is the HTTP path (a list response serialized and
+validated by Pydantic), ``stream_json`` the previous stream path (one JSON
+document per score). ``binary`` and ``binary_stream`` are the same two
+paths with shared.utils.score_codec, and ``binary_columns`` decodes a batch
+straight into NumPy columns.
+
+Usage:
+    python -m tests.performance.benchmark_score_codec --batch-sizes 1,32,1000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from .utils import add_service_to_path
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.messaging import PAYLOAD_CODECS  # noqa: E402
+from shared.utils.score_codec import CONTENT_TYPE, decode_columns, decode_scores, encode_scores  # noqa: E402
+from src.api.schemas import SentimentAnalysisResponse  # noqa: E402
+
+def make_scores(count: int, seed: int = 0) -> List[SentimentAnalysisResponse]:
+    """Scores shaped like the ensemble's: three emotions and every linguistic feature"""
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 1)
+    scores = []
+    for i in range(count):
+        words = rng.randint(1, 60)
+        sentences = rng.randint(1, 4)
+        scores.append(SentimentAnalysisResponse(
+            session_id=str(uuid.UUID(int=rng.getrandbits(128))),
+            message_id=str(uuid.UUID(int=rng.getrandbits(128))),
+            timestamp=start + timedelta(milliseconds=137 * i),
+            overall_sentiment=rng.uniform(-1, 1),
+            confidence=rng.random(),
+            emotions={"joy": rng.random(), "anger": rng.random(), "sadness": rng.random()},
+            linguistic_features={
+                "word_count": words,
+                "sentence_count": sentences,
+                "avg_sentence_length": words / sentences,
+                "exclamation_count": rng.randint(0, 2),
+                "question_count": rng.randint(0, 2),
+                "caps_ratio": rng.random() * 0.1,
+                "first_person_ratio": rng.random() * 0.2,
+                "negation_count": rng.randint(0, 3),
+                "absolutist_ratio": rng.random() * 0.05,
+            },
+            model_version="ensemble_v1.0",
+            processing_time_ms=rng.uniform(5, 50),
+        ))
+    return scores
+
+def implementations():
+    adapter = TypeAdapter(List[SentimentAnalysisResponse])
+    encode_payload, decode_payload = PAYLOAD_CODECS[CONTENT_TYPE]
+    return {
+        # name -> (encode a list of scores into one or more blobs, decode those blobs)
+        "pydantic_json": (lambda scores: [adapter.dump_json(scores)],
+                          lambda blobs: [adapter.validate_json(blob) for blob in blobs]),
+        "stream_json": (lambda scores: [json.dumps(s.model_dump(mode="json"), default=str) for s in scores],
+                        lambda blobs: [json.loads(blob) for blob in blobs]),
+        "binary": (lambda scores: [encode_scores(scores)],
+                   lambda blobs: [decode_scores(blob) for blob in blobs]),
+        "binary_stream": (lambda scores: [encode_payload(s) for s in scores],
+                          lambda blobs: [decode_payload(blob) for blob in blobs]),
+        "binary_columns": (lambda scores: [encode_scores(scores)],
+                           lambda blobs: [decode_columns(blob) for blob in blobs]),
+    }
+
+def best_of(fn, argument, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(batch_sizes, total: int, repeats: int):
+    results = []
+    for batch_size in batch_sizes:
+        batches = [make_scores(batch_size, seed) for seed in range(max(1, total // batch_size))]
+        scores = len(batches) * batch_size
+        for name, (encode, decode) in implementations().items():
+            encoded = [encode(batch) for batch in batches]
+            encode_seconds = best_of(lambda bs: [encode(b) for b in bs], batches, repeats)
+            decode_seconds = best_of(lambda es: [decode(e) for e in es], encoded, repeats)
+            size = sum(len(blob) for blobs in encoded for blob in blobs)
+            results.append({
+                "implementation": name,
+                "batch": batch_size,
+                "bytes_per_score": size / scores,
+                "encode_us_per_score": encode_seconds / scores * 1e6,
+                "decode_us_per_score": decode_seconds / scores * 1e6,
+                "scores_per_second": scores / (encode_seconds + decode_seconds),
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", default="1,32,1000")
+    parser.add_argument("--scores", type=int, default=20000, help="scores per batch size")
+    parser.add_argument("--repeats", type=int, default=5, help="best of N runs is reported")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    batch_sizes = [int(n) for n in args.batch_sizes.split(",")]
+    results = run_benchmark(batch_sizes, args.scores, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'implementation':<15} {'batch':>6} {'bytes':>7} {'enc µs':>8} {'dec µs':>8} {'scores/s':>10}")
+    for row in results:
+        print(f"{row['implementation']:<15} {row['batch']:>6} {row['bytes_per_score']:>7.1f} "
+              f"{row['encode_us_per_score']:>8.2f} {row['decode_us_per_score']:>8.2f} "
+              f"{row['scores_per_second']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
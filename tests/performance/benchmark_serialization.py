@@ -0,0 +1,106 @@
+# tests/performance/benchmark_serialization.py
+"""Per-request cost of building and serializing sentiment API responses.
+
+``validated`` is what a handler returning models through response_model
+costs on the pinned FastAPI (0.104): a validated SentimentAnalysisResponse,
+dumped, re-validated and serialized against response_model, then
+json.dumps. ``prebuilt`` is the current path: the route's plain-dict
+response built once from the analyzers' native values and rendered by
+FastJSONResponse (orjson). Only the response work is timed, not routing
+or the models.
+
+Usage:
+    python -m tests.performance.benchmark_serialization --batch-sizes 1,32
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from .utils import add_service_to_path
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.responses import FastJSONResponse, orjson  # noqa: E402
+from src.api.routes import _build_response  # noqa: E402
+from src.api.schemas import SentimentAnalysisRequest, SentimentAnalysisResponse  # noqa: E402
+
+def make_results(count: int, seed: int = 0):
+    """(request, analyzer result) pairs shaped like EnsembleAnalyzer output"""
+    rng = random.Random(seed)
+    return [(SentimentAnalysisRequest(session_id=f"session-{rng.randrange(1000)}", message="..."), {
+        "overall_sentiment": rng.uniform(-1, 1),
+        "confidence": rng.random(),
+        "emotions": {"joy": rng.random(), "anger": rng.random(), "sadness": rng.random()},
+        "linguistic_features": {"word_count": rng.randint(1, 60), "sentence_count": 2, "avg_sentence_length": 7.5,
+                                "exclamation_count": 0, "question_count": 1, "caps_ratio": 0.05,
+                                "first_person_ratio": 0.1, "negation_count": 0, "absolutist_ratio": 0.0},
+        "model_version": "ensemble_v1.0",
+    }) for _ in range(count)]
+
+# FastAPI builds one per route
+RESPONSE_MODEL = TypeAdapter(List[SentimentAnalysisResponse])
+
+def validated(results):
+    responses = [
+        SentimentAnalysisResponse(session_id=request.session_id, message_id=str(uuid.uuid4()),
+                                  timestamp=datetime.utcnow(), processing_time_ms=12.5, **result)
+        for request, result in results
+    ]
+    # fastapi.routing.serialize_response: dump, validate against response_model, serialize
+    content = RESPONSE_MODEL.validate_python([response.model_dump() for response in responses])
+    content = RESPONSE_MODEL.dump_python(content, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def prebuilt(results):
+    return FastJSONResponse([_build_response(request, result, 12.5) for request, result in results]).body
+
+def run_benchmark(batch_sizes, requests: int):
+    paths = {"validated": validated, "prebuilt": prebuilt}
+    rows = []
+    for batch_size in batch_sizes:
+        batches = [make_results(batch_size, seed) for seed in range(requests)]
+        reference = None
+        for name, path in paths.items():
+            body = json.loads(path(batches[0]))
+            # Same payload apart from the generated ids and timestamps
+            body = [{k: v for k, v in item.items() if k not in ("message_id", "timestamp")} for item in body]
+            reference = reference or body
+            assert body == reference, f"{name} returns a different payload"
+
+            start = time.perf_counter()
+            for batch in batches:
+                path(batch)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "path": name,
+                "batch": batch_size,
+                "orjson": orjson is not None,
+                "mean_ms": elapsed / requests * 1000,
+                "responses_per_second": requests * batch_size / elapsed,
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", default="1,32", help="responses per request, comma-separated")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark([int(n) for n in args.batch_sizes.split(",")], args.requests)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'path':<10} {'batch':>6} {'µs/request':>11} {'responses/s':>12}")
+    for row in results:
+        print(f"{row['path']:<10} {row['batch']:>6} {row['mean_ms'] * 1000:>11.1f} {row['responses_per_second']:>12.0f}")
+
+if __name__ == "__main__":
+    main()
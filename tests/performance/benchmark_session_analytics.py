@@ -0,0 +1,143 @@
+# tests/performance/benchmark_session_analytics.py
+"""Cost of keeping session analytics current: REFRESH MATERIALIZED VIEW CONCURRENTLY vs. incremental deltas.
+
+Builds a scratch schema with copies of the session tables, loads synthetic
+sessions, then times a refresh of the migration-004 materialized view
+against applying one write-behind flush worth of deltas and against a full
+reconciliation pass. Needs Postgres migrated to at least revision 006.
+
+Usage:
+    python -m tests.performance.benchmark_session_analytics --sessions 5000 --messages 40
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .utils import add_service_to_path
+
+add_service_to_path("session-management")
+
+from shared.utils.config import settings  # noqa: E402
+from src.database.aggregates import SessionAggregator  # noqa: E402
+from src.database.connection import Database, WriteBehindBuffer  # noqa: E402
+
+SCHEMA = "bench_session_analytics"
+TABLES = ("sessions", "messages", "sentiment_scores", "drift_events")
+
+MATERIALIZED_VIEW = """
+    CREATE MATERIALIZED VIEW session_analytics_mv AS
+    SELECT s.id as session_id, s.user_id, s.start_time, s.end_time, s.status,
+           COUNT(m.id) as message_count,
+           COUNT(CASE WHEN m.role = 'user' THEN 1 END) as user_message_count,
+           COUNT(CASE WHEN m.role = 'assistant' THEN 1 END) as assistant_message_count,
+           AVG(sent.overall_sentiment) as avg_sentiment,
+           MIN(sent.overall_sentiment) as min_sentiment,
+           MAX(sent.overall_sentiment) as max_sentiment,
+           STDDEV(sent.overall_sentiment) as sentiment_stddev,
+           COUNT(de.id) as drift_events_count,
+           COUNT(CASE WHEN de.drift_direction = 'negative' THEN 1 END) as negative_drift_count,
+           COUNT(CASE WHEN de.drift_direction = 'positive' THEN 1 END) as positive_drift_count,
+           MAX(de.drift_magnitude) as max_drift_magnitude
+    FROM sessions s
+    LEFT JOIN messages m ON s.id = m.session_id
+    LEFT JOIN sentiment_scores sent ON m.id = sent.message_id
+    LEFT JOIN drift_events de ON s.id = de.session_id
+    GROUP BY s.id, s.user_id, s.start_time, s.end_time, s.status;
+    CREATE UNIQUE INDEX ON session_analytics_mv (session_id);
+"""
+
+def message_rows(session_ids, messages_per_session: int):
+    now = datetime.now(timezone.utc)
+    messages, scores, drifts = [], [], []
+    for session_id in session_ids:
+        for i in range(messages_per_session):
+            message_id = uuid.uuid4()
+            messages.append({"id": message_id, "message_id": str(message_id), "session_id": session_id,
+                             "content": "...", "role": "user" if i % 2 == 0 else "assistant",
+                             "timestamp": now})
+            scores.append({"message_id": message_id, "session_id": session_id,
+                           "overall_sentiment": random.uniform(-1, 1), "confidence": 0.9,
+                           "emotions": {}, "model_version": "ensemble_v1.0", "timestamp": now})
+            if random.random() < 0.05:
+                drifts.append({"session_id": session_id, "message_id": message_id,
+                               "event_type": "drift_detected", "drift_magnitude": random.random(),
+                               "drift_direction": random.choice(["negative", "positive"]),
+                               "confidence": 0.8, "detection_method": "ensemble",
+                               "window_analyzed": 10, "current_sentiment": 0.0, "timestamp": now})
+    return messages, scores, drifts
+
+async def load(db: Database, rows_by_table, aggregator=None):
+    buffer = WriteBehindBuffer(db.pool, max_rows=1_000_000, max_pending=10_000_000, aggregator=aggregator)
+    for table, rows in rows_by_table.items():
+        await buffer.add_many(table, rows)
+    await buffer.flush()
+
+async def run_benchmark(dsn: str, sessions: int, messages_per_session: int, tick_rows: int):
+    db = Database(dsn, min_size=1, max_size=2, server_settings={"search_path": SCHEMA})
+    await db.connect()
+    results = {}
+    try:
+        await db.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await db.execute(f"CREATE SCHEMA {SCHEMA}")
+        for table in TABLES:
+            await db.execute(f"CREATE TABLE {table} (LIKE public.{table} INCLUDING DEFAULTS INCLUDING INDEXES)")
+
+        now = datetime.now(timezone.utc)
+        session_ids = [uuid.uuid4() for _ in range(sessions)]
+        async with db.acquire() as connection:
+            await connection.copy_records_to_table(
+                "sessions",
+                records=[(sid, str(sid), now, now, "active", now, now) for sid in session_ids],
+                columns=["id", "session_id", "start_time", "last_activity", "status", "created_at", "updated_at"]
+            )
+        messages, scores, drifts = message_rows(session_ids, messages_per_session)
+        await load(db, {"messages": messages, "sentiment_scores": scores, "drift_events": drifts})
+        await db.execute(MATERIALIZED_VIEW)
+        await db.execute("ANALYZE")
+        results["rows"] = {"sessions": sessions, "messages": len(messages), "drift_events": len(drifts)}
+
+        start = time.perf_counter()
+        await db.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY session_analytics_mv")
+        results["refresh_concurrently_s"] = time.perf_counter() - start
+
+        aggregator = SessionAggregator()
+        start = time.perf_counter()
+        async with db.acquire() as connection:
+            corrected = await aggregator.reconcile(connection)
+        results["full_reconcile_s"] = time.perf_counter() - start
+        results["full_reconcile_sessions"] = corrected
+
+        # One write-behind flush: new messages and scores spread over live sessions
+        tick_sessions = random.sample(session_ids, min(len(session_ids), tick_rows))
+        tick_messages, tick_scores, tick_drifts = message_rows(tick_sessions, 1)
+        start = time.perf_counter()
+        await load(db, {"messages": tick_messages, "sentiment_scores": tick_scores,
+                        "drift_events": tick_drifts}, aggregator=aggregator)
+        elapsed = time.perf_counter() - start
+        results["incremental_flush_s"] = elapsed
+        results["incremental_rows_per_second"] = (len(tick_messages) + len(tick_scores)) / elapsed
+
+        async with db.acquire() as connection:
+            results["drift_after_incremental"] = await aggregator.reconcile(connection)
+    finally:
+        await db.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await db.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=40, help="messages (and scores) per session")
+    parser.add_argument("--tick-rows", type=int, default=settings.WRITE_BUFFER_MAX_ROWS)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.dsn, args.sessions, args.messages, args.tick_rows))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
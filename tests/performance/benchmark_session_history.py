@@ -0,0 +1,136 @@
+# tests/performance/benchmark_session_history.py
+"""Session read latency: summaries and paged history vs. materializing the full history.
+
+Builds a scratch schema with copies of the session tables and loads one
+session per history length, then times each read SessionHistoryStore
+serves (summary, first page from the hot cache, first page by keyset, a
+page deep in the history) against reading every score into SentimentScore
+models, as a full Session object would. Needs Postgres migrated to at
+least revision 006 and, for the hot cache, Redis.
+
+Usage:
+    python -m tests.performance.benchmark_session_history --lengths 10,1000,100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from .utils import add_service_to_path, latency_summary
+
+add_service_to_path("session-management")
+
+from shared.models.sentiment_models import SentimentScore  # noqa: E402
+from shared.utils.config import settings  # noqa: E402
+from shared.utils.messaging import create_client  # noqa: E402
+from src.database.aggregates import SessionAggregator  # noqa: E402
+from src.database.connection import Database, WriteBehindBuffer  # noqa: E402
+from src.database.history import HotHistoryCache, SessionHistoryStore  # noqa: E402
+
+SCHEMA = "bench_session_history"
+TABLES = ("sessions", "messages", "sentiment_scores", "drift_events")
+
+FULL_HISTORY = """
+    SELECT message_id, "timestamp", overall_sentiment, confidence, emotions, linguistic_features, model_version
+    FROM sentiment_scores WHERE session_id = $1 ORDER BY "timestamp"
+"""
+
+def score_rows(session_id, count: int):
+    start = datetime.now(timezone.utc) - timedelta(seconds=count)
+    rows = []
+    for i in range(count):
+        rows.append({"id": uuid.uuid4(), "message_id": uuid.uuid4(), "session_id": session_id,
+                     "overall_sentiment": random.uniform(-1, 1), "confidence": 0.9,
+                     "emotions": {"joy": random.random(), "sadness": random.random()},
+                     "linguistic_features": {}, "model_version": "ensemble_v1.0",
+                     "timestamp": start + timedelta(seconds=i)})
+    return rows
+
+async def materialize(db: Database, session_id: str, session_uuid):
+    rows = await db.pool.fetch(FULL_HISTORY, session_uuid)
+    return [SentimentScore(session_id=session_id, message_id=str(row["message_id"]), timestamp=row["timestamp"],
+                           overall_sentiment=row["overall_sentiment"], confidence=row["confidence"],
+                           emotions=row["emotions"], linguistic_features=row["linguistic_features"],
+                           model_version=row["model_version"]) for row in rows]
+
+async def timed(fn, iterations: int):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+async def run_benchmark(dsn: str, lengths, iterations: int, page_size: int, use_redis: bool):
+    db = Database(dsn, min_size=1, max_size=2, server_settings={"search_path": SCHEMA})
+    await db.connect()
+    client = create_client() if use_redis else None
+    cache = HotHistoryCache(client, prefix=f"{SCHEMA}:") if client is not None else None
+    sessions, results = {}, []
+    try:
+        await db.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await db.execute(f"CREATE SCHEMA {SCHEMA}")
+        for table in TABLES:
+            await db.execute(f"CREATE TABLE {table} (LIKE public.{table} INCLUDING DEFAULTS INCLUDING INDEXES)")
+
+        now = datetime.now(timezone.utc)
+        sessions.update((length, uuid.uuid4()) for length in lengths)
+        async with db.acquire() as connection:
+            await connection.copy_records_to_table(
+                "sessions",
+                records=[(sid, str(sid), now, now, "active", now, now) for sid in sessions.values()],
+                columns=["id", "session_id", "start_time", "last_activity", "status", "created_at", "updated_at"]
+            )
+        buffer = WriteBehindBuffer(db.pool, max_rows=1_000_000, max_pending=10_000_000,
+                                   aggregator=SessionAggregator())
+        for length, session_uuid in sessions.items():
+            await buffer.add_many("sentiment_scores", score_rows(session_uuid, length))
+        await buffer.flush()
+        await db.execute("ANALYZE")
+
+        for length, session_uuid in sessions.items():
+            session_id = str(session_uuid)
+            cold = SessionHistoryStore(db.pool)
+            hot = SessionHistoryStore(db.pool, cache)
+            if cache is not None:
+                await hot.page(session_uuid, page_size)  # Fill
+
+            # Resume from the middle of the history, the worst case for OFFSET
+            _, middle = await cold.page(session_uuid, max(1, length // 2))
+            row = {"messages": length}
+            row["summary"] = await timed(lambda: hot.summary(session_id), iterations)
+            if cache is not None:
+                row["first_page_hot"] = await timed(lambda: hot.page(session_uuid, page_size), iterations)
+            row["first_page_keyset"] = await timed(lambda: cold.page(session_uuid, page_size), iterations)
+            if middle is not None:
+                row["deep_page_keyset"] = await timed(lambda: cold.page(session_uuid, page_size, middle), iterations)
+            row["full_history"] = await timed(lambda: materialize(db, session_id, session_uuid),
+                                              max(1, min(iterations, 100_000 // max(1, length))))
+            results.append(row)
+    finally:
+        if client is not None:
+            if sessions:
+                await client.delete(*(cache.key(sid) for sid in sessions.values()))
+            await client.aclose()
+        await db.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await db.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--lengths", default="10,1000,100000", help="messages per session, comma-separated")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=settings.SESSION_HISTORY_PAGE_SIZE)
+    parser.add_argument("--no-redis", action="store_true", help="skip the hot cache")
+    args = parser.parse_args()
+
+    lengths = [int(n) for n in args.lengths.split(",")]
+    results = asyncio.run(run_benchmark(args.dsn, lengths, args.iterations, args.page_size, not args.no_redis))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# tests/performance/benchmark_session_memory.py
+"""Memory per live session: StatisticalDriftDetector instances vs. SessionStateStore.
+
+Usage:
+    python -m tests.performance.benchmark_session_memory --sessions 1000000
+
+The per-detector baseline is measured on --reference-sessions and scaled
+linearly to --sessions, since holding a million detectors needs several GB.
+"""
+import argparse
+import json
+import random
+import tracemalloc
+
+from .utils import add_service_to_path
+
+add_service_to_path("drift-detection")
+
+from src.detectors.session_store import CompactSessionState, SessionStateStore  # noqa: E402
+from src.detectors.statistical_detector import StatisticalDriftDetector  # noqa: E402
+
+def _measure(build, count: int) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    holder = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del holder
+    return after - before
+
+def build_detectors(count: int, samples: int):
+    detectors = {}
+    for i in range(count):
+        detector = StatisticalDriftDetector()
+        detector.sentiment_history.extend(random.uniform(-1, 1) for _ in range(samples))
+        detectors[f"session-{i:08d}"] = detector
+    return detectors
+
+def build_store(count: int, samples: int):
+    store = SessionStateStore()
+    for i in range(count):
+        store.sessions[f"session-{i:08d}"] = CompactSessionState(
+            [random.uniform(-1, 1) for _ in range(samples)], last_activity=float(i)
+        )
+    return store
+
+def run_benchmark(sessions: int, reference_sessions: int, samples: int):
+    random.seed(0)
+    detector_bytes = _measure(lambda n: build_detectors(n, samples), reference_sessions)
+    store_bytes = _measure(lambda n: build_store(n, samples), sessions)
+
+    per_detector = detector_bytes / reference_sessions
+    per_compact = store_bytes / sessions
+    return [
+        {"layout": "detector-per-session", "sessions": sessions, "samples": samples,
+         "bytes_per_session": per_detector, "total_mb": per_detector * sessions / 2**20,
+         "measured_sessions": reference_sessions},
+        {"layout": "compact-store", "sessions": sessions, "samples": samples,
+         "bytes_per_session": per_compact, "total_mb": per_compact * sessions / 2**20,
+         "measured_sessions": sessions},
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000000)
+    parser.add_argument("--reference-sessions", type=int, default=50000)
+    parser.add_argument("--samples", type=int, default=100, help="scores held per session")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sessions, args.reference_sessions, args.samples)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'layout':<22} {'sessions':>9} {'B/session':>10} {'total MB':>10}")
+    for row in results:
+        print(f"{row['layout']:<22} {row['sessions']:>9} {row['bytes_per_session']:>10.0f} "
+              f"{row['total_mb']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# tests/performance/benchmark_tokenization.py
+"""Tokens/second of pad-to-longest truncation vs. length-bucketed chunking.
+
+Messages follow a chat-like length mix: mostly short replies, some
+paragraphs, and a tail of long journaling entries well past one
+MAX_TEXT_LENGTH window. "before" truncates each message and pads a whole
+batch to its longest member. "after" scores long messages in
+overlapping windows and buckets windows by length. Tokens/s counts only
+real (unpadded) tokens, so it measures useful work.
+
+Usage:
+    python -m tests.performance.benchmark_tokenization --messages 512
+"""
+import argparse
+import json
+import random
+import time
+
+from .utils import add_service_to_path
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.config import settings  # noqa: E402
+from src.models.transformer_analyzer import TransformerAnalyzer  # noqa: E402
+
+WORDS = (
+    "i feel really tired today and work was hard but my sister called and that helped a bit "
+    "still cannot sleep worried about everything maybe tomorrow will be better thanks for listening "
+    "sometimes it gets overwhelming though i went for a walk and the weather was nice"
+).split()
+
+# (share of messages, min words, max words)
+LENGTH_MIX = [(0.6, 2, 20), (0.3, 20, 80), (0.1, 150, 900)]
+
+def make_messages(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        bucket = rng.choices(LENGTH_MIX, weights=[share for share, _, _ in LENGTH_MIX])[0]
+        messages.append(" ".join(rng.choices(WORDS, k=rng.randint(bucket[1], bucket[2]))))
+    return messages
+
+def padding_stats(analyzer: TransformerAnalyzer, batches):
+    real = padded = 0
+    for texts in batches:
+        features, _ = analyzer._tokenize(texts)
+        lengths = [len(ids) for ids in features["input_ids"]]
+        real += sum(lengths)
+        padded += sum(len(batch) * max(lengths[i] for i in batch) for batch in analyzer._buckets(lengths))
+    return real, padded
+
+def run_benchmark(model_name: str, messages, batch_size: int, max_batch_tokens: int):
+    configs = {
+        "before": {"long_text": "truncate", "max_batch_tokens": 0},
+        "after": {"long_text": "chunk", "max_batch_tokens": max_batch_tokens},
+    }
+    batches = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+    results = []
+    for name, options in configs.items():
+        analyzer = TransformerAnalyzer(model_name=model_name, **options)
+        analyzer.analyze_batch(messages[:batch_size])  # Warm up
+
+        real, padded = padding_stats(analyzer, batches)
+        start = time.perf_counter()
+        for texts in batches:
+            analyzer.analyze_batch(texts)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "config": name,
+            "messages": len(messages),
+            "tokens_scored": real,
+            "padding_fraction": 1 - real / padded,
+            "tokens_per_second": real / elapsed,
+            "messages_per_second": len(messages) / elapsed,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.TRANSFORMER_MODEL)
+    parser.add_argument("--messages", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_SIZE)
+    parser.add_argument("--max-batch-tokens", type=int, default=settings.MAX_BATCH_TOKENS)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.model, make_messages(args.messages), args.batch_size, args.max_batch_tokens)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'config':<8} {'tokens':>9} {'padding':>8} {'tokens/s':>10} {'msgs/s':>8}")
+    for row in results:
+        print(f"{row['config']:<8} {row['tokens_scored']:>9} {row['padding_fraction']:>8.1%} "
+              f"{row['tokens_per_second']:>10.0f} {row['messages_per_second']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# tests/performance/evaluate_cascade.py
+"""Offline evaluation of the early-exit cascade against the full ensemble.
+
+Every message is scored once by VADER and once by the transformer; each
+policy in the grid is then simulated on those scores. For each policy
+the harness reports the fraction of transformer calls saved, label
+agreement and mean |score delta| against the full ensemble, and accuracy
+against the gold labels.
+
+The labelled set is a JSONL file of {"text": ..., "label":
+"negative"|"neutral"|"positive"}. Without --data, the small built-in set
+from benchmark_backends is used.
+
+Usage:
+    python -m tests.performance.evaluate_cascade --data labelled.jsonl --thresholds 0.5,0.6,0.7
+"""
+import argparse
+import json
+
+import numpy as np
+
+from .benchmark_backends import EVAL_SET
+from .utils import add_service_to_path
+
+add_service_to_path("sentiment-analysis")
+
+from shared.utils.config import settings  # noqa: E402
+from src.models.cascade import CascadePolicy  # noqa: E402
+from src.models.ensemble_analyzer import EnsembleAnalyzer  # noqa: E402
+from src.models.transformer_analyzer import TransformerAnalyzer  # noqa: E402
+from src.models.vader_analyzer import VADERAnalyzer  # noqa: E402
+from src.utils.preprocessing import extract_linguistic_features_batch  # noqa: E402
+
+def load_labelled(path):
+    if path is None:
+        return list(EVAL_SET)
+    with open(path) as f:
+        return [(row["text"], row["label"]) for row in map(json.loads, f) if row.get("text")]
+
+def to_label(score: float, neutral_band: float) -> str:
+    if score > neutral_band:
+        return "positive"
+    if score < -neutral_band:
+        return "negative"
+    return "neutral"
+
+def evaluate(ensemble: EnsembleAnalyzer, labelled, policies, neutral_band: float):
+    texts = [text for text, _ in labelled]
+    gold = [label for _, label in labelled]
+    vader = ensemble.analyzers["vader"].analyze_batch(texts)
+    transformer = ensemble.analyzers["transformer"].analyze_batch(texts)
+    features = extract_linguistic_features_batch(texts)
+
+    full = [r["overall_sentiment"] for r in ensemble._ensemble_batch(
+        {"vader": vader, "transformer": transformer}, texts, features)]
+    vader_only = [r["overall_sentiment"] for r in ensemble._ensemble_batch({"vader": vader}, texts, features)]
+    full_labels = [to_label(score, neutral_band) for score in full]
+
+    results = [{
+        "policy": "full ensemble",
+        "transformer_calls_saved": 0.0,
+        "agreement": 1.0,
+        "mean_abs_delta": 0.0,
+        "accuracy": float(np.mean([p == g for p, g in zip(full_labels, gold)])),
+    }]
+    for policy in policies:
+        exits = [policy.should_exit(v, f) for v, f in zip(vader, features)]
+        scores = [v if exit_early else f for v, f, exit_early in zip(vader_only, full, exits)]
+        labels = [to_label(score, neutral_band) for score in scores]
+        results.append({
+            "policy": policy.describe(),
+            "transformer_calls_saved": float(np.mean(exits)),
+            "agreement": float(np.mean([p == q for p, q in zip(labels, full_labels)])),
+            "mean_abs_delta": float(np.mean(np.abs(np.asarray(scores) - np.asarray(full)))),
+            "accuracy": float(np.mean([p == g for p, g in zip(labels, gold)])),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", help="JSONL file of {text, label}")
+    parser.add_argument("--model", default=settings.TRANSFORMER_MODEL)
+    parser.add_argument("--thresholds", default="0.4,0.5,0.6,0.7,0.8", help="VADER |compound| cut-offs")
+    parser.add_argument("--max-words", default=str(settings.CASCADE_MAX_WORDS), help="comma-separated")
+    parser.add_argument("--allow-negation", action="store_true")
+    parser.add_argument("--neutral-band", type=float, default=0.25,
+                        help="scores within +/- this are labelled neutral")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    ensemble = EnsembleAnalyzer(analyzers={
+        "vader": VADERAnalyzer(),
+        "transformer": TransformerAnalyzer(model_name=args.model)
+    })
+    policies = [
+        CascadePolicy(vader_threshold=float(threshold), max_words=int(max_words),
+                      allow_negation=args.allow_negation)
+        for threshold in args.thresholds.split(",") for max_words in args.max_words.split(",")
+    ]
+    results = evaluate(ensemble, load_labelled(args.data), policies, args.neutral_band)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'policy':<32} {'saved':>6} {'agree':>6} {'mean|d|':>8} {'acc':>6}")
+    for row in results:
+        print(f"{row['policy']:<32} {row['transformer_calls_saved']:>6.1%} {row['agreement']:>6.1%} "
+              f"{row['mean_abs_delta']:>8.3f} {row['accuracy']:>6.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# tests/performance/evaluate_drift.py
+"""Offline replay of labelled sessions through drift detectors: quality and cost.
+
+Sessions are interleaved round-robin, as they would arrive on the score
+stream, and every score goes through each detector. Per detector the
+harness reports:
+
+* precision / recall at session level. A drifting session counts as found
+  when the first alarm comes at or after its labelled onset. Any alarm in
+  a stable session, or before the onset, is a false alarm;
+* detection delay: messages from the onset to the first alarm (0 means
+  the onset message itself raised it);
+* false alarms per 1000 messages without drift, and direction accuracy;
+* updates/second over the detector calls alone.
+
+Detectors are built-in names or any ``module:attribute`` factory taking
+(window_size, threshold). Objects with ``add_scores``/``detect`` are
+replayed like BatchDriftDetector, one tick per round of the stream;
+anything else gets one instance per session and ``detect_drift(score)``.
+
+Sessions come from a JSONL file of {"session_id", "scores", "drift_at",
+"direction"} (drift_at/direction null for stable sessions), e.g.
+anonymised counselling sessions scored by the sentiment service. Without
+--data, seeded synthetic sessions from synthetic.py are used.
+
+Usage:
+    python -m tests.performance.evaluate_drift --sessions 500 --magnitudes 0.4,0.8
+    python -m tests.performance.evaluate_drift --data sessions.jsonl --detectors reference,my.module:Detector
+"""
+import argparse
+import importlib
+import json
+import time
+from collections import Counter
+
+import numpy as np
+
+from .synthetic import Conversation, interleave, make_conversations
+from .utils import add_service_to_path
+
+add_service_to_path("drift-detection")
+
+from src.detectors.batch_detector import BatchDriftDetector  # noqa: E402
+from src.detectors.statistical_detector import StatisticalDriftDetector  # noqa: E402
+from src.detectors.streaming_detector import StreamingDriftDetector  # noqa: E402
+
+DETECTORS = {
+    "reference": StatisticalDriftDetector,
+    "streaming": StreamingDriftDetector,
+    "batch": BatchDriftDetector,
+}
+
+def load_detector(name: str):
+    if name in DETECTORS:
+        return DETECTORS[name]
+    module, _, attribute = name.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+def load_sessions(path):
+    sessions = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                sessions.append(Conversation(row["session_id"], [], row["scores"],
+                                             row.get("drift_at"), row.get("direction")))
+    return sessions
+
+def replay(factory, sessions, window_size: int, threshold: float):
+    """{session_id: [(drift_detected, direction) per message]} and the seconds spent in the detector"""
+    stream = [(session_id, score) for session_id, _, score in interleave(sessions)]
+    outcomes = {session.session_id: [] for session in sessions}
+    probe = factory(window_size=window_size, threshold=threshold)
+    elapsed = 0.0
+
+    if hasattr(probe, "add_scores"):
+        # One tick per interleave round: every session still talking contributes its
+        # next score, so ticks shrink as shorter sessions run out
+        ticks, sent = [], Counter()
+        for session_id, score in stream:
+            round_index = sent[session_id]
+            sent[session_id] += 1
+            if round_index == len(ticks):
+                ticks.append([])
+            ticks[round_index].append((session_id, score))
+        for tick in ticks:
+            session_ids = [session_id for session_id, _ in tick]
+            began = time.perf_counter()
+            probe.add_scores(session_ids, [score for _, score in tick])
+            result = probe.detect(session_ids).to_dicts()
+            elapsed += time.perf_counter() - began
+            for session_id in session_ids:
+                drift = result[session_id]
+                outcomes[session_id].append((drift["drift_detected"], drift["drift_direction"]))
+        return outcomes, elapsed
+
+    detectors = {session.session_id: factory(window_size=window_size, threshold=threshold) for session in sessions}
+    for session_id, score in stream:
+        detector = detectors[session_id]
+        began = time.perf_counter()
+        drift = detector.detect_drift(score)
+        elapsed += time.perf_counter() - began
+        outcomes[session_id].append((drift["drift_detected"], drift["drift_direction"]))
+    return outcomes, elapsed
+
+def score(sessions, outcomes):
+    true_positives = false_positives = correct_direction = 0
+    delays, clean_messages, false_alarms = [], 0, 0
+    for session in sessions:
+        alarms = [index for index, (detected, _) in enumerate(outcomes[session.session_id]) if detected]
+        onset = session.drift_at if session.drifted else len(session.scores)
+        clean_messages += onset
+        false_alarms += sum(1 for index in alarms if index < onset)
+
+        first = alarms[0] if alarms else None
+        if first is None:
+            continue
+        if first < onset:
+            false_positives += 1
+            continue
+        true_positives += 1
+        delays.append(first - onset)
+        if outcomes[session.session_id][first][1] == session.direction:
+            correct_direction += 1
+
+    drifting = sum(1 for session in sessions if session.drifted)
+    flagged = true_positives + false_positives
+    return {
+        "precision": true_positives / flagged if flagged else 0.0,
+        "recall": true_positives / drifting if drifting else 0.0,
+        "mean_delay_messages": float(np.mean(delays)) if delays else float("nan"),
+        "p95_delay_messages": float(np.percentile(delays, 95)) if delays else float("nan"),
+        "false_alarms_per_1k": 1000 * false_alarms / clean_messages if clean_messages else 0.0,
+        "direction_accuracy": correct_direction / true_positives if true_positives else 0.0,
+    }
+
+def evaluate(detectors, sessions, window_size: int, threshold: float, label: str = ""):
+    updates = sum(len(session.scores) for session in sessions)
+    results = []
+    for name in detectors:
+        outcomes, elapsed = replay(load_detector(name), sessions, window_size, threshold)
+        row = {"detector": name, "dataset": label, "sessions": len(sessions)}
+        row.update(score(sessions, outcomes))
+        row["updates_per_second"] = updates / elapsed if elapsed else float("inf")
+        results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", help="JSONL file of labelled sessions; synthetic when omitted")
+    parser.add_argument("--detectors", default=",".join(DETECTORS), help="names or module:attribute")
+    parser.add_argument("--sessions", type=int, default=300, help="synthetic sessions per magnitude")
+    parser.add_argument("--length", type=int, default=40, help="messages per synthetic session")
+    parser.add_argument("--magnitudes", default="0.4,0.8", help="synthetic drift sizes")
+    parser.add_argument("--noise", type=float, default=0.2)
+    parser.add_argument("--window-size", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    detectors = args.detectors.split(",")
+    if args.data:
+        datasets = {args.data: load_sessions(args.data)}
+    else:
+        datasets = {
+            f"synthetic-{magnitude}": make_conversations(args.sessions, args.length, magnitude=float(magnitude),
+                                                         noise=args.noise, seed=args.seed)
+            for magnitude in args.magnitudes.split(",")
+        }
+
+    results = []
+    for label, sessions in datasets.items():
+        results.extend(evaluate(detectors, sessions, args.window_size, args.threshold, label))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'dataset':<16} {'detector':<10} {'prec':>6} {'recall':>6} {'delay':>6} {'p95':>5} "
+          f"{'FA/1k':>6} {'dir':>6} {'updates/s':>10}")
+    for row in results:
+        print(f"{row['dataset']:<16} {row['detector']:<10} {row['precision']:>6.1%} {row['recall']:>6.1%} "
+              f"{row['mean_delay_messages']:>6.1f} {row['p95_delay_messages']:>5.0f} "
+              f"{row['false_alarms_per_1k']:>6.1f} {row['direction_accuracy']:>6.1%} "
+              f"{row['updates_per_second']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
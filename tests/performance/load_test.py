@@ -0,0 +1,139 @@
+# tests/performance/load_test.py
+"""Closed-loop load test of the sentiment-analysis API.
+
+Each of --concurrency clients sends the synthetic conversations' messages
+to /api/v1/sentiment/analyze back to back. By default the app runs
+in-process behind httpx's ASGI transport, including its startup hooks,
+which measures the service without network or server overhead. With --url
+the same load goes over HTTP to a running deployment.
+
+session-management exposes no request routes yet and drift-detection is a
+stream worker, so the sentiment service is the one HTTP surface to load.
+
+Usage:
+    python -m tests.performance.load_test --concurrency 1,8,32 --requests 500
+    python -m tests.performance.load_test --url http://localhost:8001 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from .synthetic import interleave, make_conversations
+from .utils import add_service_to_path, latency_summary, peak_rss_mb
+
+ANALYZE_PATH = "/api/v1/sentiment/analyze"
+READY_PATH = "/api/v1/sentiment/ready"
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        response = await client.get(READY_PATH)
+        if response.status_code == 200:
+            return
+        if response.json().get("models", {}).get("state") == "failed":
+            raise RuntimeError(f"Service failed to load its models: {response.text}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Service not ready after {timeout:.0f}s: {response.text}")
+        await asyncio.sleep(0.5)
+
+async def drive(client: httpx.AsyncClient, payloads, concurrency: int):
+    """Send every payload with ``concurrency`` clients; returns (latencies ms, errors, seconds)"""
+    queue = list(reversed(payloads))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            payload = queue.pop()
+            start = time.perf_counter()
+            response = await client.post(ANALYZE_PATH, json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def make_payloads(count: int, seed: int):
+    conversations = make_conversations(max(1, count // 20), length=20, seed=seed)
+    messages = list(interleave(conversations))
+    return [
+        {"session_id": session_id, "message": message}
+        for session_id, message, _ in (messages * (count // len(messages) + 1))[:count]
+    ]
+
+async def run_load(client: httpx.AsyncClient, concurrency_levels, requests: int, seed: int,
+                   in_process: bool, ready_timeout: float):
+    await wait_until_ready(client, ready_timeout)
+    results = []
+    for concurrency in concurrency_levels:
+        # Distinct seeds per level keep the result cache from answering repeats
+        payloads = make_payloads(requests, seed + concurrency)
+        await drive(client, payloads[:concurrency], concurrency)  # Warm up
+        latencies, errors, elapsed = await drive(client, payloads, concurrency)
+        row = {
+            "concurrency": concurrency,
+            "requests": len(payloads),
+            "errors": errors,
+            "requests_per_second": len(payloads) / elapsed,
+            **latency_summary(latencies),
+        }
+        if in_process:
+            row["peak_rss_mb"] = peak_rss_mb()  # Server and client share the process
+        results.append(row)
+    return results
+
+async def run_in_process(concurrency_levels, requests: int, seed: int, ready_timeout: float):
+    add_service_to_path("sentiment-analysis")
+    from src.main import app
+
+    # httpx's ASGI transport doesn't send lifespan events, so run the hooks here
+    for handler in app.router.on_startup:
+        await handler()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://sentiment") as client:
+            return await run_load(client, concurrency_levels, requests, seed, True, ready_timeout)
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+
+async def run_over_http(url: str, concurrency_levels, requests: int, seed: int, ready_timeout: float):
+    limits = httpx.Limits(max_connections=max(concurrency_levels))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await run_load(client, concurrency_levels, requests, seed, False, ready_timeout)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running service; in-process when omitted")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=500, help="per concurrency level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    if args.url:
+        results = asyncio.run(run_over_http(args.url, levels, args.requests, args.seed, args.ready_timeout))
+    else:
+        results = asyncio.run(run_in_process(levels, args.requests, args.seed, args.ready_timeout))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for row in results:
+            print(f"{row['concurrency']:>11} {row['requests_per_second']:>8.1f} {row['p50_ms']:>8.2f} "
+                  f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['errors']:>7}")
+
+    if any(row["errors"] for row in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
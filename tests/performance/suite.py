@@ -0,0 +1,160 @@
+# tests/performance/suite.py
+"""Run the benchmark suite and compare it against a stored baseline.
+
+Every case is one of the benchmark modules, run in its own process with
+--json at a fixed size and seed (so RSS is the case's own and ``src``
+packages from different services never meet). Rows are flattened to
+metrics named ``case[param=value,...].field``. A metric regresses when it
+is worse than the baseline by more than --threshold: throughput
+(``*_per_second``) or drift precision/recall lower, or latency,
+per-update or per-score cost, RSS, errors, detection delay or false
+alarms higher.
+
+Baselines are machine-specific; record one on the machine that runs the
+comparison (e.g. the CI runner) with --save-baseline.
+
+Usage:
+    python -m tests.performance.suite --save-baseline
+    python -m tests.performance.suite --threshold 0.15 --output results.json
+    python -m tests.performance.suite --cases drift_detector,ensemble --with-db
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from .utils import REPO_ROOT
+
+BASELINE_PATH = REPO_ROOT / "tests" / "performance" / "baseline.json"
+
+# name -> (module, arguments, whether it needs a migrated Postgres)
+CASES = {
+    "ensemble": ("benchmark_ensemble", ["--batch-sizes", "1,32", "--iterations", "30"], False),
+    "load_in_process": ("load_test", ["--concurrency", "1,16", "--requests", "300"], False),
+    "workers": ("benchmark_workers", ["--workers", "1,2,4", "--requests", "300"], False),
+    "drift_detector": ("benchmark_drift_detector", ["--updates", "20000", "--window-sizes", "10,30"], False),
+    "batch_detector": ("benchmark_batch_detector", ["--sessions", "20000"], False),
+    "linguistic_features": ("benchmark_linguistic_features", ["--messages", "20000"], False),
+    "serialization": ("benchmark_serialization", ["--requests", "3000"], False),
+    "score_codec": ("benchmark_score_codec", ["--batch-sizes", "1,1000", "--scores", "10000"], False),
+    "drift_quality": ("evaluate_drift", ["--sessions", "300", "--magnitudes", "0.4,0.8"], False),
+    "db_ingest": ("benchmark_ingest", ["--rows", "20000"], True),
+}
+
+def direction(field: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if the field isn't compared"""
+    if field.endswith("per_second") or field in ("precision", "recall", "direction_accuracy"):
+        return 1
+    lower = ("_ms", "_mb", "_per_update", "_per_tick", "_per_score", "_messages", "_per_1k")
+    if field.endswith(lower) or field == "errors":
+        return -1
+    return 0
+
+def flatten(case: str, rows: List[Dict]) -> Dict[str, float]:
+    metrics = {}
+    for row in rows:
+        params = ",".join(
+            f"{key}={value}" for key, value in row.items()
+            if not direction(key) and isinstance(value, (str, int, bool)) and not isinstance(value, float)
+        )
+        for key, value in row.items():
+            if direction(key) and isinstance(value, (int, float)):
+                metrics[f"{case}[{params}].{key}"] = float(value)
+    return metrics
+
+def run_case(case: str) -> List[Dict]:
+    module, arguments, _ = CASES[case]
+    completed = subprocess.run(
+        [sys.executable, "-m", f"tests.performance.{module}", *arguments, "--json"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    try:
+        # A case may exit non-zero over its own budget and still report its rows
+        return json.loads(completed.stdout)
+    except json.JSONDecodeError:
+        raise RuntimeError(f"{case} failed (exit {completed.returncode}): {completed.stderr.strip()[-2000:]}")
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[Dict]:
+    """Metrics worse than the baseline by more than ``threshold`` (a fraction)"""
+    regressions = []
+    for name, value in current.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        sign = direction(name.rsplit(".", 1)[1])
+        if reference == 0:
+            worse = sign < 0 and value > 0
+            change = float("inf") if worse else 0.0
+        else:
+            change = (value - reference) / abs(reference)
+            worse = -sign * change > threshold
+        if worse:
+            regressions.append({"metric": name, "baseline": reference, "current": value, "change": change})
+    return regressions
+
+def environment() -> Dict[str, str]:
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                            capture_output=True, text=True).stdout.strip()
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": str(os.cpu_count()),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(case for case, (_, _, db) in CASES.items() if not db),
+                        help=f"comma-separated, from: {', '.join(CASES)}")
+    parser.add_argument("--with-db", action="store_true", help="also run the cases that need Postgres")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--output", help="also write the full results to this file")
+    args = parser.parse_args()
+
+    cases = [case for case in args.cases.split(",") if case]
+    if args.with_db:
+        cases += [case for case, (_, _, db) in CASES.items() if db and case not in cases]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {"environment": environment(), "cases": {}, "metrics": {}}
+    for case in cases:
+        print(f"running {case}...", file=sys.stderr)
+        rows = run_case(case)
+        results["cases"][case] = rows
+        results["metrics"].update(flatten(case, rows))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results["metrics"], baseline["metrics"], args.threshold)
+        results["baseline"] = baseline["environment"]
+    results["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps({"metrics": results["metrics"], "regressions": regressions}, indent=2))
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['metric']}: {regression['baseline']:.4g} -> "
+              f"{regression['current']:.4g} ({regression['change']:+.1%})", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
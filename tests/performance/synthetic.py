@@ -0,0 +1,88 @@
+# tests/performance/synthetic.py
+"""Synthetic conversations with controlled, labelled drift.
+
+Each conversation has a latent sentiment per message: noise around a
+baseline, shifted by ``magnitude`` (in either direction) from ``drift_at``
+on in the drifting ones. Message text is drawn from phrase banks by that
+latent score, so text-based models see the drift too, and the labels say
+exactly where it starts. Everything is derived from ``seed``.
+"""
+import random
+from dataclasses import dataclass
+from typing import List, Optional
+
+POSITIVE = [
+    "today was actually pretty good", "i went for a walk and felt lighter", "thanks, that really helped",
+    "i slept well for once", "my sister called and we laughed a lot", "i'm proud of getting out of bed early",
+    "work went better than i expected", "i feel calmer after talking",
+]
+NEUTRAL = [
+    "i went to work and came home", "my appointment moved to thursday", "i had pasta for dinner",
+    "it rained most of the day", "what time does the group start", "i'm reading a book about gardening",
+    "nothing much happened", "i watched some tv",
+]
+NEGATIVE = [
+    "i can't sleep again", "everything feels pointless lately", "i'm so tired of pretending i'm fine",
+    "i had another panic attack at work", "nobody would notice if i stopped talking",
+    "i feel like i'm letting everyone down", "why does nothing ever work out", "i've been crying all evening",
+]
+
+@dataclass
+class Conversation:
+    session_id: str
+    messages: List[str]
+    scores: List[float]  # Latent sentiment per message, in [-1, 1]
+    drift_at: Optional[int]  # Index of the first drifted message; None if the conversation is stable
+    direction: Optional[str]  # "positive" or "negative" when drifting
+
+    @property
+    def drifted(self) -> bool:
+        return self.drift_at is not None
+
+def phrase_for(score: float, rng: random.Random) -> str:
+    if score > 0.25:
+        bank = POSITIVE
+    elif score < -0.25:
+        bank = NEGATIVE
+    else:
+        bank = NEUTRAL
+    return rng.choice(bank)
+
+def make_conversation(session_id: str, length: int, rng: random.Random, drift: bool = False,
+                      magnitude: float = 0.8, noise: float = 0.2,
+                      direction: Optional[str] = None) -> Conversation:
+    baseline = rng.uniform(-0.3, 0.3)
+    drift_at = direction_name = None
+    if drift:
+        # Leave room on both sides so there is history to compare and drift to find
+        drift_at = rng.randint(length // 3, max(length // 3, 2 * length // 3))
+        direction_name = direction or rng.choice(["positive", "negative"])
+
+    scores, messages = [], []
+    for index in range(length):
+        mean = baseline
+        if drift_at is not None and index >= drift_at:
+            mean += magnitude if direction_name == "positive" else -magnitude
+        score = max(-1.0, min(1.0, rng.gauss(mean, noise)))
+        scores.append(score)
+        messages.append(phrase_for(score, rng))
+    return Conversation(session_id, messages, scores, drift_at, direction_name)
+
+def make_conversations(count: int, length: int = 40, drift_fraction: float = 0.5, magnitude: float = 0.8,
+                       noise: float = 0.2, seed: int = 0) -> List[Conversation]:
+    """``count`` conversations of ``length`` messages; ``drift_fraction`` of them drift"""
+    rng = random.Random(seed)
+    drifting = set(rng.sample(range(count), round(count * drift_fraction)))
+    return [
+        make_conversation(f"session-{index}", length, rng, drift=index in drifting,
+                          magnitude=magnitude, noise=noise)
+        for index in range(count)
+    ]
+
+def interleave(conversations: List[Conversation]):
+    """(session_id, message, score) in arrival order, round-robin across conversations"""
+    longest = max((len(c.messages) for c in conversations), default=0)
+    for index in range(longest):
+        for conversation in conversations:
+            if index < len(conversation.messages):
+                yield conversation.session_id, conversation.messages[index], conversation.scores[index]
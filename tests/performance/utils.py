@@ -0,0 +1,33 @@
+# tests/performance/utils.py
+import resource
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+def add_service_to_path(service: str) -> None:
+    """Make ``shared`` and a service's ``src`` package importable"""
+    for path in (REPO_ROOT, REPO_ROOT / "services" / service):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of a list of latencies in milliseconds"""
+    if not latencies_ms:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    values = np.asarray(latencies_ms)
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024